@@ -8,6 +8,11 @@ import os
 import logging
 import hashlib
 import json
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, Any, Tuple, List, Optional
 from PIL import Image
@@ -17,6 +22,11 @@ try:
     import torch
     TORCH_AVAILABLE = True
     TorchTensor = torch.Tensor
+    
+    # Let any remaining FP32 matmuls use TF32 tensor cores on Ampere+
+    torch.backends.cuda.matmul.allow_tf32 = True
+    torch.backends.cudnn.allow_tf32 = True
+    torch.set_float32_matmul_precision('high')
 except ImportError:
     TORCH_AVAILABLE = False
     torch = None
@@ -24,8 +34,96 @@ except ImportError:
     from typing import Any
     TorchTensor = Any
 
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
+try:
+    # HEIC/HEIF support (iPhone photos) through the regular Image.open path
+    import pillow_heif
+    pillow_heif.register_heif_opener()
+except ImportError:
+    pass
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# Pre-resize targets (short side) applied in uint8 before model preprocessing
+CLIP_PRERESIZE = 256
+BLIP_INPUT_SIZE = 384
+
+# Maximum cache rows written per SQLite transaction by the background writer
+CACHE_WRITE_BATCH = 100
+
+# Batch sizes the compiled CLIP image encoder is captured for (one CUDA graph each).
+# Batches are padded up to the next size, and larger ones are split, so the encoder never
+# sees another shape and never recompiles.
+CLIP_COMPILE_BATCH_SIZES = (1, 4, 16, 64)
+
+# Files larger than this are not content-hashed for duplicate detection
+CONTENT_HASH_MAX_BYTES = 50 * 1024 * 1024
+
+# Prompts used for BLIP conditional captions
+BLIP_CONDITIONAL_PROMPTS = [
+    "a picture of",
+    "this image shows",
+    "the content includes",
+    "this appears to be"
+]
+
+
+# Threads used by analyze_images to decode/resize/preprocess images in parallel
+# (PIL releases the GIL for decoding and resampling)
+PREPROCESS_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+_preprocess_pool: Optional[ThreadPoolExecutor] = None
+
+
+def _get_preprocess_pool() -> ThreadPoolExecutor:
+    """Module-level pool reused across analyze_images calls"""
+    global _preprocess_pool
+    if _preprocess_pool is None:
+        _preprocess_pool = ThreadPoolExecutor(
+            max_workers=PREPROCESS_WORKERS, thread_name_prefix="vision-preprocess"
+        )
+    return _preprocess_pool
+
+
+def _clip_softmax_scores(image_features: TorchTensor, text_features: TorchTensor) -> TorchTensor:
+    """Softmax over CLIP similarities for one image (features are L2-normalized)"""
+    similarities = image_features @ text_features.T
+    return torch.softmax(similarities.float() * 100, dim=-1).squeeze(0)
+
+
+def _use_sdpa_attention(attn, is_causal: bool):
+    """
+    Route a CLIP nn.MultiheadAttention through F.scaled_dot_product_attention
+    
+    CLIP only uses it for self-attention in (seq, batch, dim) layout. The text tower's
+    attn_mask is the causal mask, so it is replaced by is_causal=True, which lets
+    PyTorch pick the FlashAttention kernel.
+    """
+    import torch.nn.functional as F
+    
+    num_heads = attn.num_heads
+    
+    def forward(query, key, value, need_weights=False, attn_mask=None):
+        seq_len, batch_size, embed_dim = query.shape
+        qkv = F.linear(query, attn.in_proj_weight, attn.in_proj_bias)
+        # (L, B, 3*E) -> 3 x (B, H, L, D)
+        q, k, v = qkv.view(seq_len, batch_size, 3, num_heads, embed_dim // num_heads).permute(2, 1, 3, 0, 4).unbind(0)
+        out = F.scaled_dot_product_attention(q, k, v, is_causal=is_causal)
+        out = out.permute(2, 0, 1, 3).reshape(seq_len, batch_size, embed_dim)
+        return attn.out_proj(out), None
+    
+    attn.forward = forward
+
 
 class AIVisionService:
     """
@@ -34,12 +132,41 @@ class AIVisionService:
     
     def __init__(self, 
                  cache_dir: str = "/tmp/multimedia_cache",
-                 device: str = "auto"):
+                 device: str = "auto",
+                 onnx_int8: Optional[bool] = None,
+                 torch_compile: Optional[bool] = None):
         
         self.logger = logging.getLogger(__name__)
         self.cache_dir = Path(cache_dir) / "ai_vision"
         self.cache_dir.mkdir(parents=True, exist_ok=True)
         
+        # Single SQLite store for analysis results instead of one JSON file per image
+        self._cache_lock = threading.Lock()
+        self._cache_db = self._init_cache_db()
+        
+        # Cache writes happen on a background thread, off the analysis path.
+        # Entries stay in _pending_cache until committed so lookups still see them.
+        self._pending_cache: Dict[str, Tuple[str, float, Dict[str, Any]]] = {}
+        self._cache_queue: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._cache_writer_thread = None
+        if self._cache_db is not None:
+            self._cache_writer_thread = threading.Thread(
+                target=self._cache_writer, name="vision-cache-writer", daemon=True
+            )
+            self._cache_writer_thread.start()
+        
+        # INT8 ONNX Runtime path for the CLIP image encoder (CPU only)
+        if onnx_int8 is None:
+            onnx_int8 = os.getenv("VISION_ONNX_INT8", "false").lower() == "true"
+        self.onnx_int8 = onnx_int8
+        
+        # torch.compile + CUDA graphs for the vision encoders (CUDA only)
+        if torch_compile is None:
+            torch_compile = os.getenv("VISION_TORCH_COMPILE", "true").lower() == "true"
+        self.torch_compile = torch_compile
+        # Set once the CLIP image encoder is compiled: batch sizes it may be called with
+        self._clip_batch_sizes: Tuple[int, ...] = ()
+        
         # Device selection
         if not TORCH_AVAILABLE:
             self.device = "cpu"
@@ -53,13 +180,6 @@ class AIVisionService:
         self.models = {}
         self.current_model = None
         
-        # Initialize models only if torch is available
-        if TORCH_AVAILABLE:
-            self._init_clip_model()
-            self._init_blip_model()
-        else:
-            self.logger.info("AI models skipped - torch not available")
-        
         # Analysis categories
         self.image_categories = [
             "document", "screenshot", "photo", "artwork", "diagram", 
@@ -78,6 +198,30 @@ class AIVisionService:
             "is_photo": "photograph, camera, real life, outdoor, indoor",
             "is_artwork": "art, painting, drawing, illustration, creative"
         }
+        
+        # Predefined descriptive prompts
+        self.descriptive_prompts = [
+            "a detailed photo of",
+            "a screenshot showing",
+            "a document containing",
+            "an illustration of",
+            "a diagram explaining",
+            "a chart displaying",
+            "artwork depicting",
+            "a technical drawing of",
+            "an interface showing",
+            "text that says"
+        ]
+        
+        # Initialize models only if torch is available
+        # (prompts above must exist first: CLIP text features are precomputed at load time)
+        if TORCH_AVAILABLE:
+            self._init_clip_model()
+            self._init_blip_model()
+            if self.torch_compile and self.device == "cuda" and hasattr(torch, "compile"):
+                self._compile_vision_encoders()
+        else:
+            self.logger.info("AI models skipped - torch not available")
     
     def _init_clip_model(self):
         """Initialize CLIP model for image-text understanding"""
@@ -86,6 +230,19 @@ class AIVisionService:
             
             # Load CLIP model
             model, preprocess = clip.load("ViT-B/32", device=self.device)
+            if self.device == "cuda":
+                # clip.load already converts weights to FP16 on CUDA; make it explicit
+                model = model.half()
+                # NHWC lets cuDNN pick tensor-core kernels for the patch-embedding conv
+                model = model.to(memory_format=torch.channels_last)
+                
+                # FlashAttention kernels need Ampere (sm_80) or newer
+                if hasattr(torch.nn.functional, "scaled_dot_product_attention") \
+                        and torch.cuda.get_device_capability()[0] >= 8:
+                    for block in model.visual.transformer.resblocks:
+                        _use_sdpa_attention(block.attn, is_causal=False)
+                    for block in model.transformer.resblocks:
+                        _use_sdpa_attention(block.attn, is_causal=block.attn_mask is not None)
             
             self.models['clip'] = {
                 'model': model,
@@ -94,6 +251,25 @@ class AIVisionService:
                 'capabilities': ['image_classification', 'text_similarity', 'zero_shot']
             }
             
+            # The prompt lists never change, so encode them once instead of per image
+            self._clip_category_feats = self._encode_clip_texts(
+                model, [f"a {category}" for category in self.image_categories]
+            )
+            # Positive/negative content prompts interleaved as (pos_0, neg_0, pos_1, neg_1, ...)
+            content_texts = []
+            for prompt in self.content_prompts.values():
+                content_texts.extend([f"an image with {prompt}", f"an image without {prompt}"])
+            self._clip_content_text_feats = self._encode_clip_texts(model, content_texts)
+            self._clip_desc_feats = self._encode_clip_texts(model, self.descriptive_prompts)
+            
+            # On GPU fuse matmul + softmax into one compiled kernel (torch >= 2.0)
+            self._clip_score = _clip_softmax_scores
+            if self.device == "cuda" and hasattr(torch, "compile"):
+                self._clip_score = torch.compile(_clip_softmax_scores, mode="reduce-overhead")
+            
+            if self.onnx_int8 and self.device == "cpu":
+                self.models['clip']['onnx_visual'] = self._load_onnx_clip_visual(model)
+            
             self.current_model = 'clip'
             self.logger.info(f"✅ CLIP model loaded on {self.device}")
             
@@ -102,6 +278,88 @@ class AIVisionService:
         except Exception as e:
             self.logger.warning(f"⚠️ CLIP initialization failed: {e}")
     
+    def _compile_vision_encoders(self):
+        """
+        Compile the CLIP and BLIP image encoders with CUDA graphs and warm them up
+        
+        Only the image encoders are compiled, each for fixed shapes: BLIP's encoder always
+        gets one image, and CLIP batches are padded to CLIP_COMPILE_BATCH_SIZES (all warmed up
+        here). BLIP's text decoder sees a new sequence length at every generated token, which
+        would recompile on each step.
+        """
+        if 'clip' in self.models:
+            model = self.models['clip']['model']
+            eager_visual = model.visual
+            try:
+                model.visual = torch.compile(eager_visual, mode="reduce-overhead", dynamic=False)
+                with torch.inference_mode():
+                    for batch_size in CLIP_COMPILE_BATCH_SIZES:
+                        model.encode_image(torch.zeros(batch_size, 3, 224, 224, device=self.device,
+                                                       dtype=model.dtype).contiguous(memory_format=torch.channels_last))
+                self._clip_batch_sizes = CLIP_COMPILE_BATCH_SIZES
+                self.logger.info(f"✅ CLIP image encoder compiled for batch sizes {CLIP_COMPILE_BATCH_SIZES}")
+            except Exception as e:
+                model.visual = eager_visual
+                self._clip_batch_sizes = ()
+                self.logger.warning(f"⚠️ CLIP torch.compile failed, using eager mode: {e}")
+        
+        if 'blip' in self.models:
+            model = self.models['blip']['model']
+            eager_vision = model.vision_model
+            try:
+                model.vision_model = torch.compile(eager_vision, mode="reduce-overhead", dynamic=False)
+                size = BLIP_INPUT_SIZE
+                with torch.inference_mode():
+                    model.vision_model(pixel_values=torch.zeros(1, 3, size, size, device=self.device, dtype=model.dtype))
+                self.logger.info("✅ BLIP image encoder compiled")
+            except Exception as e:
+                model.vision_model = eager_vision
+                self.logger.warning(f"⚠️ BLIP torch.compile failed, using eager mode: {e}")
+    
+    def _load_onnx_clip_visual(self, model):
+        """
+        Export the CLIP image encoder to ONNX and quantize it to INT8
+        
+        Only the image encoder is exported: text features are computed once at load time.
+        Dynamic quantization is used so no calibration images are needed.
+        """
+        try:
+            import onnxruntime as ort
+            from onnxruntime.quantization import quantize_dynamic, QuantType
+            
+            fp32_path = self.cache_dir / "clip_vit_b32_visual.onnx"
+            int8_path = self.cache_dir / "clip_vit_b32_visual.int8.onnx"
+            
+            if not int8_path.exists():
+                dummy = torch.zeros(1, 3, 224, 224, dtype=model.dtype)
+                torch.onnx.export(
+                    model.visual, dummy, str(fp32_path),
+                    input_names=["pixel_values"], output_names=["image_embeds"],
+                    dynamic_axes={"pixel_values": {0: "batch"}, "image_embeds": {0: "batch"}},
+                    opset_version=17
+                )
+                quantize_dynamic(str(fp32_path), str(int8_path), weight_type=QuantType.QInt8)
+                fp32_path.unlink(missing_ok=True)
+            
+            session = ort.InferenceSession(str(int8_path), providers=["CPUExecutionProvider"])
+            self.logger.info("✅ CLIP image encoder running on ONNX Runtime (INT8)")
+            return session
+            
+        except ImportError:
+            self.logger.warning("⚠️ onnxruntime not available. Install with: pip install onnxruntime")
+        except Exception as e:
+            self.logger.warning(f"⚠️ CLIP ONNX export failed, using PyTorch: {e}")
+        return None
+    
+    def _encode_clip_texts(self, model, texts: List[str]) -> TorchTensor:
+        """Tokenize and encode prompts with CLIP (L2-normalized)"""
+        import clip
+        
+        text_tokens = clip.tokenize(texts).to(self.device)
+        with torch.inference_mode():
+            text_features = model.encode_text(text_tokens)
+            return text_features / text_features.norm(dim=-1, keepdim=True)
+    
     def _init_blip_model(self):
         """Initialize BLIP model for image captioning"""
         try:
@@ -109,10 +367,18 @@ class AIVisionService:
             
             # Load BLIP model (smaller version for efficiency)
             processor = BlipProcessor.from_pretrained("Salesforce/blip-image-captioning-base")
-            model = BlipForConditionalGeneration.from_pretrained("Salesforce/blip-image-captioning-base")
             
             if self.device == "cuda":
-                model = model.to(self.device)
+                # FP16 halves activation bandwidth and runs the matmuls on tensor cores
+                model = BlipForConditionalGeneration.from_pretrained(
+                    "Salesforce/blip-image-captioning-base", torch_dtype=torch.float16
+                )
+                model = model.to(self.device, dtype=torch.float16)
+                model = model.to(memory_format=torch.channels_last)
+            else:
+                model = BlipForConditionalGeneration.from_pretrained("Salesforce/blip-image-captioning-base")
+            
+            model.eval()
             
             self.models['blip'] = {
                 'model': model,
@@ -121,6 +387,12 @@ class AIVisionService:
                 'capabilities': ['image_captioning', 'description_generation']
             }
             
+            # Tokenize the conditional caption prompts once; only the image changes per call
+            self._blip_prompt_inputs = {
+                prompt: processor(text=prompt, return_tensors="pt").to(self.device)
+                for prompt in BLIP_CONDITIONAL_PROMPTS
+            }
+            
             self.logger.info(f"✅ BLIP model loaded on {self.device}")
             
         except ImportError:
@@ -142,15 +414,14 @@ class AIVisionService:
             }
         
         try:
-            # Load and preprocess image
-            image = Image.open(image_path).convert('RGB')
-            
-            # Check cache first
-            cache_key = self._get_cache_key(image_path)
-            cached_result = self._load_cached_analysis(cache_key)
+            # Check cache first (by path, then by file content)
+            cache_keys, cached_result = self._lookup_cached_analysis(image_path)
             if cached_result:
                 return cached_result
             
+            # Load and preprocess image
+            image = self._load_image(image_path)
+            
             # Perform analysis
             analysis_results = {}
             
@@ -168,7 +439,8 @@ class AIVisionService:
             description, confidence, metadata = self._combine_analysis_results(analysis_results)
             
             # Cache results
-            self._cache_analysis(cache_key, description, confidence, metadata)
+            for cache_key in cache_keys:
+                self._cache_analysis(cache_key, description, confidence, metadata)
             
             return description, confidence, metadata
             
@@ -176,6 +448,152 @@ class AIVisionService:
             self.logger.error(f"Image analysis failed: {e}")
             return "", 0.0, {"error": str(e)}
     
+    def analyze_images(self, image_paths: List[str]) -> List[Tuple[str, float, Dict[str, Any]]]:
+        """
+        Analyze several images, running the CLIP image encoder once over the whole batch
+        
+        Returns:
+            list of (description, confidence, analysis_data) in the order of image_paths
+        """
+        if not TORCH_AVAILABLE:
+            return [self.analyze_image(image_path) for image_path in image_paths]
+        
+        results: List[Optional[Tuple[str, float, Dict[str, Any]]]] = [None] * len(image_paths)
+        to_load = []  # (index, cache_keys, image_path)
+        
+        for i, image_path in enumerate(image_paths):
+            try:
+                cache_keys, cached_result = self._lookup_cached_analysis(image_path)
+                if cached_result:
+                    results[i] = cached_result
+                    continue
+                to_load.append((i, cache_keys, image_path))
+            except Exception as e:
+                self.logger.error(f"Image analysis failed: {e}")
+                results[i] = ("", 0.0, {"error": str(e)})
+        
+        # Decode + CLIP/BLIP preprocessing run on the worker pool instead of serially
+        pending = []  # (index, cache_keys, blip_input)
+        clip_inputs = []
+        prepared = _get_preprocess_pool().map(self._prepare_image, [path for _, _, path in to_load])
+        for (i, cache_keys, _), (clip_input, blip_input, error) in zip(to_load, prepared):
+            if error is not None:
+                self.logger.error(f"Image analysis failed: {error}")
+                results[i] = ("", 0.0, {"error": str(error)})
+                continue
+            pending.append((i, cache_keys, blip_input))
+            clip_inputs.append(clip_input)
+        
+        clip_results = [{} for _ in pending]
+        if pending and 'clip' in self.models:
+            try:
+                image_features = self._encode_clip_tensor(torch.stack(clip_inputs))
+                model = self.models['clip']['model']
+                clip_results = [
+                    self._score_clip_features(image_features[j:j + 1], model)
+                    for j in range(len(pending))
+                ]
+            except Exception as e:
+                self.logger.debug(f"CLIP batch analysis failed: {e}")
+        
+        for (i, cache_keys, blip_input), clip_result in zip(pending, clip_results):
+            try:
+                analysis_results = {}
+                if 'clip' in self.models:
+                    analysis_results['clip'] = clip_result
+                if 'blip' in self.models:
+                    analysis_results['blip'] = self._analyze_with_blip(pixel_values=blip_input)
+                
+                description, confidence, metadata = self._combine_analysis_results(analysis_results)
+                for cache_key in cache_keys:
+                    self._cache_analysis(cache_key, description, confidence, metadata)
+                results[i] = (description, confidence, metadata)
+            except Exception as e:
+                self.logger.error(f"Image analysis failed: {e}")
+                results[i] = ("", 0.0, {"error": str(e)})
+        
+        return results
+    
+    def _load_image(self, image_path: str) -> Image.Image:
+        """Open an image as RGB, downscaled in uint8 to just above the model input size"""
+        # CLIP resizes the short side to 224 then center-crops; BLIP resizes to 384x384.
+        # Shrinking here keeps the float conversion in the transforms small for large photos.
+        target = BLIP_INPUT_SIZE if 'blip' in self.models else CLIP_PRERESIZE
+        
+        image = Image.open(image_path)
+        # For JPEGs let libjpeg decode at 1/2, 1/4 or 1/8 scale (still >= target); no-op for other formats
+        image.draft('RGB', (target, target))
+        image = image.convert('RGB')
+        
+        short_side = min(image.size)
+        if short_side > target:
+            scale = target / short_side
+            new_size = (max(target, round(image.width * scale)), max(target, round(image.height * scale)))
+            image = image.resize(new_size, Image.BILINEAR)
+        
+        return image
+    
+    def _prepare_image(self, image_path: str) -> Tuple[Optional[TorchTensor], Optional[TorchTensor], Optional[Exception]]:
+        """Load an image and run CLIP and BLIP preprocessing once each (called from the preprocess pool)"""
+        try:
+            image = self._load_image(image_path)
+            clip_input = None
+            blip_input = None
+            if 'clip' in self.models:
+                clip_input = self.models['clip']['preprocess'](image)
+            if 'blip' in self.models:
+                blip_input = self._preprocess_blip(image)
+            return clip_input, blip_input, None
+        except Exception as e:
+            return None, None, e
+    
+    def _preprocess_blip(self, image: Image.Image) -> TorchTensor:
+        """BLIP pixel values for one image (CPU, float32)"""
+        processor = self.models['blip']['processor']
+        return processor(images=image, return_tensors="pt")["pixel_values"]
+    
+    def _encode_clip_images(self, images: List[Image.Image]) -> TorchTensor:
+        """Encode one or more images with CLIP in a single forward pass (L2-normalized)"""
+        preprocess = self.models['clip']['preprocess']
+        return self._encode_clip_tensor(torch.stack([preprocess(image) for image in images]))
+    
+    def _encode_clip_tensor(self, image_tensor: TorchTensor) -> TorchTensor:
+        """Encode a preprocessed [N, 3, H, W] CPU batch with CLIP (L2-normalized)"""
+        model = self.models['clip']['model']
+        
+        onnx_visual = self.models['clip'].get('onnx_visual')
+        if onnx_visual is not None:
+            image_features = torch.from_numpy(
+                onnx_visual.run(None, {"pixel_values": image_tensor.numpy()})[0]
+            )
+            return image_features / image_features.norm(dim=-1, keepdim=True)
+        
+        if self.device == "cuda":
+            # Pinned memory lets the host-to-device copy run asynchronously
+            image_tensor = image_tensor.pin_memory().to(self.device, dtype=model.dtype, non_blocking=True)
+            image_tensor = image_tensor.contiguous(memory_format=torch.channels_last)
+        else:
+            image_tensor = image_tensor.to(self.device, dtype=model.dtype)
+        with torch.inference_mode():
+            if not self._clip_batch_sizes:
+                image_features = model.encode_image(image_tensor)
+                return image_features / image_features.norm(dim=-1, keepdim=True)
+            
+            # Compiled encoder: only call it with the batch sizes it was captured for
+            max_batch = self._clip_batch_sizes[-1]
+            chunks = []
+            for start in range(0, image_tensor.shape[0], max_batch):
+                chunk = image_tensor[start:start + max_batch]
+                count = chunk.shape[0]
+                padded_size = next(size for size in self._clip_batch_sizes if size >= count)
+                if padded_size > count:
+                    padding = chunk.new_zeros((padded_size - count, *chunk.shape[1:]))
+                    chunk = torch.cat([chunk, padding]).contiguous(memory_format=torch.channels_last)
+                # Normalizing copies the rows out of the CUDA graph's output buffer before the next replay
+                image_features = model.encode_image(chunk)[:count]
+                chunks.append(image_features / image_features.norm(dim=-1, keepdim=True))
+            return chunks[0] if len(chunks) == 1 else torch.cat(chunks)
+    
     def _analyze_with_clip(self, image: Image.Image) -> Dict[str, Any]:
         """Analyze image using CLIP model"""
         if 'clip' not in self.models:
@@ -183,89 +601,67 @@ class AIVisionService:
         
         try:
             model = self.models['clip']['model']
-            preprocess = self.models['clip']['preprocess']
-            
-            # Preprocess image
-            image_tensor = preprocess(image).unsqueeze(0).to(self.device)
-            
-            results = {}
             
-            # Category classification
-            category_scores = self._classify_image_category(image_tensor, model)
-            results['category'] = category_scores
+            # Encode the image once and share the features between all scoring helpers
+            image_features = self._encode_clip_images([image])
             
-            # Content detection
-            content_detection = self._detect_image_content(image_tensor, model)
-            results['content'] = content_detection
-            
-            # Generate descriptive text
-            descriptive_text = self._generate_clip_description(image_tensor, model)
-            results['description'] = descriptive_text
-            
-            return results
+            return self._score_clip_features(image_features, model)
             
         except Exception as e:
             self.logger.debug(f"CLIP analysis failed: {e}")
             return {}
     
-    def _classify_image_category(self, image_tensor: TorchTensor, model) -> Dict[str, float]:
-        """Classify image into predefined categories"""
-        import clip
+    def _score_clip_features(self, image_features: TorchTensor, model) -> Dict[str, Any]:
+        """Run all CLIP scoring helpers against precomputed image features"""
+        results = {}
+        
+        # Category classification
+        category_scores = self._classify_image_category(image_features, model)
+        results['category'] = category_scores
         
+        # Content detection
+        content_detection = self._detect_image_content(image_features, model)
+        results['content'] = content_detection
+        
+        # Generate descriptive text
+        descriptive_text = self._generate_clip_description(image_features, model)
+        results['description'] = descriptive_text
+        
+        return results
+    
+    def _classify_image_category(self, image_features: TorchTensor, model) -> Dict[str, float]:
+        """Classify image into predefined categories"""
         try:
-            # Prepare category prompts
-            category_texts = [f"a {category}" for category in self.image_categories]
-            text_tokens = clip.tokenize(category_texts).to(self.device)
-            
-            with torch.no_grad():
-                # Get features
-                image_features = model.encode_image(image_tensor)
-                text_features = model.encode_text(text_tokens)
-                
-                # Calculate similarities
-                similarities = torch.cosine_similarity(image_features, text_features)
-                
-                # Convert to probabilities
-                probabilities = torch.softmax(similarities * 100, dim=0)
-                
-                # Create results dictionary
-                category_scores = {}
-                for i, category in enumerate(self.image_categories):
-                    category_scores[category] = float(probabilities[i])
+            with torch.inference_mode():
+                try:
+                    probabilities = self._clip_score(image_features, self._clip_category_feats)
+                except Exception as e:
+                    if self._clip_score is _clip_softmax_scores:
+                        raise
+                    self.logger.warning(f"⚠️ torch.compile scoring failed, using eager mode: {e}")
+                    self._clip_score = _clip_softmax_scores
+                    probabilities = self._clip_score(image_features, self._clip_category_feats)
                 
-                return category_scores
+                # Single device->host transfer instead of one sync per category
+                return dict(zip(self.image_categories, probabilities.cpu().tolist()))
                 
         except Exception as e:
             self.logger.debug(f"Category classification failed: {e}")
             return {}
     
-    def _detect_image_content(self, image_tensor: TorchTensor, model) -> Dict[str, float]:
+    def _detect_image_content(self, image_features: TorchTensor, model) -> Dict[str, float]:
         """Detect specific content types in image"""
-        import clip
-        
         try:
-            content_scores = {}
-            
-            for content_type, prompt in self.content_prompts.items():
-                # Create positive and negative prompts
-                positive_prompt = f"an image with {prompt}"
-                negative_prompt = f"an image without {prompt}"
-                
-                text_tokens = clip.tokenize([positive_prompt, negative_prompt]).to(self.device)
+            with torch.inference_mode():
+                # One matmul against all prompt pairs
+                similarities = (image_features @ self._clip_content_text_feats.T).squeeze(0)
+                positive_similarities = similarities[0::2]
+                negative_similarities = similarities[1::2]
                 
-                with torch.no_grad():
-                    image_features = model.encode_image(image_tensor)
-                    text_features = model.encode_text(text_tokens)
-                    
-                    similarities = torch.cosine_similarity(image_features, text_features)
-                    
-                    # Calculate confidence (positive vs negative)
-                    positive_score = float(similarities[0])
-                    negative_score = float(similarities[1])
-                    
-                    # Normalize to 0-1 probability
-                    confidence = (positive_score - negative_score + 2) / 4  # Rough normalization
-                    content_scores[content_type] = max(0, min(1, confidence))
+                # Normalize positive vs negative to a rough 0-1 probability
+                confidences = ((positive_similarities - negative_similarities + 2) / 4).clamp(0, 1)
+            
+            content_scores = dict(zip(self.content_prompts, confidences.float().cpu().tolist()))
             
             return content_scores
             
@@ -273,42 +669,21 @@ class AIVisionService:
             self.logger.debug(f"Content detection failed: {e}")
             return {}
     
-    def _generate_clip_description(self, image_tensor: TorchTensor, model) -> Dict[str, Any]:
+    def _generate_clip_description(self, image_features: TorchTensor, model) -> Dict[str, Any]:
         """Generate descriptive text using CLIP"""
-        import clip
-        
         try:
-            # Predefined descriptive prompts
-            descriptive_prompts = [
-                "a detailed photo of",
-                "a screenshot showing",
-                "a document containing",
-                "an illustration of",
-                "a diagram explaining",
-                "a chart displaying",
-                "artwork depicting",
-                "a technical drawing of",
-                "an interface showing",
-                "text that says"
-            ]
-            
-            text_tokens = clip.tokenize(descriptive_prompts).to(self.device)
-            
-            with torch.no_grad():
-                image_features = model.encode_image(image_tensor)
-                text_features = model.encode_text(text_tokens)
-                
-                similarities = torch.cosine_similarity(image_features, text_features)
+            with torch.inference_mode():
+                similarities = (image_features @ self._clip_desc_feats.T).squeeze(0)
                 
                 # Get best matches
-                top_indices = torch.argsort(similarities, descending=True)[:3]
+                # One device->host copy; the top-3 selection over a handful of prompts is cheap on CPU
+                similarities_cpu = similarities.float().cpu()
+                top_values, top_indices = torch.topk(similarities_cpu, k=min(3, similarities_cpu.numel()))
                 
                 descriptions = []
-                for idx in top_indices:
-                    prompt = descriptive_prompts[idx]
-                    confidence = float(similarities[idx])
+                for idx, confidence in zip(top_indices.tolist(), top_values.tolist()):
                     descriptions.append({
-                        "text": prompt,
+                        "text": self.descriptive_prompts[idx],
                         "confidence": confidence
                     })
                 
@@ -321,8 +696,9 @@ class AIVisionService:
             self.logger.debug(f"CLIP description generation failed: {e}")
             return {}
     
-    def _analyze_with_blip(self, image: Image.Image) -> Dict[str, Any]:
-        """Analyze image using BLIP model"""
+    def _analyze_with_blip(self, image: Optional[Image.Image] = None,
+                           pixel_values: Optional[TorchTensor] = None) -> Dict[str, Any]:
+        """Analyze image using BLIP model (pass pixel_values when already preprocessed)"""
         if 'blip' not in self.models:
             return {}
         
@@ -330,37 +706,36 @@ class AIVisionService:
             model = self.models['blip']['model']
             processor = self.models['blip']['processor']
             
-            # Process image
-            inputs = processor(image, return_tensors="pt")
+            # Process image once; all five generations share these pixel values
+            if pixel_values is None:
+                pixel_values = self._preprocess_blip(image)
             if self.device == "cuda":
-                inputs = {k: v.to(self.device) for k, v in inputs.items()}
+                pixel_values = self._to_blip_device({"pixel_values": pixel_values}, model)["pixel_values"]
             
-            # Generate caption
-            with torch.no_grad():
-                out = model.generate(**inputs, max_length=50, num_beams=5)
+            with torch.inference_mode():
+                # Run the vision encoder once and share it between all five generations
+                image_embeds = model.vision_model(pixel_values=pixel_values)[0]
+                
+                # Generate caption (greedy decoding with KV cache)
+                bos_ids = torch.tensor(
+                    [[model.config.text_config.bos_token_id]], device=image_embeds.device
+                )
+                out = self._blip_generate(model, image_embeds, bos_ids, None)
                 caption = processor.decode(out[0], skip_special_tokens=True)
-            
-            # Generate conditional captions with prompts
-            conditional_captions = {}
-            prompts = [
-                "a picture of",
-                "this image shows", 
-                "the content includes",
-                "this appears to be"
-            ]
-            
-            for prompt in prompts:
-                try:
-                    inputs = processor(image, prompt, return_tensors="pt")
-                    if self.device == "cuda":
-                        inputs = {k: v.to(self.device) for k, v in inputs.items()}
-                    
-                    with torch.no_grad():
-                        out = model.generate(**inputs, max_length=50)
-                        conditional_caption = processor.decode(out[0], skip_special_tokens=True)
-                        conditional_captions[prompt] = conditional_caption
-                except:
-                    continue
+                
+                # Generate conditional captions with prompts
+                conditional_captions = {}
+                for prompt, prompt_inputs in self._blip_prompt_inputs.items():
+                    try:
+                        input_ids = prompt_inputs["input_ids"].clone()
+                        input_ids[:, 0] = model.config.text_config.bos_token_id
+                        # Drop the trailing [SEP] so the decoder continues the prompt
+                        out = self._blip_generate(
+                            model, image_embeds, input_ids[:, :-1], prompt_inputs["attention_mask"][:, :-1]
+                        )
+                        conditional_captions[prompt] = processor.decode(out[0], skip_special_tokens=True)
+                    except Exception:
+                        continue
             
             return {
                 "caption": caption,
@@ -372,6 +747,33 @@ class AIVisionService:
             self.logger.debug(f"BLIP analysis failed: {e}")
             return {}
     
+    def _blip_generate(self, model, image_embeds: TorchTensor, input_ids: TorchTensor,
+                       attention_mask: Optional[TorchTensor]) -> TorchTensor:
+        """Greedy BLIP text decoding against precomputed vision encoder outputs"""
+        image_attention_mask = torch.ones(
+            image_embeds.size()[:-1], dtype=torch.long, device=image_embeds.device
+        )
+        return model.text_decoder.generate(
+            input_ids=input_ids,
+            attention_mask=attention_mask,
+            encoder_hidden_states=image_embeds,
+            encoder_attention_mask=image_attention_mask,
+            eos_token_id=model.config.text_config.sep_token_id,
+            pad_token_id=model.config.text_config.pad_token_id,
+            max_length=50,
+            num_beams=1,
+            do_sample=False,
+            use_cache=True
+        )
+    
+    def _to_blip_device(self, inputs, model) -> Dict[str, Any]:
+        """Move processor outputs to the model device; pixel values follow the model dtype"""
+        return {
+            k: v.to(self.device, dtype=model.dtype, memory_format=torch.channels_last)
+            if k == "pixel_values" else v.to(self.device)
+            for k, v in inputs.items()
+        }
+    
     def _combine_analysis_results(self, analysis_results: Dict[str, Any]) -> Tuple[str, float, Dict[str, Any]]:
         """Combine results from different models"""
         combined_text = []
@@ -414,18 +816,85 @@ class AIVisionService:
         """Generate cache key for image"""
         # Include file modification time in cache key
         stat = Path(image_path).stat()
-        content = f"{image_path}_{stat.st_mtime}_{stat.st_size}"
-        return hashlib.md5(content.encode()).hexdigest()
+        content = f"{image_path}_{stat.st_mtime}_{stat.st_size}".encode()
+        if XXHASH_AVAILABLE:
+            return xxhash.xxh3_128_hexdigest(content)
+        return hashlib.blake2b(content, digest_size=16).hexdigest()
+    
+    def _get_content_key(self, image_path: str) -> Optional[str]:
+        """Cache key from the file bytes, so identical files at different paths share results"""
+        if Path(image_path).stat().st_size > CONTENT_HASH_MAX_BYTES:
+            return None
+        
+        hasher = xxhash.xxh3_128() if XXHASH_AVAILABLE else hashlib.blake2b(digest_size=16)
+        with open(image_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                hasher.update(chunk)
+        return f"content:{hasher.hexdigest()}"
+    
+    def _lookup_cached_analysis(self, image_path: str) -> Tuple[List[str], Optional[Tuple[str, float, Dict[str, Any]]]]:
+        """
+        Look up cached analysis by path/mtime key, then by file content
+        
+        Returns:
+            tuple: (keys to store a new result under, cached result or None)
+        """
+        cache_key = self._get_cache_key(image_path)
+        cached_result = self._load_cached_analysis(cache_key)
+        if cached_result:
+            return [cache_key], cached_result
+        
+        content_key = self._get_content_key(image_path)
+        if content_key is None:
+            return [cache_key], None
+        
+        cached_result = self._load_cached_analysis(content_key)
+        if cached_result:
+            # Duplicate of an already analyzed file; remember it under this path too
+            self._cache_analysis(cache_key, *cached_result)
+            return [cache_key], cached_result
+        
+        return [cache_key, content_key], None
+    
+    def _init_cache_db(self) -> Optional[sqlite3.Connection]:
+        """Open the analysis cache database"""
+        try:
+            conn = sqlite3.connect(str(self.cache_dir / "cache.sqlite"), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS analysis_cache (
+                    key TEXT PRIMARY KEY,
+                    description TEXT NOT NULL,
+                    confidence REAL NOT NULL,
+                    metadata TEXT NOT NULL,
+                    mtime REAL NOT NULL
+                )
+            """)
+            conn.commit()
+            return conn
+        except Exception as e:
+            self.logger.warning(f"⚠️ Vision cache database unavailable: {e}")
+            return None
     
     def _load_cached_analysis(self, cache_key: str) -> Optional[Tuple[str, float, Dict[str, Any]]]:
         """Load cached analysis results"""
-        cache_file = self.cache_dir / f"{cache_key}.json"
+        if self._cache_db is None:
+            return None
+        
+        pending = self._pending_cache.get(cache_key)
+        if pending is not None:
+            return pending
         
         try:
-            if cache_file.exists():
-                with open(cache_file, 'r') as f:
-                    data = json.load(f)
-                return data['description'], data['confidence'], data['metadata']
+            with self._cache_lock:
+                row = self._cache_db.execute(
+                    "SELECT description, confidence, metadata FROM analysis_cache WHERE key = ?",
+                    (cache_key,)
+                ).fetchone()
+            if row:
+                metadata = orjson.loads(row[2]) if ORJSON_AVAILABLE else json.loads(row[2])
+                return row[0], row[1], metadata
         except:
             pass
         
@@ -433,21 +902,51 @@ class AIVisionService:
     
     def _cache_analysis(self, cache_key: str, description: str, confidence: float, metadata: Dict[str, Any]):
         """Cache analysis results"""
-        cache_file = self.cache_dir / f"{cache_key}.json"
+        if self._cache_db is None:
+            return
         
         try:
-            cache_data = {
-                'description': description,
-                'confidence': confidence,
-                'metadata': metadata,
-                'timestamp': Path().stat().st_ctime if Path().exists() else 0
-            }
-            
-            with open(cache_file, 'w') as f:
-                json.dump(cache_data, f, indent=2)
+            if ORJSON_AVAILABLE:
+                metadata_json = orjson.dumps(metadata, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+            else:
+                metadata_json = json.dumps(metadata)
+            self._pending_cache[cache_key] = (description, confidence, metadata)
+            self._cache_queue.put((cache_key, description, confidence, metadata_json, time.time()))
         except:
             pass  # Cache failure is not critical
     
+    def _cache_writer(self):
+        """Background thread: write queued cache entries in transactions of up to CACHE_WRITE_BATCH rows"""
+        while True:
+            item = self._cache_queue.get()
+            if item is None:
+                break
+            
+            batch = [item]
+            while len(batch) < CACHE_WRITE_BATCH:
+                try:
+                    item = self._cache_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._cache_queue.put(None)  # Stop after this batch
+                    break
+                batch.append(item)
+            
+            try:
+                with self._cache_lock:
+                    with self._cache_db:
+                        self._cache_db.executemany(
+                            "INSERT OR REPLACE INTO analysis_cache (key, description, confidence, metadata, mtime) "
+                            "VALUES (?, ?, ?, ?, ?)",
+                            batch
+                        )
+            except Exception as e:
+                self.logger.debug(f"Vision cache write failed: {e}")
+            finally:
+                for row in batch:
+                    self._pending_cache.pop(row[0], None)
+    
     def get_capabilities(self) -> Dict[str, Any]:
         """Get service capabilities"""
         return {
@@ -464,7 +963,13 @@ class AIVisionService:
     def get_statistics(self) -> Dict[str, Any]:
         """Get service statistics"""
         # Count cached analyses
-        cache_count = len(list(self.cache_dir.glob("*.json"))) if self.cache_dir.exists() else 0
+        cache_count = 0
+        if self._cache_db is not None:
+            try:
+                with self._cache_lock:
+                    cache_count = self._cache_db.execute("SELECT COUNT(*) FROM analysis_cache").fetchone()[0]
+            except Exception:
+                pass
         
         return {
             "service_type": "ai_vision",
@@ -477,6 +982,37 @@ class AIVisionService:
             "cache_entries": cache_count,
             "supported_categories": len(self.image_categories)
         }
+    
+    def close(self):
+        """Release model weights and the cache database"""
+        self.models.clear()
+        if self._cache_writer_thread is not None:
+            # Flush queued cache writes before closing the database
+            self._cache_queue.put(None)
+            self._cache_writer_thread.join()
+            self._cache_writer_thread = None
+        if self._cache_db is not None:
+            with self._cache_lock:
+                self._cache_db.close()
+                self._cache_db = None
+        if TORCH_AVAILABLE and torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+
+# Shared instances so CLIP/BLIP weights are loaded once per process
+_shared_services: Dict[Tuple[str, str], AIVisionService] = {}
+_shared_services_lock = threading.Lock()
+
+
+def get_ai_vision_service(cache_dir: str = "/tmp/multimedia_cache", device: str = "auto") -> AIVisionService:
+    """Return the process-wide AIVisionService for cache_dir/device, creating it on first use"""
+    key = (str(cache_dir), device)
+    with _shared_services_lock:
+        service = _shared_services.get(key)
+        if service is None:
+            service = AIVisionService(cache_dir=cache_dir, device=device)
+            _shared_services[key] = service
+        return service
 
 
 def test_ai_vision_service():
@@ -7,19 +7,199 @@ Metadata extraction, STT, and audio analysis
 import os
 import logging
 import hashlib
+import json
+import math
+import queue
+import sqlite3
 import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Any, Tuple, List, Optional
+from typing import Dict, Any, Tuple, List, Optional, Union
 import mimetypes
 
+import numpy as np
+
+from file_utils import file_extension
+
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads  # Also accepts bytes
+
+try:
+    import av  # PyAV: in-process libavcodec decoding
+    PYAV_AVAILABLE = True
+except ImportError:
+    PYAV_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# STT input format (what ffmpeg conversion produces and Whisper expects)
+STT_SAMPLE_RATE = 16000
+
+# Skip STT when VAD finds less speech than this
+MIN_SPEECH_SECONDS = 0.5
+
+# Whisper processes audio in 30 s windows
+WHISPER_WINDOW_SAMPLES = 30 * STT_SAMPLE_RATE
+
+# Files batch_extract_content holds decoded at once (being decoded, queued or waiting for
+# STT), in units of batch_size
+PIPELINE_QUEUE_BATCHES = 2
+
+# Whisper language; unset means Whisper detects it from the first 30 s
+STT_LANGUAGE = os.getenv("STT_LANGUAGE") or None
+
+# Concurrent faster-whisper transcriptions (CPU threads are split between them)
+STT_WORKERS = max(1, int(os.getenv("STT_WORKERS", "1")))
+
+# Segments above this no-speech probability (with low logprob) are skipped
+NO_SPEECH_THRESHOLD = 0.6
+
+# (container tag, metadata field) pairs shared by the PyAV and ffprobe parsers
+_TAG_MAP = (
+    ('title', 'title'),
+    ('artist', 'artist'),
+    ('album', 'album'),
+    ('date', 'date'),
+    ('genre', 'genre'),
+    ('track', 'track'),
+    ('album_artist', 'albumartist'),
+    ('composer', 'composer'),
+    ('comment', 'comment'),
+)
+
+# Mutagen tag keys (ID3 frame, Vorbis comment, MP4 atom) per metadata field, in priority order
+_MUTAGEN_TAG_KEYS = {
+    'title': ('TIT2', 'TITLE', '\xa9nam'),
+    'artist': ('TPE1', 'ARTIST', '\xa9ART'),
+    'album': ('TALB', 'ALBUM', '\xa9alb'),
+    'date': ('TDRC', 'DATE', '\xa9day'),
+    'genre': ('TCON', 'GENRE', '\xa9gen'),
+    'track': ('TRCK', 'TRACKNUMBER', 'trkn'),
+    'albumartist': ('TPE2', 'ALBUMARTIST', 'aART'),
+    'composer': ('TCOM', 'COMPOSER', '\xa9wrt'),
+    'comment': ('COMM', 'COMMENT', '\xa9cmt')
+}
+# Reverse lookup: tag key -> (metadata field, priority)
+_MUTAGEN_TAG_LOOKUP = {key: (field, rank) for field, keys in _MUTAGEN_TAG_KEYS.items()
+                       for rank, key in enumerate(keys)}
+
+# Untagged lossy stereo above this bitrate and length is treated as music (no STT)
+MUSIC_MIN_BIT_RATE = 256000
+MUSIC_MIN_SECONDS = 120
+_LOSSLESS_CODECS = frozenset({'flac', 'alac', 'wavpack', 'ape', 'tta'})
+
+# Files longer than max_stt_duration are transcribed through a bounded sliding window
+STREAMING_WINDOW_SECONDS = 30
+# Words ending in the last part of a window are not committed; they are decoded again
+# together with the following audio in case the window boundary cut them off
+STREAMING_TAIL_SECONDS = 5
+
+# Result cache size (least recently used entries are pruned beyond this)
+RESULT_CACHE_MAX_ENTRIES = 100000
+RESULT_CACHE_PRUNE_INTERVAL = 100
+# Access times of cache hits are buffered and written in one statement per this many hits
+RESULT_CACHE_TOUCH_BATCH = 256
+
+# Guards the one-time load of AudioProcessor._shared_models
+_shared_models_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def _probe_ffmpeg() -> bool:
+    """Check if ffmpeg is available (probed once per process)"""
+    try:
+        result = subprocess.run(['ffmpeg', '-version'], 
+                              capture_output=True, text=True, timeout=10)
+        if result.returncode == 0:
+            logger.info("✅ FFmpeg available for audio processing")
+            return True
+    except (subprocess.TimeoutExpired, FileNotFoundError):
+        pass
+    
+    logger.warning("⚠️ FFmpeg not available for audio processing")
+    return False
+
+
+@lru_cache(maxsize=1)
+def _probe_metadata_engine() -> Optional[Dict[str, Any]]:
+    """Pick the audio metadata extraction engine (probed once per process)"""
+    # Try mutagen first (best metadata support)
+    try:
+        import mutagen
+        logger.info("✅ Audio metadata engine (Mutagen) initialized")
+        return {
+            'type': 'mutagen',
+            'module': mutagen
+        }
+    except ImportError:
+        pass
+    
+    # Try eyed3 for MP3 files
+    try:
+        import eyed3
+        logger.info("✅ Audio metadata engine (EyeD3) initialized")
+        return {
+            'type': 'eyed3',
+            'module': eyed3
+        }
+    except ImportError:
+        pass
+    
+    logger.warning("⚠️ No audio metadata library available. Install with: pip install mutagen or pip install eyed3")
+    return None
+
+
+def _select_whisper_model() -> Tuple[str, str]:
+    """Pick (model size, device) from the available hardware"""
+    try:
+        import torch
+        if torch.cuda.is_available():
+            free_bytes, _ = torch.cuda.mem_get_info()
+            free_gb = free_bytes / (1024 ** 3)
+            if free_gb >= 5:
+                return "small", "cuda"
+            if free_gb >= 2:
+                return "base", "cuda"
+            return "tiny", "cuda"
+    except Exception:
+        pass
+    return "base", "cpu"
+
 
 class AudioProcessor:
     """
     Comprehensive audio content processor
     """
     
+    # (metadata field, searchable text template) in _metadata_to_text output order
+    _TEXT_FIELDS = (
+        ('title', "Title: {}"),
+        ('artist', "Artist: {}"),
+        ('album', "Album: {}"),
+        ('genre', "Genre: {}"),
+        ('albumartist', "Albumartist: {}"),
+        ('composer', "Composer: {}"),
+        ('bitrate', "Bitrate: {} kbps"),
+        ('sample_rate', "Sample Rate: {} Hz"),
+        ('codec', "Codec: {}"),
+    )
+    _MUSIC_FIELDS = ('title', 'artist', 'album', 'genre', 'albumartist', 'composer')
+    
+    # (stt_engine, vad_model) shared by all instances so Whisper is loaded once per process
+    _shared_models: Optional[Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]] = None
+    
     def __init__(self, 
                  enable_stt: bool = True,
                  cache_dir: str = "/tmp/multimedia_cache"):
@@ -28,84 +208,88 @@ class AudioProcessor:
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
         
+        # Persistent cache of extract_content results for unchanged files
+        self._cache_lock = threading.Lock()
+        self._cache_inserts = 0
+        self._pending_touches: Dict[str, float] = {}  # cache key -> last hit time not yet written
+        self._result_cache = self._init_result_cache()
+        
         # Speech-to-text capabilities
         self.enable_stt = enable_stt
         self.stt_engine = None
+        self.vad_model = None
         if enable_stt:
-            self._init_stt()
+            self._init_shared_models()
         
         # Check for ffmpeg availability (for metadata and conversion)
-        self.ffmpeg_available = self._check_ffmpeg()
+        self.ffmpeg_available = _probe_ffmpeg()
         
         # Audio metadata library
-        self.metadata_engine = None
-        self._init_metadata_engine()
+        self.metadata_engine = _probe_metadata_engine()
         
         # Supported audio formats
         self.supported_extensions = [
             '.mp3', '.wav', '.flac', '.aac', '.ogg', '.wma', '.m4a', 
             '.opus', '.aiff', '.au', '.ra', '.amr', '.3ga'
         ]
+        self._ext_set = frozenset(self.supported_extensions)
         
         # Processing limits
         self.max_audio_size = 100 * 1024 * 1024  # 100MB
         self.max_stt_duration = 7200  # 2 hours for STT
     
-    def _check_ffmpeg(self) -> bool:
-        """Check if ffmpeg is available"""
-        try:
-            result = subprocess.run(['ffmpeg', '-version'], 
-                                  capture_output=True, text=True, timeout=10)
-            if result.returncode == 0:
-                self.logger.info("✅ FFmpeg available for audio processing")
-                return True
-        except (subprocess.TimeoutExpired, FileNotFoundError):
-            pass
-        
-        self.logger.warning("⚠️ FFmpeg not available for audio processing")
-        return False
+    def _init_shared_models(self):
+        """Load the STT and VAD models once per process; later instances reuse them"""
+        with _shared_models_lock:
+            shared = AudioProcessor._shared_models
+            if shared is None:
+                self._init_stt()
+                if self.stt_engine:
+                    self._init_vad()
+                shared = AudioProcessor._shared_models = (self.stt_engine, self.vad_model)
+            self.stt_engine, self.vad_model = shared
     
-    def _init_metadata_engine(self):
-        """Initialize audio metadata extraction engine"""
-        # Try mutagen first (best metadata support)
-        try:
-            import mutagen
-            self.metadata_engine = {
-                'type': 'mutagen',
-                'module': mutagen
-            }
-            self.logger.info("✅ Audio metadata engine (Mutagen) initialized")
-            return
-        except ImportError:
-            pass
-        
-        # Try eyed3 for MP3 files
+    def _init_stt(self):
+        """Initialize speech-to-text engine"""
         try:
-            import eyed3
-            self.metadata_engine = {
-                'type': 'eyed3',
-                'module': eyed3
+            # Try faster-whisper first (CTranslate2 backend, int8 quantized weights)
+            from faster_whisper import WhisperModel
+            
+            model_size, device = _select_whisper_model()
+            # int8 weights everywhere; activations stay FP16 on GPU
+            compute_type = "int8_float16" if device == "cuda" else "int8"
+            # CTranslate2 is thread-safe; concurrent calls run on STT_WORKERS replicas that
+            # split the cores between them instead of oversubscribing
+            model = WhisperModel(model_size, device=device, compute_type=compute_type,
+                                 cpu_threads=max(1, (os.cpu_count() or 4) // STT_WORKERS),
+                                 num_workers=STT_WORKERS)
+            self.stt_engine = {
+                'type': 'faster_whisper',
+                'model': model
             }
-            self.logger.info("✅ Audio metadata engine (EyeD3) initialized")
+            self.logger.info(f"✅ Speech-to-text engine (faster-whisper {model_size}, {compute_type}) initialized")
             return
+            
         except ImportError:
             pass
+        except Exception as e:
+            self.logger.warning(f"⚠️ faster-whisper initialization failed: {e}")
         
-        self.logger.warning("⚠️ No audio metadata library available. Install with: pip install mutagen or pip install eyed3")
-    
-    def _init_stt(self):
-        """Initialize speech-to-text engine"""
         try:
-            # Try OpenAI Whisper first
+            # Try OpenAI Whisper next
             import whisper
             
-            # Load small model for efficiency
-            model = whisper.load_model("base")
+            # Model size follows free VRAM; FP16 weights on GPU
+            model_size, device = _select_whisper_model()
+            model = whisper.load_model(model_size, device=device)
+            if device == "cuda":
+                model = model.half()
             self.stt_engine = {
                 'type': 'whisper',
-                'model': model
+                'model': model,
+                'lock': threading.Lock()  # The PyTorch model is not safe to run from several threads
             }
-            self.logger.info("✅ Speech-to-text engine (Whisper) initialized")
+            self.logger.info(f"✅ Speech-to-text engine (Whisper {model_size}, {device}) initialized")
             
         except ImportError:
             try:
@@ -120,12 +304,33 @@ class AudioProcessor:
                 self.logger.info("✅ Speech-to-text engine (SpeechRecognition) initialized")
                 
             except ImportError:
-                self.logger.warning("⚠️ No STT library available. Install with: pip install openai-whisper or pip install SpeechRecognition")
+                self.logger.warning("⚠️ No STT library available. Install with: pip install faster-whisper, pip install openai-whisper or pip install SpeechRecognition")
+    
+    def _init_vad(self):
+        """Initialize Silero VAD so only speech regions are sent to STT"""
+        try:
+            # pip package first, torch.hub as fallback
+            try:
+                from silero_vad import load_silero_vad, get_speech_timestamps
+                model = load_silero_vad()
+            except ImportError:
+                import torch
+                model, utils = torch.hub.load('snakers4/silero-vad', 'silero_vad', trust_repo=True)
+                get_speech_timestamps = utils[0]
+            
+            self.vad_model = {
+                'model': model,
+                'get_speech_timestamps': get_speech_timestamps,
+                'lock': threading.Lock()  # Silero keeps recurrent state between calls
+            }
+            self.logger.info("✅ Voice activity detection (Silero VAD) initialized")
+            
+        except Exception as e:
+            self.logger.info(f"Silero VAD not available, STT runs on full audio: {e}")
     
     def can_process(self, file_path: str) -> bool:
         """Check if file can be processed"""
-        extension = Path(file_path).suffix.lower()
-        return extension in self.supported_extensions
+        return file_extension(file_path) in self._ext_set
     
     def extract_content(self, file_path: str) -> Tuple[str, bool, Dict[str, Any]]:
         """
@@ -137,46 +342,275 @@ class AudioProcessor:
         file_path = Path(file_path)
         
         try:
+            # Unchanged files (same path, size and mtime) come straight from the cache
+            cache_key = self._get_cache_key(file_path)
+            cached_result = self._load_cached_result(cache_key)
+            if cached_result:
+                return cached_result
+            
             # Extract audio metadata
             audio_metadata = self._extract_audio_metadata(file_path)
             
             # Perform speech-to-text
             stt_text = ""
             stt_confidence = 0
+            stt_failed = False
             if self.enable_stt and self.stt_engine and self._should_process_stt(audio_metadata):
-                stt_text, stt_confidence = self._extract_speech_text(file_path)
+                streaming = audio_metadata.get('duration', 0) > self.max_stt_duration
+                stt_text, stt_confidence, stt_failed = self._extract_speech_text(file_path, streaming)
             
-            # Combine all extracted text
-            combined_text = []
-            if stt_text.strip():
-                combined_text.append(f"Spoken Content: {stt_text}")
+            result = self._build_content_result(audio_metadata, stt_text, stt_confidence)
+            # A failed transcription (model not loaded, OOM...) is retried on the next call
+            if not stt_failed:
+                self._cache_result(cache_key, result)
+            return result
             
-            # Add metadata as searchable text
-            metadata_text = self._metadata_to_text(audio_metadata)
-            if metadata_text.strip():
-                combined_text.append(f"Audio Info: {metadata_text}")
-            
-            final_text = "\n\n".join(combined_text)
-            
-            # Compile metadata
-            metadata = {
-                "audio_metadata": audio_metadata,
-                "processing_results": {
-                    "stt_enabled": self.enable_stt,
-                    "stt_text_length": len(stt_text),
-                    "stt_confidence": stt_confidence,
-                    "metadata_extracted": len(audio_metadata) > 0
-                },
-                "success": True
-            }
-            
-            success = len(final_text.strip()) > 0 or len(audio_metadata) > 0
-            
-            return final_text, success, metadata
+        except Exception as e:
+            return "", False, {"error": str(e), "audio_processing_failed": True}
+    
+    def batch_extract_content(self, file_paths: List[str], batch_size: int = 8) -> List[Tuple[str, bool, Dict[str, Any]]]:
+        """
+        Extract content from several audio files
+        
+        Runs as a pipeline: worker threads extract metadata, decode and VAD files into a
+        queue while this thread transcribes them in batches of batch_size, so decoding of
+        later files overlaps with STT of earlier ones. At most PIPELINE_QUEUE_BATCHES *
+        batch_size files are decoded (or being decoded) at any time.
+        
+        Returns:
+            list of (extracted_text, success, metadata) in the order of file_paths
+        """
+        paths = [Path(file_path) for file_path in file_paths]
+        if not paths:
+            return []
+        
+        # A worker takes a slot before decoding and this thread gives it back once the file's
+        # audio is dropped, so decoded audio cannot pile up faster than STT consumes it.
+        # (A bounded queue alone would not count the files workers are still decoding.)
+        decode_slots = threading.Semaphore(PIPELINE_QUEUE_BATCHES * batch_size)
+        prepared_queue: "queue.Queue[Tuple[int, tuple]]" = queue.Queue()
+        cancelled = threading.Event()
+        
+        def prepare(index: int):
+            decode_slots.acquire()
+            if cancelled.is_set():
+                prepared_queue.put((index, ({}, None, RuntimeError("cancelled"), False)))
+                return
+            prepared_queue.put((index, self._prepare_content(paths[index])))
+        
+        results: List[Optional[Tuple[str, bool, Dict[str, Any]]]] = [None] * len(paths)
+        
+        # Cache hits are answered directly; only misses enter the pipeline
+        cache_keys: List[Optional[str]] = [None] * len(paths)
+        to_process = []
+        for index, path in enumerate(paths):
+            try:
+                cache_keys[index] = self._get_cache_key(path)
+                cached_result = self._load_cached_result(cache_keys[index])
+                if cached_result:
+                    results[index] = cached_result
+                    continue
+            except Exception:
+                pass  # Missing files fail in _prepare_content with a proper error result
+            to_process.append(index)
+        
+        if not to_process:
+            return results
+        
+        workers = min(len(to_process), os.cpu_count() or 4)
+        
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="audio-prepare") as pool:
+            for index in to_process:
+                pool.submit(prepare, index)
             
+            pending_stt = []  # (index, audio_metadata, audio_input)
+            received = 0
+            try:
+                while received < len(to_process):
+                    index, (audio_metadata, audio_input, error, stt_failed) = prepared_queue.get()
+                    received += 1
+                    
+                    if error is not None:
+                        decode_slots.release()
+                        results[index] = ("", False, {"error": str(error), "audio_processing_failed": True})
+                    elif audio_input is None:
+                        decode_slots.release()
+                        results[index] = self._safe_content_result(audio_metadata, "", 0)
+                        if not stt_failed:
+                            self._cache_result(cache_keys[index], results[index])
+                    else:
+                        pending_stt.append((index, audio_metadata, audio_input))
+                    
+                    # Transcribe once a full batch is ready (or nothing else is coming)
+                    if pending_stt and (len(pending_stt) >= batch_size or received == len(to_process)):
+                        stt_results = self._transcribe_batch([item[2] for item in pending_stt], batch_size)
+                        for (i, metadata_i, _), (stt_text, stt_confidence, stt_failed) in zip(pending_stt, stt_results):
+                            results[i] = self._safe_content_result(metadata_i, stt_text, stt_confidence)
+                            if not stt_failed:
+                                self._cache_result(cache_keys[i], results[i])
+                        for _ in pending_stt:
+                            decode_slots.release()
+                        pending_stt = []
+            finally:
+                if received < len(to_process):
+                    # Unblock workers still waiting for a slot; they skip decoding once cancelled
+                    cancelled.set()
+                    for _ in pending_stt:
+                        decode_slots.release()
+                    while received < len(to_process):
+                        prepared_queue.get()
+                        decode_slots.release()
+                        received += 1
+        
+        return results
+    
+    def _safe_content_result(self, audio_metadata: Dict[str, Any], stt_text: str,
+                             stt_confidence: float) -> Tuple[str, bool, Dict[str, Any]]:
+        """_build_content_result that reports failures as a result instead of raising"""
+        try:
+            return self._build_content_result(audio_metadata, stt_text, stt_confidence)
         except Exception as e:
             return "", False, {"error": str(e), "audio_processing_failed": True}
     
+    def _prepare_content(self, file_path: Path) -> Tuple[Dict[str, Any], Union[str, np.ndarray, Path, None], Optional[Exception], bool]:
+        """
+        Metadata + STT input for one file (audio input is None when STT is skipped)
+        
+        Files longer than max_stt_duration are not decoded here; their Path is passed on
+        and _transcribe streams them. The last element is True when decoding for STT failed.
+        """
+        try:
+            audio_metadata = self._extract_audio_metadata(file_path)
+            audio_input = None
+            if self.enable_stt and self.stt_engine and self._should_process_stt(audio_metadata):
+                if audio_metadata.get('duration', 0) > self.max_stt_duration:
+                    return audio_metadata, file_path, None, False
+                try:
+                    audio_input = self._load_stt_audio(file_path)
+                except Exception as e:
+                    self.logger.debug(f"STT audio preparation failed: {e}")
+                    return audio_metadata, None, None, True
+            return audio_metadata, audio_input, None, False
+        except Exception as e:
+            return {}, None, e, False
+    
+    def _build_content_result(self, audio_metadata: Dict[str, Any], stt_text: str,
+                              stt_confidence: float) -> Tuple[str, bool, Dict[str, Any]]:
+        """Combine STT text and metadata into the extract_content result"""
+        # Combine all extracted text
+        combined_text = []
+        if stt_text.strip():
+            combined_text.append(f"Spoken Content: {stt_text}")
+        
+        # Add metadata as searchable text
+        metadata_text = self._metadata_to_text(audio_metadata)
+        if metadata_text.strip():
+            combined_text.append(f"Audio Info: {metadata_text}")
+        
+        final_text = "\n\n".join(combined_text)
+        
+        # Compile metadata
+        metadata = {
+            "audio_metadata": audio_metadata,
+            "processing_results": {
+                "stt_enabled": self.enable_stt,
+                "stt_text_length": len(stt_text),
+                "stt_confidence": stt_confidence,
+                "metadata_extracted": len(audio_metadata) > 0
+            },
+            "success": True
+        }
+        
+        success = len(final_text.strip()) > 0 or len(audio_metadata) > 0
+        
+        return final_text, success, metadata
+    
+    def _get_cache_key(self, file_path: Path) -> str:
+        """Cache key from path, size, mtime and the STT engine in use"""
+        stat = file_path.stat()
+        stt_type = self.stt_engine['type'] if (self.enable_stt and self.stt_engine) else "none"
+        content = f"{file_path}:{stat.st_size}:{stat.st_mtime_ns}:{stt_type}".encode()
+        if XXHASH_AVAILABLE:
+            return xxhash.xxh3_128_hexdigest(content)
+        return hashlib.blake2b(content, digest_size=16).hexdigest()
+    
+    def _init_result_cache(self) -> Optional[sqlite3.Connection]:
+        """Open the extract_content result cache database"""
+        try:
+            conn = sqlite3.connect(str(self.cache_dir / "audio_cache.sqlite"), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS audio_cache (
+                    key TEXT PRIMARY KEY,
+                    result TEXT NOT NULL,
+                    accessed REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_audio_cache_accessed ON audio_cache(accessed)")
+            conn.commit()
+            return conn
+        except Exception as e:
+            self.logger.warning(f"⚠️ Audio cache database unavailable: {e}")
+            return None
+    
+    def _load_cached_result(self, cache_key: str) -> Optional[Tuple[str, bool, Dict[str, Any]]]:
+        """Load a cached extract_content result and mark it recently used (written in batches)"""
+        if self._result_cache is None:
+            return None
+        
+        try:
+            with self._cache_lock:
+                row = self._result_cache.execute(
+                    "SELECT result FROM audio_cache WHERE key = ?", (cache_key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                # No commit (fsync) per hit: the access time is written with the next batch or insert
+                self._pending_touches[cache_key] = time.time()
+                if len(self._pending_touches) >= RESULT_CACHE_TOUCH_BATCH:
+                    self._flush_touches()
+                    self._result_cache.commit()
+            text, success, metadata = _json_loads(row[0])
+            return text, success, metadata
+        except Exception:
+            return None
+    
+    def _cache_result(self, cache_key: Optional[str], result: Tuple[str, bool, Dict[str, Any]]):
+        """Store an extract_content result; failed results are not cached"""
+        if self._result_cache is None or cache_key is None or not result[1]:
+            return
+        
+        try:
+            payload = json.dumps(result, default=str)
+            with self._cache_lock:
+                self._result_cache.execute(
+                    "INSERT OR REPLACE INTO audio_cache (key, result, accessed) VALUES (?, ?, ?)",
+                    (cache_key, payload, time.time())
+                )
+                self._cache_inserts += 1
+                self._flush_touches()
+                if self._cache_inserts % RESULT_CACHE_PRUNE_INTERVAL == 0:
+                    # Drop least recently used entries beyond the size limit
+                    self._result_cache.execute("""
+                        DELETE FROM audio_cache WHERE key IN (
+                            SELECT key FROM audio_cache ORDER BY accessed
+                            LIMIT MAX(0, (SELECT COUNT(*) FROM audio_cache) - ?)
+                        )
+                    """, (RESULT_CACHE_MAX_ENTRIES,))
+                self._result_cache.commit()
+        except Exception as e:
+            self.logger.debug(f"Audio cache write failed: {e}")
+    
+    def _flush_touches(self):
+        """Write buffered access times (caller holds _cache_lock and commits)"""
+        if self._pending_touches:
+            self._result_cache.executemany(
+                "UPDATE audio_cache SET accessed = ? WHERE key = ?",
+                [(accessed, key) for key, accessed in self._pending_touches.items()]
+            )
+            self._pending_touches.clear()
+    
     def _extract_audio_metadata(self, file_path: Path) -> Dict[str, Any]:
         """Extract comprehensive audio metadata"""
         metadata = {}
@@ -191,6 +625,13 @@ class AudioProcessor:
             except Exception as e:
                 self.logger.debug(f"Specialized metadata extraction failed: {e}")
         
+        # Fallback to in-process probing with PyAV (no ffprobe process per file)
+        if PYAV_AVAILABLE and not metadata:
+            try:
+                metadata.update(self._extract_pyav_metadata(file_path))
+            except Exception as e:
+                self.logger.debug(f"PyAV metadata extraction failed: {e}")
+        
         # Fallback to ffprobe if available
         if self.ffmpeg_available and not metadata:
             try:
@@ -231,29 +672,23 @@ class AudioProcessor:
             if hasattr(audio_file, 'tags') and audio_file.tags:
                 tags = audio_file.tags
                 
-                # Common tag mappings
-                tag_mappings = {
-                    'title': ['TIT2', 'TITLE', '\xa9nam'],
-                    'artist': ['TPE1', 'ARTIST', '\xa9ART'],
-                    'album': ['TALB', 'ALBUM', '\xa9alb'],
-                    'date': ['TDRC', 'DATE', '\xa9day'],
-                    'genre': ['TCON', 'GENRE', '\xa9gen'],
-                    'track': ['TRCK', 'TRACKNUMBER', 'trkn'],
-                    'albumartist': ['TPE2', 'ALBUMARTIST', 'aART'],
-                    'composer': ['TCOM', 'COMPOSER', '\xa9wrt'],
-                    'comment': ['COMM', 'COMMENT', '\xa9cmt']
-                }
-                
-                for field, possible_keys in tag_mappings.items():
-                    for key in possible_keys:
-                        if key in tags:
-                            value = tags[key]
-                            if isinstance(value, list) and value:
-                                value = value[0]
-                            if hasattr(value, 'text'):
-                                value = str(value.text[0]) if value.text else str(value)
-                            metadata[field] = str(value)
-                            break
+                # One pass over the tags; when several keys map to the same field
+                # the one listed first in _MUTAGEN_TAG_KEYS wins
+                ranks = {}
+                for key, value in tags.items():
+                    # Vorbis comment keys are case-insensitive and may be stored lowercase
+                    match = _MUTAGEN_TAG_LOOKUP.get(key) or _MUTAGEN_TAG_LOOKUP.get(key.upper())
+                    if match is None:
+                        continue
+                    field, rank = match
+                    if ranks.get(field, rank + 1) <= rank:
+                        continue
+                    if isinstance(value, list) and value:
+                        value = value[0]
+                    if hasattr(value, 'text'):
+                        value = str(value.text[0]) if value.text else str(value)
+                    metadata[field] = str(value)
+                    ranks[field] = rank
             
             return metadata
             
@@ -309,17 +744,16 @@ class AudioProcessor:
     def _extract_ffprobe_metadata(self, file_path: Path) -> Dict[str, Any]:
         """Extract metadata using ffprobe"""
         try:
-            import json
-            
             cmd = [
                 'ffprobe', '-v', 'quiet', '-print_format', 'json',
                 '-show_format', '-show_streams', str(file_path)
             ]
             
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+            # Bytes output goes straight to the JSON parser (no separate UTF-8 decode)
+            result = subprocess.run(cmd, capture_output=True, timeout=30)
             
             if result.returncode == 0:
-                probe_data = json.loads(result.stdout)
+                probe_data = _json_loads(result.stdout)
                 return self._parse_ffprobe_audio_data(probe_data)
             else:
                 return {}
@@ -328,6 +762,34 @@ class AudioProcessor:
             self.logger.debug(f"FFprobe metadata extraction failed: {e}")
             return {}
     
+    def _extract_pyav_metadata(self, file_path: Path) -> Dict[str, Any]:
+        """Extract the same fields as ffprobe, reading the container in-process with PyAV"""
+        with av.open(str(file_path)) as container:
+            metadata = {
+                'duration': container.duration / av.time_base if container.duration else 0.0,
+                'size': container.size or 0,
+                'bit_rate': container.bit_rate or 0,
+                'format_name': container.format.name
+            }
+            
+            # Tags (same normalization as the ffprobe path)
+            tags = {k.lower(): v for k, v in container.metadata.items()}
+            metadata.update({dst: v for src, dst in _TAG_MAP if (v := tags.get(src))})
+            
+            # Stream information (first audio stream)
+            if container.streams.audio:
+                stream = container.streams.audio[0]
+                codec_context = stream.codec_context
+                metadata.update({
+                    'codec': codec_context.name,
+                    'sample_rate': codec_context.sample_rate or 0,
+                    'channels': codec_context.channels or 0,
+                    'channel_layout': codec_context.layout.name if codec_context.layout else '',
+                    'bit_rate': stream.bit_rate or 0
+                })
+        
+        return metadata
+    
     def _parse_ffprobe_audio_data(self, probe_data: Dict[str, Any]) -> Dict[str, Any]:
         """Parse ffprobe JSON output for audio"""
         metadata = {}
@@ -346,18 +808,7 @@ class AudioProcessor:
             if 'tags' in format_info:
                 tags = format_info['tags']
                 # Normalize tag names
-                tag_map = {
-                    'title': tags.get('title', ''),
-                    'artist': tags.get('artist', ''),
-                    'album': tags.get('album', ''),
-                    'date': tags.get('date', ''),
-                    'genre': tags.get('genre', ''),
-                    'track': tags.get('track', ''),
-                    'albumartist': tags.get('album_artist', ''),
-                    'composer': tags.get('composer', ''),
-                    'comment': tags.get('comment', '')
-                }
-                metadata.update({k: v for k, v in tag_map.items() if v})
+                metadata.update({dst: v for src, dst in _TAG_MAP if (v := tags.get(src))})
         
         # Stream information (first audio stream)
         if 'streams' in probe_data:
@@ -388,158 +839,441 @@ class AudioProcessor:
         """Determine if audio should be processed with STT"""
         duration = metadata.get('duration', 0)
         
-        # Skip very long audio files
-        if duration > self.max_stt_duration:
+        # Very long files are only transcribed when they can be streamed in constant memory
+        if duration > self.max_stt_duration and not self._streaming_stt_available():
             return False
         
         # Skip if it's music (has artist/album tags) unless it's very short
         if duration > 60 and metadata.get('artist') and metadata.get('album'):
             return False
         
+        # Untagged music: high-bitrate lossy stereo longer than a couple of minutes.
+        # Lossless/PCM bitrates say nothing about content, so those are always transcribed.
+        if duration > MUSIC_MIN_SECONDS:
+            codec = metadata.get('codec') or ''
+            if (codec and not codec.startswith('pcm') and codec not in _LOSSLESS_CODECS
+                    and (metadata.get('bit_rate') or metadata.get('bitrate') or 0) > MUSIC_MIN_BIT_RATE
+                    and (metadata.get('channels') or 0) >= 2):
+                return False
+        
         return True
     
-    def _extract_speech_text(self, audio_path: Path) -> Tuple[str, float]:
-        """Extract speech text from audio file"""
+    def _extract_speech_text(self, audio_path: Path, streaming: bool = False) -> Tuple[str, float, bool]:
+        """
+        Extract speech text from audio file
+        
+        Returns:
+            tuple: (text, confidence, failed); failed is True when decoding or STT raised,
+            as opposed to finding no speech
+        """
         if not self.stt_engine:
+            return "", 0.0, False
+        
+        try:
+            if streaming:
+                return (*self._stt_streaming(audio_path), False)
+            audio_input = self._load_stt_audio(audio_path)
+            if audio_input is None:
+                return "", 0.0, False
+        except Exception as e:
+            self.logger.debug(f"STT processing failed: {e}")
+            return "", 0.0, True
+        return self._transcribe_safely(audio_input)
+    
+    def _load_stt_audio(self, audio_path: Path) -> Union[str, np.ndarray, None]:
+        """Decoded (and VAD-trimmed) STT input for a file; None if there is nothing to transcribe"""
+        # Decode to 16 kHz mono samples in-process; fall back to decoding through an ffmpeg pipe
+        audio_input: Union[str, np.ndarray, None] = self._decode_audio_pcm(audio_path)
+        if audio_input is None:
+            audio_input = self._prepare_audio_for_stt(audio_path)
+            if audio_input is None:
+                return None
+        
+        # Keep only speech regions (silence/music would still cost full encoder windows)
+        speech_audio = self._speech_only_audio(audio_input)
+        if speech_audio is not None:
+            if len(speech_audio) < MIN_SPEECH_SECONDS * STT_SAMPLE_RATE:
+                return None
+            audio_input = speech_audio
+        
+        return audio_input
+    
+    def _transcribe(self, audio_input: Union[str, np.ndarray, Path]) -> Tuple[str, float]:
+        """Run the configured STT engine on one input"""
+        if isinstance(audio_input, Path):
+            return self._stt_streaming(audio_input)
+        elif self.stt_engine['type'] == 'faster_whisper':
+            return self._stt_with_faster_whisper(audio_input)
+        elif self.stt_engine['type'] == 'whisper':
+            return self._stt_with_whisper(audio_input)
+        elif self.stt_engine['type'] == 'speech_recognition':
+            return self._stt_with_speech_recognition(audio_input)
+        else:
+            return "", 0.0
+    
+    def _transcribe_safely(self, audio_input: Union[str, np.ndarray, Path], batch_size: int = 0) -> Tuple[str, float, bool]:
+        """_transcribe that reports an engine error as (text, confidence, failed=True)"""
+        try:
+            if batch_size and self.stt_engine['type'] == 'faster_whisper' and not isinstance(audio_input, Path):
+                return (*self._stt_with_faster_whisper(audio_input, batch_size=batch_size), False)
+            return (*self._transcribe(audio_input), False)
+        except Exception as e:
+            self.logger.debug(f"STT processing failed: {e}")
+            return "", 0.0, True
+    
+    def _transcribe_batch(self, audio_inputs: List[Union[str, np.ndarray, Path]], batch_size: int) -> List[Tuple[str, float, bool]]:
+        """Run STT over several inputs, batching where the engine supports it; (text, confidence, failed) per input"""
+        results: List[Tuple[str, float, bool]] = [("", 0.0, False)] * len(audio_inputs)
+        remaining = list(range(len(audio_inputs)))
+        
+        if self.stt_engine and self.stt_engine['type'] == 'whisper':
+            # Clips that fit in one 30 s window are decoded together as a (B, n_mels, 3000) batch
+            short = [i for i in remaining
+                     if isinstance(audio_inputs[i], np.ndarray) and len(audio_inputs[i]) <= WHISPER_WINDOW_SAMPLES]
+            for start in range(0, len(short), batch_size):
+                chunk = short[start:start + batch_size]
+                try:
+                    for i, (text, confidence) in zip(chunk, self._whisper_decode_batch([audio_inputs[i] for i in chunk])):
+                        results[i] = (text, confidence, False)
+                except Exception as e:
+                    self.logger.debug(f"Batched Whisper decoding failed, transcribing one by one: {e}")
+                    for i in chunk:
+                        results[i] = self._transcribe_safely(audio_inputs[i])
+            short_set = set(short)
+            remaining = [i for i in remaining if i not in short_set]
+        
+        for i in remaining:
+            results[i] = self._transcribe_safely(audio_inputs[i], batch_size=batch_size)
+        
+        return results
+    
+    def _streaming_stt_available(self) -> bool:
+        """Whether _stt_streaming can be used (needs PyAV and a Whisper engine with word timestamps)"""
+        return (PYAV_AVAILABLE and bool(self.stt_engine)
+                and self.stt_engine['type'] in ('faster_whisper', 'whisper'))
+    
+    def _stt_streaming(self, audio_path: Path) -> Tuple[str, float]:
+        """
+        Transcribe audio of any length in constant memory
+        
+        The file is decoded incrementally into a buffer of at most STREAMING_WINDOW_SECONDS.
+        Each full window is transcribed with word timestamps; words ending before the last
+        STREAMING_TAIL_SECONDS are committed and the buffer is sliced at the first uncommitted
+        word, so a word cut at the window edge is decoded again with the audio that follows.
+        """
+        if not self._streaming_stt_available():
             return "", 0.0
         
+        window_samples = STREAMING_WINDOW_SECONDS * STT_SAMPLE_RATE
+        tail_samples = STREAMING_TAIL_SECONDS * STT_SAMPLE_RATE
+        words: List[str] = []
+        probabilities: List[float] = []
+        
+        def commit(buffer: np.ndarray, final: bool) -> int:
+            """Commit the settled words of buffer; returns the sample offset to slice at"""
+            limit = len(buffer) if final else len(buffer) - tail_samples
+            cut = limit
+            for word, start, end, probability in self._transcribe_words(buffer):
+                if end * STT_SAMPLE_RATE > limit:
+                    cut = int(start * STT_SAMPLE_RATE)
+                    break
+                words.append(word)
+                probabilities.append(probability)
+            # Always advance, even if one word spans (almost) the whole window
+            return cut if cut > 0 else limit
+        
         try:
-            # Convert audio to compatible format if needed
-            processed_audio_path = self._prepare_audio_for_stt(audio_path)
-            if not processed_audio_path:
-                return "", 0.0
+            buffer = np.zeros(0, dtype=np.float32)
+            for chunk in self._iter_pcm_chunks(audio_path):
+                buffer = np.concatenate([buffer, chunk])
+                if len(buffer) >= window_samples:
+                    buffer = buffer[commit(buffer, final=False):]
+            if len(buffer) >= MIN_SPEECH_SECONDS * STT_SAMPLE_RATE:
+                commit(buffer, final=True)
+        except Exception as e:
+            # A partial transcript is not returned: the caller must not cache it as complete
+            self.logger.debug(f"Streaming STT failed after {len(words)} words: {e}")
+            raise
+        
+        # Whisper word tokens carry their own leading spaces
+        text = "".join(words).strip()
+        avg_confidence = sum(probabilities) / len(probabilities) if probabilities else 0.0
+        return text, avg_confidence
+    
+    def _iter_pcm_chunks(self, audio_path: Path, chunk_seconds: float = 1.0):
+        """Yield 16 kHz mono float32 chunks of about chunk_seconds, decoding the file lazily"""
+        chunk_samples = int(chunk_seconds * STT_SAMPLE_RATE)
+        pending: List[np.ndarray] = []
+        pending_samples = 0
+        
+        with av.open(str(audio_path)) as container:
+            stream = container.streams.audio[0]
+            resampler = av.AudioResampler(format='flt', layout='mono', rate=STT_SAMPLE_RATE)
             
-            # Perform speech-to-text
-            if self.stt_engine['type'] == 'whisper':
-                return self._stt_with_whisper(processed_audio_path)
-            elif self.stt_engine['type'] == 'speech_recognition':
-                return self._stt_with_speech_recognition(processed_audio_path)
+            def resampled_frames():
+                for frame in container.decode(stream):
+                    yield from resampler.resample(frame)
+                # Flush samples buffered inside the resampler
+                yield from resampler.resample(None)
+            
+            for resampled in resampled_frames():
+                samples = resampled.to_ndarray().reshape(-1)
+                pending.append(samples)
+                pending_samples += len(samples)
+                if pending_samples >= chunk_samples:
+                    yield np.concatenate(pending).astype(np.float32, copy=False)
+                    pending = []
+                    pending_samples = 0
+        
+        if pending:
+            yield np.concatenate(pending).astype(np.float32, copy=False)
+    
+    def _transcribe_words(self, audio: np.ndarray) -> List[Tuple[str, float, float, float]]:
+        """Word-level STT of one window: (word, start s, end s, probability) in order"""
+        model = self.stt_engine['model']
+        if self.stt_engine['type'] == 'faster_whisper':
+            segments, _ = model.transcribe(audio, language=STT_LANGUAGE, vad_filter=True,
+                                           beam_size=1, word_timestamps=True,
+                                           condition_on_previous_text=False,
+                                           no_speech_threshold=NO_SPEECH_THRESHOLD)
+            return [(w.word, w.start, w.end, w.probability)
+                    for segment in segments for w in (segment.words or [])]
+        
+        import torch
+        
+        with self.stt_engine['lock'], torch.inference_mode():
+            result = model.transcribe(audio, language=STT_LANGUAGE, word_timestamps=True,
+                                      fp16=model.device.type == 'cuda',
+                                      condition_on_previous_text=False,
+                                      no_speech_threshold=NO_SPEECH_THRESHOLD)
+        return [(w['word'], w['start'], w['end'], w.get('probability', 0.0))
+                for segment in result.get('segments', []) for w in segment.get('words', [])]
+    
+    def _whisper_decode_batch(self, audios: List[np.ndarray]) -> List[Tuple[str, float]]:
+        """Decode up to 30 s clips in a single Whisper encoder/decoder pass"""
+        import torch
+        import whisper
+        
+        model = self.stt_engine['model']
+        mels = torch.stack([
+            whisper.log_mel_spectrogram(whisper.pad_or_trim(torch.from_numpy(audio)), n_mels=model.dims.n_mels)
+            for audio in audios
+        ]).to(model.device)
+        options = whisper.DecodingOptions(language=STT_LANGUAGE, without_timestamps=True,
+                                          fp16=model.device.type == 'cuda')
+        with self.stt_engine['lock'], torch.inference_mode():
+            decoded = whisper.decode(model, mels, options)
+        return [(result.text.strip(), math.exp(result.avg_logprob)) for result in decoded]
+    
+    def _speech_only_audio(self, audio_input: Union[str, np.ndarray]) -> Optional[np.ndarray]:
+        """
+        Run VAD over 16 kHz audio and concatenate the detected speech regions
+        
+        Returns:
+            float32 mono samples (empty if no speech), or None if VAD could not be applied
+        """
+        if not self.vad_model:
+            return None
+        
+        try:
+            import torch
+            
+            if isinstance(audio_input, np.ndarray):
+                audio = audio_input
             else:
-                return "", 0.0
+                import soundfile as sf
+                
+                audio, sample_rate = sf.read(audio_input, dtype='float32')
+                if sample_rate != STT_SAMPLE_RATE:
+                    return None  # Not converted (no ffmpeg); let STT handle resampling
+                if audio.ndim > 1:
+                    audio = audio.mean(axis=1)
+            
+            with self.vad_model['lock'], torch.inference_mode():
+                timestamps = self.vad_model['get_speech_timestamps'](
+                    torch.from_numpy(audio), self.vad_model['model'], sampling_rate=STT_SAMPLE_RATE
+                )
+            if not timestamps:
+                return np.zeros(0, dtype=np.float32)
+            
+            return np.concatenate([audio[ts['start']:ts['end']] for ts in timestamps])
+            
+        except Exception as e:
+            self.logger.debug(f"VAD failed, using full audio: {e}")
+            return None
+    
+    def _decode_audio_pcm(self, audio_path: Path) -> Optional[np.ndarray]:
+        """Decode and resample audio to 16 kHz mono float32 with PyAV (no subprocess, no temp WAV)"""
+        if not PYAV_AVAILABLE:
+            return None
+        
+        try:
+            with av.open(str(audio_path)) as container:
+                stream = container.streams.audio[0]
+                resampler = av.AudioResampler(format='flt', layout='mono', rate=STT_SAMPLE_RATE)
                 
+                chunks = []
+                for frame in container.decode(stream):
+                    for resampled in resampler.resample(frame):
+                        chunks.append(resampled.to_ndarray().reshape(-1))
+                # Flush samples buffered inside the resampler
+                for resampled in resampler.resample(None):
+                    chunks.append(resampled.to_ndarray().reshape(-1))
+            
+            if not chunks:
+                return None
+            return np.concatenate(chunks).astype(np.float32, copy=False)
+            
         except Exception as e:
-            self.logger.debug(f"STT processing failed: {e}")
-            return "", 0.0
+            self.logger.debug(f"PyAV decoding failed, falling back to ffmpeg: {e}")
+            return None
     
-    def _prepare_audio_for_stt(self, audio_path: Path) -> Optional[str]:
-        """Convert audio to format suitable for STT"""
-        # If it's already WAV, use as-is
-        if audio_path.suffix.lower() == '.wav':
-            return str(audio_path)
+    def _prepare_audio_for_stt(self, audio_path: Path) -> Union[str, np.ndarray, None]:
+        """
+        Decode audio to 16 kHz mono float32 with ffmpeg (used when PyAV cannot decode it)
         
+        The PCM is read from ffmpeg's stdout, so no WAV is written and read back. Without
+        ffmpeg (or if it fails) the original path is returned for the STT engine to load.
+        """
         if not self.ffmpeg_available:
-            # If no ffmpeg, try with original file
             return str(audio_path)
         
         try:
-            # Create processed audio cache directory
-            audio_dir = self.cache_dir / "stt_audio"
-            audio_dir.mkdir(exist_ok=True)
-            
-            # Generate processed filename
-            file_hash = hashlib.md5(str(audio_path).encode()).hexdigest()[:12]
-            processed_name = f"{file_hash}_{audio_path.stem}.wav"
-            processed_path = audio_dir / processed_name
-            
-            # Convert audio if not exists
-            if not processed_path.exists():
-                cmd = [
-                    'ffmpeg', '-i', str(audio_path),
-                    '-acodec', 'pcm_s16le',  # WAV format
-                    '-ar', '16000',  # 16kHz sample rate (good for speech)
-                    '-ac', '1',  # Mono
-                    '-y',  # Overwrite
-                    str(processed_path)
-                ]
-                
-                result = subprocess.run(cmd, capture_output=True, timeout=300)
-                
-                if result.returncode != 0:
-                    self.logger.debug(f"Audio conversion failed: {result.stderr}")
-                    return str(audio_path)  # Try with original
+            cmd = [
+                'ffmpeg', '-nostdin', '-i', str(audio_path),
+                '-f', 'f32le',  # Raw float32 samples on stdout
+                '-ac', '1',  # Mono
+                '-ar', str(STT_SAMPLE_RATE),  # 16kHz sample rate (good for speech)
+                '-'
+            ]
+            
+            result = subprocess.run(cmd, capture_output=True, timeout=300)
+            
+            if result.returncode != 0:
+                self.logger.debug(f"Audio conversion failed: {result.stderr}")
+                return str(audio_path)  # Try with original
             
-            return str(processed_path)
+            if not result.stdout:
+                return None
+            # Copy: torch.from_numpy (VAD, Whisper) needs a writable array
+            return np.frombuffer(result.stdout, dtype=np.float32).copy()
             
         except Exception as e:
             self.logger.debug(f"Audio preprocessing error: {e}")
             return str(audio_path)  # Fallback to original
     
-    def _stt_with_whisper(self, audio_path: str) -> Tuple[str, float]:
-        """Perform STT using Whisper"""
+    def _stt_with_faster_whisper(self, audio: Union[str, np.ndarray], batch_size: int = 0) -> Tuple[str, float]:
+        """
+        Perform STT using faster-whisper (file path or 16 kHz float32 samples)
+        
+        With batch_size > 0 the 30 s windows of the file are decoded as one batch.
+        """
+        try:
+            model = self.stt_engine['model']
+            if batch_size > 0 and self._faster_whisper_pipeline() is not None:
+                segments, info = self._faster_whisper_pipeline().transcribe(
+                    audio, language=STT_LANGUAGE, beam_size=1, batch_size=batch_size
+                )
+            else:
+                # Arrays have already been through Silero VAD
+                segments, info = model.transcribe(audio, language=STT_LANGUAGE, vad_filter=isinstance(audio, str),
+                                                  beam_size=1, condition_on_previous_text=False,
+                                                  no_speech_threshold=NO_SPEECH_THRESHOLD)
+            
+            # segments is a generator; decoding happens while iterating
+            texts = []
+            confidences = []
+            for segment in segments:
+                texts.append(segment.text.strip())
+                confidences.append(math.exp(segment.avg_logprob))
+            
+            text = " ".join(t for t in texts if t)
+            avg_confidence = sum(confidences) / len(confidences) if confidences else 0.5
+            
+            return text, avg_confidence
+            
+        except Exception as e:
+            self.logger.debug(f"faster-whisper STT failed: {e}")
+            raise
+    
+    def _faster_whisper_pipeline(self):
+        """Batched faster-whisper pipeline (faster-whisper >= 1.1), created on first use"""
+        if 'batched_pipeline' not in self.stt_engine:
+            try:
+                from faster_whisper import BatchedInferencePipeline
+                self.stt_engine['batched_pipeline'] = BatchedInferencePipeline(model=self.stt_engine['model'])
+            except ImportError:
+                self.stt_engine['batched_pipeline'] = None
+        return self.stt_engine['batched_pipeline']
+    
+    def _stt_with_whisper(self, audio: Union[str, np.ndarray]) -> Tuple[str, float]:
+        """Perform STT using Whisper (file path or 16 kHz float32 samples)"""
         try:
+            import torch
+            
             model = self.stt_engine['model']
-            result = model.transcribe(audio_path, language='ko')  # Auto-detect or force Korean
+            # Language is auto-detected unless STT_LANGUAGE is set
+            with self.stt_engine['lock'], torch.inference_mode():
+                result = model.transcribe(audio, language=STT_LANGUAGE,
+                                          fp16=model.device.type == 'cuda',
+                                          condition_on_previous_text=False,
+                                          no_speech_threshold=NO_SPEECH_THRESHOLD)
             
             text = result.get('text', '').strip()
             
-            # Calculate average confidence from segments
-            segments = result.get('segments', [])
-            if segments:
-                confidences = [seg.get('confidence', 0) for seg in segments if 'confidence' in seg]
-                avg_confidence = sum(confidences) / len(confidences) if confidences else 0.5
-            else:
-                avg_confidence = 0.5
+            # Average confidence from the segments' avg_logprob (Whisper has no 'confidence' field)
+            logprobs = np.fromiter((seg['avg_logprob'] for seg in result.get('segments', [])
+                                    if 'avg_logprob' in seg), dtype=np.float32)
+            avg_confidence = float(np.exp(logprobs.mean())) if logprobs.size else 0.5
             
             return text, avg_confidence
             
         except Exception as e:
             self.logger.debug(f"Whisper STT failed: {e}")
-            return "", 0.0
+            raise
     
-    def _stt_with_speech_recognition(self, audio_path: str) -> Tuple[str, float]:
+    def _stt_with_speech_recognition(self, audio_input: Union[str, np.ndarray]) -> Tuple[str, float]:
         """Perform STT using SpeechRecognition library"""
         try:
             import speech_recognition as sr
             
             recognizer = self.stt_engine['recognizer']
             
-            # Load audio file
-            with sr.AudioFile(audio_path) as source:
-                # Adjust for ambient noise
-                recognizer.adjust_for_ambient_noise(source, duration=1)
-                audio = recognizer.record(source)
+            # Load audio file (in-memory samples are wrapped as 16-bit PCM)
+            if isinstance(audio_input, np.ndarray):
+                pcm = (np.clip(audio_input, -1.0, 1.0) * 32767).astype(np.int16).tobytes()
+                audio = sr.AudioData(pcm, STT_SAMPLE_RATE, 2)
+            else:
+                with sr.AudioFile(audio_input) as source:
+                    # Adjust for ambient noise
+                    recognizer.adjust_for_ambient_noise(source, duration=1)
+                    audio = recognizer.record(source)
             
             # Try Google Speech Recognition (requires internet)
             try:
                 text = recognizer.recognize_google(audio, language='ko-KR')
                 return text, 0.7  # Default confidence
-            except sr.UnknownValueException:
+            except sr.UnknownValueError:
                 return "", 0.0
             except sr.RequestError:
-                # Fallback to offline recognition if available
-                try:
-                    text = recognizer.recognize_sphinx(audio)
-                    return text, 0.5
-                except:
-                    return "", 0.0
+                # Fallback to offline recognition if available (raises if it is not)
+                text = recognizer.recognize_sphinx(audio)
+                return text, 0.5
                     
         except Exception as e:
             self.logger.debug(f"SpeechRecognition STT failed: {e}")
-            return "", 0.0
+            raise
     
     def _metadata_to_text(self, metadata: Dict[str, Any]) -> str:
         """Convert audio metadata to searchable text"""
-        text_parts = []
-        
-        # Music tags
-        for field in ['title', 'artist', 'album', 'genre', 'albumartist', 'composer']:
-            if field in metadata and metadata[field]:
-                text_parts.append(f"{field.title()}: {metadata[field]}")
-        
-        # Technical info
-        if 'duration' in metadata:
-            duration_min = int(metadata['duration'] // 60)
-            duration_sec = int(metadata['duration'] % 60)
-            text_parts.append(f"Duration: {duration_min}:{duration_sec:02d}")
-        
-        if 'bitrate' in metadata and metadata['bitrate']:
-            text_parts.append(f"Bitrate: {metadata['bitrate']} kbps")
-        
-        if 'sample_rate' in metadata and metadata['sample_rate']:
-            text_parts.append(f"Sample Rate: {metadata['sample_rate']} Hz")
+        text_parts = [template.format(value) for field, template in self._TEXT_FIELDS
+                      if (value := metadata.get(field))]
         
-        if 'codec' in metadata and metadata['codec']:
-            text_parts.append(f"Codec: {metadata['codec']}")
+        # Duration is shown even when zero, between the music tags and the technical info
+        duration = metadata.get('duration')
+        if duration is not None:
+            position = sum(1 for field in self._MUSIC_FIELDS if metadata.get(field))
+            text_parts.insert(position, f"Duration: {int(duration // 60)}:{int(duration % 60):02d}")
         
         return " | ".join(text_parts)
     
@@ -5,17 +5,212 @@ Unified text extraction from various file formats including HWP/HWPX
 """
 
 import os
+import re
+import html
+import codecs
+import stat
 import logging
+import threading
+import atexit
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Dict, Any, Tuple
+from typing import Optional, Dict, Any, List, Tuple
 import mimetypes
-import chardet
+
+# Encoding detection: cchardet (C) > charset-normalizer > chardet (pure Python)
+try:
+    import cchardet
+    CCHARDET_AVAILABLE = True
+except ImportError:
+    CCHARDET_AVAILABLE = False
+
+try:
+    import charset_normalizer
+    CHARSET_NORMALIZER_AVAILABLE = True
+except ImportError:
+    CHARSET_NORMALIZER_AVAILABLE = False
+
+if not (CCHARDET_AVAILABLE or CHARSET_NORMALIZER_AVAILABLE):
+    import chardet
+
+try:
+    import lxml.html
+    from lxml import etree
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
 
 # Import specialized processors
 from hwp_processor import HWPProcessor
+from file_utils import file_extension
 
 logger = logging.getLogger(__name__)
 
+# Bytes passed to the encoding detector (the whole file is still decoded)
+ENCODING_SNIFF_BYTES = 64 * 1024
+
+# Control characters removed by _clean_text (everything in C0/C1 except tab, newline, CR)
+_CONTROL_CHAR_DELETE = dict.fromkeys(
+    [*range(0x00, 0x09), 0x0b, 0x0c, *range(0x0e, 0x20), *range(0x7f, 0xa0)]
+)
+
+# Patterns used by _clean_text and _extract_html, compiled once
+_CONTROL_CHARS_RE = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f]')
+# Whitespace patterns only match text that actually changes: re.sub keeps a piece per
+# match, so matching every single space or newline costs several times the text size
+_MULTI_SPACE_RE = re.compile(r'\t[ \t]*| [ \t]+')
+_MULTI_NEWLINE_RE = re.compile(r'\n\s*\n\s*\n+')
+_LINE_EDGE_SPACE_RE = re.compile(r'[^\S\n]+\n[^\S\n]*|\n[^\S\n]+')  # Same whitespace as str.strip()
+_SCRIPT_RE = re.compile(r'<script[^>]*>.*?</script>', re.DOTALL | re.IGNORECASE)
+_STYLE_RE = re.compile(r'<style[^>]*>.*?</style>', re.DOTALL | re.IGNORECASE)
+_TAG_RE = re.compile(r'<[^>]+>')
+
+# Readahead hints (Linux and most Unixes; not macOS/Windows)
+FADVISE_AVAILABLE = hasattr(os, 'posix_fadvise')
+
+# Worker processes in the pool extract_many shares across calls
+EXTRACT_WORKERS = os.cpu_count() or 1
+
+# Page cache budget for extract_many's WILLNEED prefetch
+PREFETCH_MAX_BYTES = 256 * 1024 * 1024
+
+# Initial size of the per-thread buffer _extract_text reads files into (grown on demand)
+READ_BUFFER_BYTES = 1024 * 1024
+
+# Byte order marks; UTF-32 first since its little-endian BOM starts with the UTF-16 one
+_BOM_ENCODINGS = (
+    (b'\xef\xbb\xbf', 'utf-8-sig'),
+    (b'\xff\xfe\x00\x00', 'utf-32'),
+    (b'\x00\x00\xfe\xff', 'utf-32'),
+    (b'\xff\xfe', 'utf-16'),
+    (b'\xfe\xff', 'utf-16'),
+)
+
+# Supported file types: extension -> ContentExtractor method
+_EXTRACTORS = {
+    # Korean document formats
+    '.hwp': '_extract_hwp',
+    '.hwpx': '_extract_hwp',
+    
+    # Standard document formats
+    '.txt': '_extract_text',
+    '.md': '_extract_text',
+    '.csv': '_extract_text',
+    '.json': '_extract_text',
+    '.xml': '_extract_text',
+    '.log': '_extract_text',
+    
+    # Code files
+    '.py': '_extract_text',
+    '.js': '_extract_text',
+    '.java': '_extract_text',
+    '.cpp': '_extract_text',
+    '.c': '_extract_text',
+    '.go': '_extract_text',
+    '.php': '_extract_text',
+    '.rb': '_extract_text',
+    '.sh': '_extract_text',
+    '.sql': '_extract_text',
+    '.html': '_extract_html',
+    '.css': '_extract_text',
+    
+    # Configuration files
+    '.yml': '_extract_text',
+    '.yaml': '_extract_text',
+    '.toml': '_extract_text',
+    '.ini': '_extract_text',
+    '.conf': '_extract_text',
+    '.config': '_extract_text',
+}
+
+
+@lru_cache(maxsize=512)
+def _guess_mime_for_ext(extension: str) -> Optional[str]:
+    """MIME type for a lowercase extension; mimetypes only looks at the suffix, so results are per extension"""
+    return mimetypes.guess_type('file' + extension)[0]
+
+
+def _detect_encoding(raw_data: bytes) -> Tuple[Optional[str], float]:
+    """Detect the text encoding of raw_data as (encoding, confidence) using the fastest available detector"""
+    if CCHARDET_AVAILABLE:
+        result = cchardet.detect(raw_data)
+        return result.get('encoding'), result.get('confidence') or 0.0
+    
+    if CHARSET_NORMALIZER_AVAILABLE:
+        best = charset_normalizer.from_bytes(raw_data).best()
+        if best is None:
+            return None, 0.0
+        return best.encoding, 1.0 - best.chaos
+    
+    result = chardet.detect(raw_data)
+    return result.get('encoding'), result.get('confidence') or 0.0
+
+
+def _bom_encoding(raw_data: bytes) -> Optional[str]:
+    """Codec for a leading byte order mark (decoding with it drops the BOM), or None"""
+    for bom, encoding in _BOM_ENCODINGS:
+        if raw_data.startswith(bom):
+            return encoding
+    return None
+
+
+def _sniff_prefix(raw_data: bytes) -> bytes:
+    """Up to ENCODING_SNIFF_BYTES of raw_data, cut without splitting a multi-byte character"""
+    if len(raw_data) <= ENCODING_SNIFF_BYTES:
+        return raw_data
+    prefix = raw_data[:ENCODING_SNIFF_BYTES]
+    # Space/newline are never trail bytes in CJK multi-byte encodings (cp949, shift_jis, gbk...)
+    cut = max(prefix.rfind(b'\n'), prefix.rfind(b' '))
+    return prefix[:cut + 1] if cut > 0 else prefix
+
+
+def _prefetch_files(paths, max_bytes: int = PREFETCH_MAX_BYTES):
+    """Ask the kernel to start reading files into the page cache (POSIX_FADV_WILLNEED), up to max_bytes"""
+    if not FADVISE_AVAILABLE:
+        return
+    
+    for path in paths:
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            continue
+        try:
+            size = os.fstat(fd).st_size
+            if size > max_bytes:
+                continue  # Only this file is skipped; smaller ones later may still fit
+            max_bytes -= size
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+
+def _html_to_text(markup: str) -> str:
+    """Visible text of an HTML document: script/style/comments dropped, tags replaced by spaces"""
+    if LXML_AVAILABLE:
+        # Linear-time C parser; immune to regex backtracking on malformed markup
+        try:
+            tree = lxml.html.document_fromstring(markup)
+            etree.strip_elements(tree, etree.Comment, 'script', 'style', with_tail=False)
+            return ' '.join(tree.itertext())
+        except (etree.ParserError, ValueError):
+            pass  # Empty document, or an XML encoding declaration in a str; use the regexes
+    
+    # Remove script and style content
+    markup = _SCRIPT_RE.sub('', markup)
+    markup = _STYLE_RE.sub('', markup)
+    
+    # Remove HTML tags
+    markup = _TAG_RE.sub(' ', markup)
+    
+    # Clean up HTML entities
+    return html.unescape(markup)
+
+
 class ContentExtractor:
     """
     Unified content extraction system supporting multiple file formats
@@ -27,42 +222,11 @@ class ContentExtractor:
         # Initialize specialized processors
         self.hwp_processor = HWPProcessor()
         
-        # Define supported file types and their processors
-        self.extractors = {
-            # Korean document formats
-            '.hwp': self._extract_hwp,
-            '.hwpx': self._extract_hwp,
-            
-            # Standard document formats
-            '.txt': self._extract_text,
-            '.md': self._extract_text,
-            '.csv': self._extract_text,
-            '.json': self._extract_text,
-            '.xml': self._extract_text,
-            '.log': self._extract_text,
-            
-            # Code files
-            '.py': self._extract_text,
-            '.js': self._extract_text,
-            '.java': self._extract_text,
-            '.cpp': self._extract_text,
-            '.c': self._extract_text,
-            '.go': self._extract_text,
-            '.php': self._extract_text,
-            '.rb': self._extract_text,
-            '.sh': self._extract_text,
-            '.sql': self._extract_text,
-            '.html': self._extract_html,
-            '.css': self._extract_text,
-            
-            # Configuration files
-            '.yml': self._extract_text,
-            '.yaml': self._extract_text,
-            '.toml': self._extract_text,
-            '.ini': self._extract_text,
-            '.conf': self._extract_text,
-            '.config': self._extract_text,
-        }
+        # Bind the module-level extension table once; lookups then skip getattr
+        self.extractors = {extension: getattr(self, name) for extension, name in _EXTRACTORS.items()}
+        
+        # Per-thread reusable read buffer, so text files don't each allocate a fresh bytes object
+        self._read_buffers = threading.local()
         
         # File size limits (in bytes)
         self.max_file_size = 50 * 1024 * 1024  # 50MB
@@ -70,13 +234,11 @@ class ContentExtractor:
     
     def can_extract(self, file_path: str) -> bool:
         """Check if file can be processed"""
-        file_path = Path(file_path)
-        
-        if not file_path.exists() or not file_path.is_file():
+        # Extension first: rejecting unsupported files needs neither a Path nor a stat()
+        if file_extension(file_path) not in _EXTRACTORS:
             return False
         
-        extension = file_path.suffix.lower()
-        return extension in self.extractors
+        return os.path.isfile(file_path)
     
     def extract_content(self, file_path: str) -> Tuple[str, bool, Dict[str, Any]]:
         """
@@ -85,40 +247,41 @@ class ContentExtractor:
         Returns:
             tuple: (text_content, success, metadata)
         """
-        file_path = Path(file_path)
+        # Get file extension (unsupported files are rejected before touching the filesystem)
+        extension = file_extension(file_path)
         
-        # Basic validation
-        if not file_path.exists():
-            return "", False, {"error": "File does not exist"}
+        if extension not in _EXTRACTORS:
+            return "", False, {
+                "error": "Unsupported file format",
+                "extension": extension,
+                "supported_formats": list(_EXTRACTORS)
+            }
         
-        if not file_path.is_file():
-            return "", False, {"error": "Path is not a file"}
+        file_path = Path(file_path)
         
-        # Check file size
+        # Basic validation: one stat() answers existence, type and size
         try:
-            file_size = file_path.stat().st_size
-            if file_size > self.max_file_size:
-                return "", False, {
-                    "error": f"File too large: {file_size} bytes (max: {self.max_file_size})",
-                    "file_size": file_size
-                }
-        except Exception as e:
+            file_stat = os.stat(file_path)
+        except (FileNotFoundError, NotADirectoryError):
+            return "", False, {"error": "File does not exist"}
+        except OSError as e:
             return "", False, {"error": f"Cannot access file: {e}"}
         
-        # Get file extension
-        extension = file_path.suffix.lower()
+        if not stat.S_ISREG(file_stat.st_mode):
+            return "", False, {"error": "Path is not a file"}
         
-        if extension not in self.extractors:
+        # Check file size
+        file_size = file_stat.st_size
+        if file_size > self.max_file_size:
             return "", False, {
-                "error": "Unsupported file format",
-                "extension": extension,
-                "supported_formats": list(self.extractors.keys())
+                "error": f"File too large: {file_size} bytes (max: {self.max_file_size})",
+                "file_size": file_size
             }
         
         # Extract content using appropriate method
         try:
             extractor = self.extractors[extension]
-            text, success, metadata = extractor(str(file_path))
+            text, success, metadata = extractor(str(file_path), file_stat)
             
             # Add common metadata
             metadata.update({
@@ -140,15 +303,64 @@ class ContentExtractor:
             self.logger.error(f"❌ Content extraction error for {file_path}: {e}")
             return "", False, {"error": str(e), "extractor": extractor.__name__}
     
-    def _extract_hwp(self, file_path: str) -> Tuple[str, bool, Dict[str, Any]]:
+    def extract_many(self, file_paths: List[str]) -> List[Tuple[str, bool, Dict[str, Any]]]:
+        """
+        Extract text content from many files across a process pool
+        
+        Encoding detection and text cleaning are CPU-bound Python, so files are spread over
+        worker processes in chunks (amortizing IPC). The pool is started once (see
+        start_workers) and reused by every call. HWP files are extracted in this process
+        meanwhile, because their LibreOffice fallback cannot run as parallel instances.
+        
+        Returns:
+            list of (text_content, success, metadata) in the order of file_paths
+        """
+        paths = [str(file_path) for file_path in file_paths]
+        results: List[Optional[Tuple[str, bool, Dict[str, Any]]]] = [None] * len(paths)
+        hwp_indices = [i for i, path in enumerate(paths) if file_extension(path) in ('.hwp', '.hwpx')]
+        hwp_set = set(hwp_indices)
+        pool_indices = [i for i in range(len(paths)) if i not in hwp_set]
+        
+        pool = _get_extract_pool() if len(pool_indices) > 1 and EXTRACT_WORKERS > 1 else None
+        if pool is None:
+            return [self.extract_content(path) for path in paths]
+        
+        try:
+            chunksize = min(16, max(1, len(pool_indices) // (EXTRACT_WORKERS * 4)))
+            pooled = pool.map(_extract_in_worker, [paths[i] for i in pool_indices], chunksize=chunksize)
+            # Queue kernel readahead for the files the workers will read, so they mostly hit the page cache
+            _prefetch_files(paths[i] for i in pool_indices)
+            for i in hwp_indices:
+                results[i] = self.extract_content(paths[i])
+            for i, result in zip(pool_indices, pooled):
+                results[i] = result
+        except BrokenProcessPool as e:
+            # A worker died (e.g. killed for memory): drop the pool, extract this batch here
+            logger.warning(f"Extraction worker pool broke, extracting in process: {e}")
+            shutdown_extract_pool()
+            return [result or self.extract_content(path) for path, result in zip(paths, results)]
+        
+        return results
+    
+    @staticmethod
+    def start_workers():
+        """
+        Start extract_many's worker processes now instead of on its first call
+        
+        Workers are forked, so a process that later loads CUDA models or starts threads
+        should call this first, while forking is still cheap and safe.
+        """
+        if EXTRACT_WORKERS > 1:
+            _get_extract_pool()
+    
+    def _extract_hwp(self, file_path: str, file_stat: Optional[os.stat_result] = None) -> Tuple[str, bool, Dict[str, Any]]:
         """Extract content from HWP/HWPX files"""
         return self.hwp_processor.extract_text(file_path)
     
-    def _extract_text(self, file_path: str) -> Tuple[str, bool, Dict[str, Any]]:
-        """Extract content from plain text files"""
+    def _extract_text(self, file_path: str, file_stat: Optional[os.stat_result] = None) -> Tuple[str, bool, Dict[str, Any]]:
+        """Extract content from plain text files (file_stat: the caller's os.stat result, if any)"""
         try:
-            file_path = Path(file_path)
-            file_size = file_path.stat().st_size
+            file_size = (file_stat or os.stat(file_path)).st_size
             
             # Size check for text files
             if file_size > self.max_text_file_size:
@@ -158,20 +370,32 @@ class ContentExtractor:
             
             # Detect encoding
             with open(file_path, 'rb') as f:
-                raw_data = f.read()
-            
-            encoding_info = chardet.detect(raw_data)
-            encoding = encoding_info.get('encoding', 'utf-8')
-            confidence = encoding_info.get('confidence', 0.0)
+                if FADVISE_AVAILABLE:
+                    # Whole-file read: let the kernel use its largest readahead window
+                    os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                buffer, size = self._read_into_buffer(f, file_size)
             
-            # Try to decode with detected encoding
-            try:
-                text = raw_data.decode(encoding)
-            except (UnicodeDecodeError, LookupError):
-                # Fallback to utf-8 with error handling
-                text = raw_data.decode('utf-8', errors='ignore')
-                encoding = 'utf-8 (fallback)'
-                confidence = 0.0
+            # Decoders read straight from the buffer; no bytes copy of the file is made
+            with memoryview(buffer)[:size] as raw_data:
+                try:
+                    # A BOM names the encoding; otherwise most files are UTF-8 (or ASCII) and a
+                    # strict decode settles those without running a detector
+                    encoding = _bom_encoding(bytes(raw_data[:4])) or 'utf-8'
+                    text = str(raw_data, encoding)
+                    confidence = 1.0
+                except UnicodeDecodeError:
+                    # Detectors converge within a few KB, so only a prefix is sniffed
+                    encoding, confidence = _detect_encoding(_sniff_prefix(bytes(raw_data[:ENCODING_SNIFF_BYTES])))
+                    encoding = encoding or 'utf-8'  # Nothing detected
+                    
+                    # Try to decode with detected encoding
+                    try:
+                        text = str(raw_data, encoding)
+                    except (UnicodeDecodeError, LookupError):
+                        # Fallback to utf-8 with error handling
+                        text = str(raw_data, 'utf-8', 'ignore')
+                        encoding = 'utf-8 (fallback)'
+                        confidence = 0.0
             
             # Clean text
             text = self._clean_text(text)
@@ -189,28 +413,36 @@ class ContentExtractor:
         except Exception as e:
             return "", False, {"error": str(e)}
     
-    def _extract_html(self, file_path: str) -> Tuple[str, bool, Dict[str, Any]]:
+    def _read_into_buffer(self, f, file_size: int) -> Tuple[bytearray, int]:
+        """Read an open binary file into this thread's reusable buffer; returns (buffer, bytes read)"""
+        buffer = getattr(self._read_buffers, 'buffer', None)
+        # One spare byte shows whether the file grew since it was stat()ed
+        if buffer is None or len(buffer) <= file_size:
+            buffer = self._read_buffers.buffer = bytearray(max(READ_BUFFER_BYTES, file_size + 1))
+        
+        size = 0
+        with memoryview(buffer) as view:
+            while size < len(buffer):
+                read = f.readinto(view[size:])
+                if not read:
+                    return buffer, size
+                size += read
+        
+        # Still growing: take the rest in one read (rare; the buffer is replaced, not resized)
+        buffer = self._read_buffers.buffer = buffer + f.read()
+        return buffer, len(buffer)
+    
+    def _extract_html(self, file_path: str, file_stat: Optional[os.stat_result] = None) -> Tuple[str, bool, Dict[str, Any]]:
         """Extract content from HTML files"""
         try:
             # First extract as text
-            text, success, metadata = self._extract_text(file_path)
+            text, success, metadata = self._extract_text(file_path, file_stat)
             
             if not success:
                 return text, success, metadata
             
-            # Simple HTML tag removal
-            import re
-            
-            # Remove script and style content
-            text = re.sub(r'<script[^>]*>.*?</script>', '', text, flags=re.DOTALL | re.IGNORECASE)
-            text = re.sub(r'<style[^>]*>.*?</style>', '', text, flags=re.DOTALL | re.IGNORECASE)
-            
-            # Remove HTML tags
-            text = re.sub(r'<[^>]+>', ' ', text)
-            
-            # Clean up HTML entities
-            import html
-            text = html.unescape(text)
+            # Strip tags, script/style content and entities
+            text = _html_to_text(text)
             
             # Clean whitespace
             text = self._clean_text(text)
@@ -230,18 +462,20 @@ class ContentExtractor:
         if not text:
             return ""
         
-        import re
-        
         # Remove control characters except newlines and tabs
-        text = re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f]', '', text)
+        # str.translate is fastest on ASCII text but much slower than the regex on
+        # non-ASCII text (e.g. Korean documents); isascii() is a constant-time flag check
+        if text.isascii():
+            text = text.translate(_CONTROL_CHAR_DELETE)
+        else:
+            text = _CONTROL_CHARS_RE.sub('', text)
         
         # Normalize whitespace
-        text = re.sub(r'[ \t]+', ' ', text)  # Multiple spaces/tabs -> single space
-        text = re.sub(r'\n\s*\n\s*\n+', '\n\n', text)  # Multiple newlines -> double newline
+        text = _MULTI_SPACE_RE.sub(' ', text)  # Multiple spaces/tabs -> single space
+        text = _MULTI_NEWLINE_RE.sub('\n\n', text)  # Multiple newlines -> double newline
         
-        # Remove leading/trailing whitespace from lines
-        lines = [line.strip() for line in text.split('\n')]
-        text = '\n'.join(lines)
+        # Remove leading/trailing whitespace from lines (one pass, no per-line string objects)
+        text = _LINE_EDGE_SPACE_RE.sub('\n', text)
         
         return text.strip()
     
@@ -251,27 +485,33 @@ class ContentExtractor:
     
     def get_file_info(self, file_path: str) -> Dict[str, Any]:
         """Get file information and extraction capabilities"""
+        extension = file_extension(file_path)
         file_path = Path(file_path)
         
+        try:
+            file_stat = os.stat(file_path)
+        except OSError:
+            file_stat = None
+        is_file = file_stat is not None and stat.S_ISREG(file_stat.st_mode)
+        
         info = {
             'file_name': file_path.name,
             'file_path': str(file_path),
-            'exists': file_path.exists(),
-            'is_file': file_path.is_file() if file_path.exists() else False,
-            'file_size': file_path.stat().st_size if file_path.exists() else 0,
-            'extension': file_path.suffix.lower(),
-            'can_extract': self.can_extract(str(file_path)),
+            'exists': file_stat is not None,
+            'is_file': is_file,
+            'file_size': file_stat.st_size if file_stat else 0,
+            'extension': extension,
+            'can_extract': is_file and extension in _EXTRACTORS,
             'supported_extensions': self.get_supported_extensions()
         }
         
         # Add MIME type if available
-        mime_type, _ = mimetypes.guess_type(str(file_path))
+        mime_type = _guess_mime_for_ext(extension)
         if mime_type:
             info['mime_type'] = mime_type
         
         # Add extractor information
         if info['can_extract']:
-            extension = file_path.suffix.lower()
             extractor = self.extractors.get(extension)
             if extractor:
                 info['extractor_method'] = extractor.__name__
@@ -285,21 +525,100 @@ class ContentExtractor:
     
     def extract_sample(self, file_path: str, max_chars: int = 1000) -> Tuple[str, bool, Dict[str, Any]]:
         """Extract a sample of content for preview purposes"""
+        sample_size = max_chars // 2
+        
+        # Large plain text files: read only the two ends instead of decoding and cleaning everything
+        # (files over max_text_file_size take the full path, which rejects them like extract_content)
+        if _EXTRACTORS.get(file_extension(file_path)) == '_extract_text':
+            window = max(sample_size * 4, 4096)  # Bytes per end; UTF-8 needs up to 4 per char
+            try:
+                file_stat = os.stat(file_path)
+            except OSError:
+                file_stat = None
+            if (file_stat is not None and stat.S_ISREG(file_stat.st_mode)
+                    and 2 * window < file_stat.st_size <= self.max_text_file_size):
+                sampled = self._extract_text_sample(os.fspath(file_path), file_stat, max_chars, window)
+                if sampled is not None:
+                    return sampled
+        
         text, success, metadata = self.extract_content(file_path)
         
         if success and text and len(text) > max_chars:
             # Extract sample from beginning and end
-            sample_size = max_chars // 2
             sample_text = text[:sample_size] + "\n...\n" + text[-sample_size:]
             metadata.update({
                 "is_sample": True,
                 "sample_size": max_chars,
-                "total_length": len(text)
+                "total_length": len(text),
+                "total_length_unit": "characters"
             })
             return sample_text, True, metadata
         
         return text, success, metadata
     
+    def _extract_text_sample(self, file_path: str, file_stat: os.stat_result,
+                             max_chars: int, window: int) -> Optional[Tuple[str, bool, Dict[str, Any]]]:
+        """
+        Preview a plain text file from its first and last `window` bytes
+        
+        Returns None when the cleaned ends are too short to fill the sample (mostly
+        whitespace), so the caller decides from the full text whether it is a sample at all.
+        """
+        try:
+            with open(file_path, 'rb') as f:
+                head = f.read(window)
+                f.seek(-window, os.SEEK_END)
+                tail = f.read(window)
+            
+            # Same encoding resolution as _extract_text, on the head only. The incremental
+            # decoder holds back a character cut at the window edge instead of failing on it.
+            bom, encoding = next(((mark, name) for mark, name in _BOM_ENCODINGS if head.startswith(mark)),
+                                 (b'', 'utf-8'))
+            codec = encoding
+            confidence = 1.0
+            try:
+                codecs.getincrementaldecoder(encoding)().decode(head)
+            except UnicodeDecodeError:
+                bom = b''
+                encoding, confidence = _detect_encoding(_sniff_prefix(head))
+                codec = encoding = encoding or 'utf-8'
+                try:
+                    codecs.lookup(codec)
+                except LookupError:
+                    codec, encoding, confidence = 'utf-8', 'utf-8 (fallback)', 0.0
+            
+            # The tail starts mid-file: the head's BOM keeps UTF-16/32 byte order, and the
+            # partial character at its start is dropped
+            head_text = self._clean_text(head.decode(codec, errors='ignore'))
+            tail_text = self._clean_text((bom + tail).decode(codec, errors='ignore'))
+            
+            sample_size = max_chars // 2
+            if len(head_text) < sample_size or len(tail_text) < sample_size:
+                return None
+            
+            sample_text = head_text[:sample_size] + "\n...\n" + tail_text[-sample_size:]
+            # Same keys as the full path. The text is never fully decoded here, so the counts
+            # are unknown (None) and total_length is the file size in bytes, not characters.
+            return sample_text, True, {
+                "encoding": encoding,
+                "encoding_confidence": confidence,
+                "character_count": None,
+                "line_count": None,
+                "success": True,
+                "file_path": file_path,
+                "file_name": os.path.basename(file_path),
+                "file_size": file_stat.st_size,
+                "extension": file_extension(file_path),
+                "extractor_used": self._extract_text.__name__,
+                "is_sample": True,
+                "sample_size": max_chars,
+                "total_length": file_stat.st_size,
+                "total_length_unit": "bytes"
+            }
+            
+        except Exception as e:
+            return "", False, {"error": str(e)}
+    
     def get_statistics(self) -> Dict[str, Any]:
         """Get content extractor statistics"""
         return {
@@ -316,6 +635,56 @@ class ContentExtractor:
         }
 
 
+# Per-process ContentExtractor used by extract_many workers
+_extract_worker: Optional[ContentExtractor] = None
+
+# extract_many's pool, shared by all ContentExtractor instances; _extract_pool_pid guards
+# against using a pool inherited through fork
+_extract_pool: Optional[ProcessPoolExecutor] = None
+_extract_pool_pid: Optional[int] = None
+_extract_pool_lock = threading.Lock()
+
+
+def _get_extract_pool() -> ProcessPoolExecutor:
+    """Module-level worker pool, created (and all workers started) on first use"""
+    global _extract_pool, _extract_pool_pid
+    with _extract_pool_lock:
+        if _extract_pool is None or _extract_pool_pid != os.getpid():
+            # fork, not spawn/forkserver: those re-run the __main__ script in every worker, and
+            # the services run as scripts that build the indexer (and load AI models) at import
+            _extract_pool = ProcessPoolExecutor(
+                max_workers=EXTRACT_WORKERS,
+                mp_context=multiprocessing.get_context("fork"),
+                initializer=_init_extract_worker
+            )
+            _extract_pool_pid = os.getpid()
+            # With fork all workers start on the first submit, so do it now
+            _extract_pool.submit(os.getpid).result()
+        return _extract_pool
+
+
+def shutdown_extract_pool():
+    """Stop extract_many's worker processes (also run at interpreter exit)"""
+    global _extract_pool
+    with _extract_pool_lock:
+        pool, _extract_pool = _extract_pool, None
+    if pool is not None and _extract_pool_pid == os.getpid():
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+atexit.register(shutdown_extract_pool)
+
+
+def _init_extract_worker():
+    """ProcessPoolExecutor initializer: one ContentExtractor per worker process"""
+    global _extract_worker
+    _extract_worker = ContentExtractor()
+
+
+def _extract_in_worker(file_path: str) -> Tuple[str, bool, Dict[str, Any]]:
+    return _extract_worker.extract_content(file_path)
+
+
 def test_content_extractor():
     """Test function for content extractor"""
     extractor = ContentExtractor()
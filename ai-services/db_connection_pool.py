@@ -9,34 +9,86 @@ import time
 import logging
 from typing import Optional, Dict, Any, List
 from contextlib import contextmanager
-from queue import Queue, Empty
+from collections import deque
 import os
+import weakref
 
 logger = logging.getLogger(__name__)
 
+# 페이지 캐시와 mmap 크기는 풀을 만들 때의 DB 파일 크기에 맞춘다.
+# cache_size 는 연결마다 따로 잡히므로 아래 값은 풀 전체의 예산이고 max_connections 로 나눈다:
+# 풀 하나의 페이지 캐시 상한 = max(MAX_CACHE_KIB, MIN_CONNECTION_CACHE_KIB * max_connections)
+# mmap 은 같은 파일을 OS 페이지 캐시로 공유하므로 연결 수와 상관없이 MAX_MMAP_BYTES 가 상한이다.
+MIN_CACHE_KIB = 40_000  # 기존 cache_size=10000 (4KB 페이지) 와 같은 크기
+MAX_CACHE_KIB = 200_000
+MIN_CONNECTION_CACHE_KIB = 2_000  # SQLite 기본값
+MIN_MMAP_BYTES = 256 * 1024 * 1024
+MAX_MMAP_BYTES = 2 * 1024 ** 3
+# 새 DB 파일에만 적용된다 (이미 테이블이 있으면 VACUUM 전에는 바뀌지 않는다)
+PAGE_SIZE = 8192
+
+def _memory_pragmas(db_path: str, max_connections: int) -> tuple:
+    """DB 크기에 맞춘 (연결당 cache_size KiB, mmap_size bytes): 풀 전체로 DB 를 캐시하되 상한을 둔다"""
+    try:
+        db_size = os.stat(db_path).st_size
+    except OSError:
+        db_size = 0  # 아직 없는 DB: 최소값으로 시작 (캐시는 한도일 뿐 미리 할당되지 않는다)
+    pool_cache_kib = min(max(db_size // 1024, MIN_CACHE_KIB), MAX_CACHE_KIB)
+    cache_kib = max(pool_cache_kib // max(max_connections, 1), MIN_CONNECTION_CACHE_KIB)
+    mmap_size = min(max(db_size * 2, MIN_MMAP_BYTES), MAX_MMAP_BYTES)
+    return cache_kib, mmap_size
+
+# cursor -> (description, 컬럼 이름 tuple): 행마다 컬럼 이름 리스트를 다시 만들지 않는다
+_column_names_cache: "weakref.WeakKeyDictionary[sqlite3.Cursor, tuple]" = weakref.WeakKeyDictionary()
+
+def _dict_row_factory(cursor: sqlite3.Cursor, row: tuple) -> Dict[str, Any]:
+    """Row factory returning plain dicts (dict-style access, .get(), keys(), in)"""
+    description = cursor.description
+    cached = _column_names_cache.get(cursor)
+    if cached is None or cached[0] is not description:
+        # 같은 cursor 로 새 쿼리를 실행하면 description 객체가 바뀐다
+        cached = (description, tuple(col[0] for col in description))
+        _column_names_cache[cursor] = cached
+    return dict(zip(cached[1], row))
+
+class PooledConnection(sqlite3.Connection):
+    """풀 연결: execute_query/execute_many 가 재사용하는 cursor 를 하나 가진다
+    (연결은 한 번에 한 스레드만 빌려 가므로 cursor 공유가 안전하다)"""
+    shared_cursor: Optional[sqlite3.Cursor] = None
+
 class ConnectionPool:
     """SQLite 연결 풀 클래스"""
     
     def __init__(self, db_path: str, max_connections: int = 10, 
-                 max_idle_time: int = 300, check_interval: int = 60):
+                 max_idle_time: int = 300, check_interval: int = 60,
+                 validate_on_checkout: bool = False):
         self.db_path = db_path
         self.max_connections = max_connections
         self.max_idle_time = max_idle_time
         self.check_interval = check_interval
+        # 로컬 SQLite 파일 연결은 끊어지지 않으므로 기본적으로 대여 시 SELECT 1 을 하지 않는다.
+        # 실제로 망가진 연결은 작업이 실패했을 때 rollback 으로 확인해서 교체한다.
+        self.validate_on_checkout = validate_on_checkout
         
-        self._pool = Queue(maxsize=max_connections)
+        # 유휴 연결 (conn, idle_since): 반환은 오른쪽, 대여도 오른쪽(최근에 쓴 연결)에서 하므로
+        # 왼쪽에 가장 오래 쉰 연결이 모인다
+        self._idle = deque()
         self._all_connections = set()
-        self._connection_times = {}
         self._lock = threading.RLock()
+        self._available = threading.Condition(self._lock)
+        self._waiters = 0  # _acquire 에서 기다리는 스레드 수 (self._lock 안에서만 바꾼다)
         self._shutdown = False
+        # transaction() 안에서는 같은 스레드의 execute_query/execute_many 가 이 연결을 쓴다
+        self._local = threading.local()
+        
+        self._cache_size_kib, self._mmap_size = _memory_pragmas(db_path, max_connections)
+        
+        # 유휴 연결 정리는 연결 반환 시 check_interval 마다 한 번씩 한다 (풀마다 스레드를 두지 않는다)
+        self._last_cleanup = time.monotonic()
         
         # 초기 연결 생성
         self._initialize_pool()
         
-        # 정리 스레드 시작
-        self._cleanup_thread = threading.Thread(target=self._cleanup_worker, daemon=True)
-        self._cleanup_thread.start()
-        
         logger.info(f"Connection pool initialized with {max_connections} max connections")
     
     def _initialize_pool(self):
@@ -49,7 +101,7 @@ class ConnectionPool:
             for _ in range(initial_connections):
                 conn = self._create_connection()
                 if conn:
-                    self._pool.put(conn)
+                    self._idle.append((conn, time.time()))
                     
         except Exception as e:
             logger.error(f"Error initializing connection pool: {e}")
@@ -60,39 +112,29 @@ class ConnectionPool:
             conn = sqlite3.connect(
                 self.db_path,
                 check_same_thread=False,
-                timeout=30
+                timeout=30,
+                factory=PooledConnection,
+                cached_statements=256  # 기본 128: 반복되는 쿼리의 prepare 를 건너뛴다
             )
             
             # SQLite 최적화 설정
+            # page_size 는 빈 DB 에서 WAL 로 바꾸기 전에만 적용된다
+            if conn.execute("PRAGMA page_count").fetchone()[0] == 0:
+                conn.execute(f"PRAGMA page_size={PAGE_SIZE}")
             conn.execute("PRAGMA journal_mode=WAL")
             conn.execute("PRAGMA synchronous=NORMAL")
-            conn.execute("PRAGMA cache_size=10000")
+            conn.execute(f"PRAGMA cache_size=-{self._cache_size_kib}")  # 음수 = KiB
             conn.execute("PRAGMA temp_store=MEMORY")
-            conn.execute("PRAGMA mmap_size=268435456")  # 256MB
+            conn.execute(f"PRAGMA mmap_size={self._mmap_size}")
+            conn.execute("PRAGMA wal_autocheckpoint=10000")  # 10000 페이지마다 checkpoint
             
             # Row factory 설정 - Dictionary-like Row with .get() method support
-            def dict_row_factory(cursor, row):
-                """Custom row factory that supports both dict-style access and .get() method"""
-                columns = [col[0] for col in cursor.description]
-                row_dict = dict(zip(columns, row))
-                
-                class DictRow(dict):
-                    def keys(self):
-                        return super().keys()
-                    
-                    def get(self, key, default=None):
-                        return super().get(key, default)
-                    
-                    def __contains__(self, key):
-                        return super().__contains__(key)
-                
-                return DictRow(row_dict)
-            
-            conn.row_factory = dict_row_factory
+            conn.row_factory = _dict_row_factory
+            # cursor 는 생성 시점의 row_factory 를 쓰므로 설정 후에 만든다
+            conn.shared_cursor = conn.cursor()
             
             with self._lock:
                 self._all_connections.add(conn)
-                self._connection_times[conn] = time.time()
             
             logger.debug("New database connection created")
             return conn
@@ -105,53 +147,121 @@ class ConnectionPool:
     def get_connection(self, timeout: float = 10.0):
         """연결 풀에서 연결 가져오기 (컨텍스트 매니저)"""
         conn = None
-        start_time = time.time()
         
         try:
-            # 풀에서 연결 가져오기 시도
-            try:
-                conn = self._pool.get(timeout=timeout)
-                logger.debug("Got connection from pool")
-            except Empty:
-                # 풀이 비어있으면 새 연결 생성
-                if len(self._all_connections) < self.max_connections:
-                    conn = self._create_connection()
-                    if not conn:
-                        raise Exception("Failed to create new connection")
-                else:
-                    raise Exception("Connection pool exhausted")
+            conn = self._acquire(timeout)
             
-            # 연결 유효성 검사
-            if not self._is_connection_valid(conn):
+            # 연결 유효성 검사 (validate_on_checkout 일 때만)
+            if self.validate_on_checkout and not self._is_connection_valid(conn):
                 logger.warning("Invalid connection detected, creating new one")
                 self._close_connection(conn)
                 conn = self._create_connection()
                 if not conn:
                     raise Exception("Failed to create replacement connection")
             
-            # 연결 사용 시간 업데이트
-            with self._lock:
-                self._connection_times[conn] = time.time()
-            
             yield conn
             
         except Exception as e:
             logger.error(f"Error in connection management: {e}")
-            if conn:
+            # 실패한 작업은 되돌리고, rollback 조차 안 되는 연결만 버린다
+            if conn and not self._rollback(conn):
                 self._close_connection(conn)
+                conn = None
             raise
         finally:
             # 연결을 풀에 반환
-            if conn and not self._shutdown:
-                try:
-                    if self._is_connection_valid(conn):
-                        self._pool.put(conn, timeout=1.0)
-                        logger.debug("Connection returned to pool")
-                    else:
-                        self._close_connection(conn)
-                except Exception as e:
-                    logger.warning(f"Error returning connection to pool: {e}")
+            if conn:
+                if self._shutdown:
                     self._close_connection(conn)
+                else:
+                    self._release(conn)
+                    logger.debug("Connection returned to pool")
+                    self._maybe_cleanup()
+    
+    def _acquire(self, timeout: float) -> sqlite3.Connection:
+        """유휴 연결을 꺼내고, 없으면 여유가 있을 때 새로 만들고, 그래도 없으면 반환을 기다린다"""
+        # 빠른 경로: deque.pop 은 원자적이므로 유휴 연결이 있으면 락 없이 꺼낸다
+        try:
+            conn, _ = self._idle.pop()
+            logger.debug("Got connection from pool")
+            return conn
+        except IndexError:
+            pass
+        
+        deadline = time.monotonic() + timeout
+        with self._available:
+            # _release 가 락 없이 append 한 뒤 _waiters 를 보므로, 대기자 등록을 유휴 목록 확인보다 먼저 한다
+            self._waiters += 1
+            try:
+                while True:
+                    if self._idle:
+                        conn, _ = self._idle.pop()
+                        logger.debug("Got connection from pool")
+                        return conn
+                    if len(self._all_connections) < self.max_connections:
+                        conn = self._create_connection()
+                        if not conn:
+                            raise Exception("Failed to create new connection")
+                        return conn
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise Exception("Connection pool exhausted")
+                    self._available.wait(remaining)
+            finally:
+                self._waiters -= 1
+    
+    def _release(self, conn: sqlite3.Connection):
+        """연결을 유휴 목록에 돌려놓고, 기다리는 스레드가 있을 때만 락을 잡고 깨운다"""
+        self._idle.append((conn, time.time()))
+        if self._waiters:
+            with self._available:
+                self._available.notify()
+    
+    @contextmanager
+    def transaction(self, timeout: float = 10.0):
+        """쓰기 트랜잭션 (BEGIN IMMEDIATE ... COMMIT)
+        
+        블록 안의 쓰기를 한 번의 commit(WAL fsync)으로 묶는다. 같은 스레드에서 호출한
+        execute_query/execute_many 도 이 연결을 사용하고 개별 commit 을 하지 않는다.
+        예외가 나면 rollback 한다. 중첩되면 바깥 트랜잭션에 합류한다.
+        """
+        current = getattr(self._local, 'transaction_conn', None)
+        if current is not None:
+            yield current
+            return
+        
+        with self.get_connection(timeout) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            self._local.transaction_conn = conn
+            try:
+                yield conn
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+            finally:
+                self._local.transaction_conn = None
+    
+    @contextmanager
+    def _query_connection(self):
+        """진행 중인 transaction() 의 연결, 없으면 풀에서 빌린 연결"""
+        current = getattr(self._local, 'transaction_conn', None)
+        if current is not None:
+            yield current
+        else:
+            with self.get_connection() as conn:
+                yield conn
+    
+    def _in_transaction(self) -> bool:
+        return getattr(self._local, 'transaction_conn', None) is not None
+    
+    def _rollback(self, conn: sqlite3.Connection) -> bool:
+        """열린 트랜잭션 되돌리기, 연결이 망가졌으면 False"""
+        try:
+            conn.rollback()
+            return True
+        except sqlite3.Error:
+            return False
     
     def _is_connection_valid(self, conn: sqlite3.Connection) -> bool:
         """연결 유효성 검사"""
@@ -164,11 +274,10 @@ class ConnectionPool:
     def _close_connection(self, conn: sqlite3.Connection):
         """연결 닫기"""
         try:
-            with self._lock:
-                if conn in self._all_connections:
-                    self._all_connections.remove(conn)
-                if conn in self._connection_times:
-                    del self._connection_times[conn]
+            with self._available:
+                self._all_connections.discard(conn)
+                # 자리가 났으므로 새 연결을 만들 수 있는 대기 스레드를 깨운다
+                self._available.notify()
             
             conn.close()
             logger.debug("Connection closed")
@@ -176,68 +285,58 @@ class ConnectionPool:
         except Exception as e:
             logger.warning(f"Error closing connection: {e}")
     
-    def _cleanup_worker(self):
-        """유휴 연결 정리 워커"""
-        while not self._shutdown:
-            try:
-                time.sleep(self.check_interval)
-                self._cleanup_idle_connections()
-            except Exception as e:
-                logger.error(f"Error in cleanup worker: {e}")
+    def _maybe_cleanup(self):
+        """마지막 정리 후 check_interval 이 지났으면 유휴 연결 정리"""
+        now = time.monotonic()
+        if now - self._last_cleanup < self.check_interval:
+            return
+        with self._lock:
+            # 동시에 반환한 다른 스레드가 이미 정리를 맡았으면 건너뛴다
+            if now - self._last_cleanup < self.check_interval:
+                return
+            self._last_cleanup = now
+        try:
+            self._cleanup_idle_connections()
+        except Exception as e:
+            logger.error(f"Error cleaning up idle connections: {e}")
     
     def _cleanup_idle_connections(self):
         """유휴 연결 정리"""
-        current_time = time.time()
+        cutoff = time.time() - self.max_idle_time
         connections_to_close = []
         
-        with self._lock:
-            for conn, last_used in self._connection_times.items():
-                if current_time - last_used > self.max_idle_time:
-                    connections_to_close.append(conn)
-        
         # 최소 연결 수는 유지
         min_connections = 2
-        if len(self._all_connections) - len(connections_to_close) < min_connections:
-            connections_to_close = connections_to_close[:-min_connections]
+        with self._lock:
+            # 가장 오래 쉰 연결부터 (왼쪽) 보고, 아직 max_idle_time 이 안 된 연결에서 멈춘다.
+            # _acquire 는 락 없이 오른쪽에서 꺼내므로 확인과 꺼내기를 popleft 하나로 한다
+            while len(self._all_connections) - len(connections_to_close) > min_connections:
+                try:
+                    conn, idle_since = self._idle.popleft()
+                except IndexError:
+                    break
+                if idle_since >= cutoff:
+                    self._idle.appendleft((conn, idle_since))
+                    break
+                connections_to_close.append(conn)
         
         for conn in connections_to_close:
-            try:
-                # 풀에서 제거 시도 (사용 중이면 스킵)
-                temp_queue = Queue()
-                found = False
-                
-                while not self._pool.empty():
-                    try:
-                        pool_conn = self._pool.get_nowait()
-                        if pool_conn == conn:
-                            found = True
-                            break
-                        else:
-                            temp_queue.put(pool_conn)
-                    except Empty:
-                        break
-                
-                # 임시 큐의 연결들을 다시 풀에 넣기
-                while not temp_queue.empty():
-                    self._pool.put(temp_queue.get_nowait())
-                
-                if found:
-                    self._close_connection(conn)
-                    logger.debug("Closed idle connection")
-                    
-            except Exception as e:
-                logger.warning(f"Error cleaning up idle connection: {e}")
+            self._close_connection(conn)
+            logger.debug("Closed idle connection")
     
     def execute_query(self, query: str, params: tuple = (), fetch_one: bool = False, 
                       fetch_all: bool = True) -> Any:
         """쿼리 실행 헬퍼 메서드"""
         try:
-            with self.get_connection() as conn:
-                cursor = conn.cursor()
+            with self._query_connection() as conn:
+                # cursor 를 그대로 돌려주는 경우만 새로 만든다 (공유 cursor 는 다음 쿼리가 덮어쓴다)
+                returns_cursor = not (fetch_one or fetch_all)
+                cursor = conn.cursor() if returns_cursor else conn.shared_cursor
                 cursor.execute(query, params)
                 
                 if query.strip().upper().startswith(('INSERT', 'UPDATE', 'DELETE')):
-                    conn.commit()
+                    if not self._in_transaction():
+                        conn.commit()
                     return cursor.rowcount
                 elif fetch_one:
                     return cursor.fetchone()
@@ -253,10 +352,11 @@ class ConnectionPool:
     def execute_many(self, query: str, params_list: List[tuple]) -> int:
         """배치 쿼리 실행"""
         try:
-            with self.get_connection() as conn:
-                cursor = conn.cursor()
+            with self._query_connection() as conn:
+                cursor = conn.shared_cursor
                 cursor.executemany(query, params_list)
-                conn.commit()
+                if not self._in_transaction():
+                    conn.commit()
                 return cursor.rowcount
                 
         except Exception as e:
@@ -268,9 +368,9 @@ class ConnectionPool:
         with self._lock:
             return {
                 "total_connections": len(self._all_connections),
-                "pool_size": self._pool.qsize(),
+                "pool_size": len(self._idle),
                 "max_connections": self.max_connections,
-                "active_connections": len(self._all_connections) - self._pool.qsize(),
+                "active_connections": len(self._all_connections) - len(self._idle),
                 "db_path": self.db_path
             }
     
@@ -278,16 +378,9 @@ class ConnectionPool:
         """모든 연결 닫기"""
         self._shutdown = True
         
-        # 풀의 모든 연결 닫기
-        while not self._pool.empty():
-            try:
-                conn = self._pool.get_nowait()
-                self._close_connection(conn)
-            except Empty:
-                break
-        
-        # 나머지 연결들 닫기
+        # 나머지 연결들까지 모두 닫기
         with self._lock:
+            self._idle.clear()
             for conn in list(self._all_connections):
                 self._close_connection(conn)
         
@@ -5,35 +5,110 @@ import sqlite3
 import json
 import time
 import hashlib
-from typing import List, Dict, Any, Optional
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
 import logging
-from db_connection_pool import get_db_connection
+from db_connection_pool import get_connection_pool
 from performance_monitor import get_performance_monitor
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Fast non-cryptographic hashing for query cache keys
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# Search results kept in process, in front of the query_cache table. Entries hold the encoded
+# JSON and are decoded per hit, so callers never share (and mutate) the cached dicts
+SEARCH_CACHE_SIZE = 512
+
+# Columns the listing endpoints read (SELECT * would also fetch every file's text_content)
+_FILE_COLUMNS = "path, name, size, modified_time, metadata_json"
+# Search rows additionally report extraction state; text_content is reduced to a flag in SQL
+_SEARCH_COLUMNS = """f.path, f.name, f.size, f.modified_time, f.metadata_json,
+                           f.content_extracted, f.extraction_metadata,
+                           (f.text_content IS NOT NULL AND f.text_content != '') AS has_text_content"""
+# Indexes for the browse endpoints' WHERE ... ORDER BY ... LIMIT queries (the files table itself
+# is created by the indexer; modified_time alone is already covered by idx_files_modified)
+_BROWSE_INDEXES = (
+    # get_large_files (size > ? ORDER BY size), get_empty_files (size = 0 ORDER BY modified_time)
+    "CREATE INDEX IF NOT EXISTS idx_files_size_mtime ON files(size, modified_time)",
+    # search_by_extension
+    "CREATE INDEX IF NOT EXISTS idx_files_ext_mtime ON files(extension, modified_time)",
+    # search_by_category, search_korean_documents (must match the queries' expression exactly)
+    "CREATE INDEX IF NOT EXISTS idx_files_meta_category "
+    "ON files(json_extract(metadata_json, '$.category'), modified_time)",
+)
+
+
+def _json_decode(text: str) -> Any:
+    """json.loads via orjson when available"""
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.loads(text)
+        except ValueError:
+            pass  # NaN/Infinity, which orjson rejects
+    return json.loads(text)
+
+
+def _json_encode(obj: Any) -> str:
+    """Compact JSON text (orjson when available)"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+
+
+def _load_metadata(metadata_json: Optional[str]) -> Dict[str, Any]:
+    """Decode a metadata_json column ({} when empty)"""
+    return _json_decode(metadata_json) if metadata_json else {}
+
+
+def _tuple_cursor(conn: sqlite3.Connection) -> sqlite3.Cursor:
+    """Cursor returning plain tuples, for queries with a fixed column list
+    (pool connections default to dict rows)"""
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    return cursor
+
+
+def _query_hash(query: str, directories: Optional[List[str]], limit: int) -> str:
+    """Cache key for a search; '|' keeps e.g. ("a", ["b"]) and ("ab", None) apart"""
+    key = f"{query}|{directories}|{limit}".encode()
+    if XXHASH_AVAILABLE:
+        return xxhash.xxh3_64_hexdigest(key)
+    return hashlib.blake2b(key, digest_size=8).hexdigest()
+
+
 class DatabaseManager:
     def __init__(self, db_path: str, cache_ttl: int = 3600):
         self.db_path = db_path
         self.cache_ttl = cache_ttl  # Cache time-to-live in seconds
         self._setup_database()
+        # Shared pool: connections keep their PRAGMAs and a warm page cache across queries
+        self._pool = get_connection_pool(db_path)
+        # query_hash -> (expires_at, results JSON), least recently used first
+        self._search_cache: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._search_cache_lock = threading.Lock()
         
     def _get_connection(self):
         """Get optimized database connection"""
         conn = sqlite3.connect(self.db_path, timeout=30.0)
         conn.execute("PRAGMA journal_mode=WAL")
         conn.execute("PRAGMA synchronous=NORMAL")
-        conn.execute("PRAGMA cache_size=10000")
+        conn.execute("PRAGMA cache_size=-65536")  # 64MiB (negative = KiB)
         conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA mmap_size=268435456")  # 256MB: large scans read mapped pages instead of read()
         conn.execute("PRAGMA foreign_keys=ON")
-        # Use dictionary factory for consistent access
-        def dict_factory(cursor, row):
-            d = {}
-            for idx, col in enumerate(cursor.description):
-                d[col[0]] = row[idx]
-            return d
-        conn.row_factory = dict_factory
         return conn
         
     def _setup_database(self):
@@ -42,12 +117,51 @@ class DatabaseManager:
         try:
             # Enable WAL mode
             conn.execute("PRAGMA journal_mode=WAL")
+            
+            # Browse indexes, once the indexer has created the files table
+            if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'files'").fetchone():
+                for statement in _BROWSE_INDEXES:
+                    conn.execute(statement)
+                # Give the planner statistics the first time; afterwards only refresh when stale
+                if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone():
+                    conn.execute("PRAGMA optimize")
+                else:
+                    conn.execute("ANALYZE")
             conn.commit()
         except Exception as e:
             logger.warning(f"Database setup warning: {e}")
         finally:
             conn.close()
         
+    def _get_cached_search(self, query_hash: str) -> Optional[List[Dict[str, Any]]]:
+        """Unexpired results from the in-process search cache (a fresh copy), or None"""
+        with self._search_cache_lock:
+            entry = self._search_cache.get(query_hash)
+            if entry is None:
+                return None
+            expires_at, payload = entry
+            if expires_at <= time.time():
+                del self._search_cache[query_hash]
+                return None
+            self._search_cache.move_to_end(query_hash)
+        return _json_decode(payload)
+    
+    def _cache_search(self, query_hash: str, payload: str, expires_at: float):
+        """Remember encoded results in process, evicting the least recently used entry"""
+        with self._search_cache_lock:
+            self._search_cache[query_hash] = (expires_at, payload)
+            self._search_cache.move_to_end(query_hash)
+            if len(self._search_cache) > SEARCH_CACHE_SIZE:
+                self._search_cache.popitem(last=False)
+    
+    def clear_cache(self):
+        """Drop cached search results (in process and in the query_cache table)"""
+        with self._search_cache_lock:
+            self._search_cache.clear()
+        with self._pool.get_connection() as conn:
+            conn.execute("DELETE FROM query_cache")
+            conn.commit()
+    
     def _escape_fts_query(self, query: str) -> str:
         """Escape special characters for FTS5 queries"""
         # Replace special FTS5 characters with quoted versions
@@ -67,23 +181,28 @@ class DatabaseManager:
         start_time = time.time()
         
         try:
-            with get_db_connection(self.db_path) as conn:
+            # Check cache first: in process, then the shared query_cache table
+            query_hash = _query_hash(query, directories, limit)
+            results = self._get_cached_search(query_hash)
+            if results is not None:
+                logger.info(f"Cache hit for query: {query}")
+                return results
+            
+            with self._pool.get_connection() as conn:
                 cursor = conn.cursor()
                 
                 monitor.increment_counter("db_queries")
                 
-                # Check cache first
-                query_hash = hashlib.md5(f"{query}{directories}{limit}".encode()).hexdigest()
-                
                 cursor.execute("""
-                    SELECT results FROM query_cache 
+                    SELECT results, expires_at FROM query_cache 
                     WHERE query_hash = ? AND expires_at > ?
                 """, (query_hash, time.time()))
                 
                 cached = cursor.fetchone()
                 if cached:
                     logger.info(f"Cache hit for query: {query}")
-                    return json.loads(cached['results'])
+                    self._cache_search(query_hash, cached['results'], cached['expires_at'])
+                    return _json_decode(cached['results'])
                 
                 # Build search query
                 sql_parts = []
@@ -93,8 +212,8 @@ class DatabaseManager:
                 if query:
                     # Escape special characters for FTS5
                     escaped_query = self._escape_fts_query(query)
-                    sql_parts.append("""
-                        SELECT f.*, 
+                    sql_parts.append(f"""
+                        SELECT {_SEARCH_COLUMNS},
                                highlight(files_fts, 0, '<mark>', '</mark>') as highlighted_name,
                                highlight(files_fts, 1, '<mark>', '</mark>') as highlighted_path,
                                highlight(files_fts, 2, '<mark>', '</mark>') as highlighted_content,
@@ -106,13 +225,13 @@ class DatabaseManager:
                     """)
                     params.append(escaped_query)
                 else:
-                    sql_parts.append("SELECT * FROM files f WHERE 1=1")
+                    sql_parts.append(f"SELECT {_SEARCH_COLUMNS} FROM files f WHERE 1=1")
                 
-                # Filter by directories
+                # Filter by directories (one JSON array parameter, so the SQL text - and the
+                # connection's cached prepared statement - doesn't change with the list length)
                 if directories:
-                    placeholders = ','.join(['?' for _ in directories])
-                    sql_parts.append(f"AND f.path IN ({placeholders})")
-                    params.extend(directories)
+                    sql_parts.append("AND f.path IN (SELECT value FROM json_each(?))")
+                    params.append(json.dumps(directories))
                 
                 # Add ordering and limit
                 if query:
@@ -121,23 +240,24 @@ class DatabaseManager:
                 else:
                     # Order by modification time when browsing
                     sql_parts.append("ORDER BY f.modified_time DESC")
-                sql_parts.append(f"LIMIT {limit}")
+                sql_parts.append("LIMIT ?")
+                params.append(limit)
                 
                 # Execute search
                 sql = ' '.join(sql_parts)
                 cursor.execute(sql, params)
                 
                 results = []
-                for row in cursor.fetchall():
+                for row in cursor:
                     result = {
                         'path': row['path'],
                         'name': row['name'],
                         'size': row['size'],
                         'modified_time': row['modified_time'],
                         'modified': row['modified_time'],  # Keep for compatibility
-                        'metadata': json.loads(row['metadata_json']) if row['metadata_json'] else {},
-                        'content_extracted': bool(row.get('content_extracted', False)),
-                        'has_text_content': bool(row.get('text_content')),
+                        'metadata': _load_metadata(row['metadata_json']),
+                        'content_extracted': bool(row['content_extracted']),
+                        'has_text_content': bool(row['has_text_content']),
                         'score': 1.0  # Default score
                     }
                     
@@ -177,6 +297,8 @@ class DatabaseManager:
                 
                 # Cache results only if we found something
                 if results:
+                    expires_at = time.time() + self.cache_ttl
+                    payload = _json_encode(results)
                     cursor.execute("""
                         INSERT OR REPLACE INTO query_cache 
                         (query_hash, query, results, created_at, expires_at)
@@ -184,10 +306,11 @@ class DatabaseManager:
                     """, (
                         query_hash,
                         query,
-                        json.dumps(results),
+                        payload,
                         time.time(),
-                        time.time() + self.cache_ttl
+                        expires_at
                     ))
+                    self._cache_search(query_hash, payload, expires_at)
                 
                 conn.commit()
                 return results
@@ -198,46 +321,47 @@ class DatabaseManager:
             
     def get_file_by_path(self, file_path: str) -> Optional[Dict[str, Any]]:
         """Get file information by path"""
-        with get_db_connection(self.db_path) as conn:
-            cursor = conn.cursor()
+        with self._pool.get_connection() as conn:
+            cursor = _tuple_cursor(conn)
             
-            cursor.execute("""
-                SELECT * FROM files WHERE path = ?
+            cursor.execute(f"""
+                SELECT {_FILE_COLUMNS}, indexed_at FROM files WHERE path = ?
             """, (file_path,))
             
             row = cursor.fetchone()
             if row:
+                path, name, size, modified_time, metadata_json, indexed_at = row
                 return {
-                    'path': row['path'],
-                    'name': row['name'],
-                    'size': row['size'],
-                    'modified': row['modified_time'],
-                    'metadata': json.loads(row['metadata_json']) if row['metadata_json'] else {},
-                    'indexed_at': row['indexed_at']
+                    'path': path,
+                    'name': name,
+                    'size': size,
+                    'modified': modified_time,
+                    'metadata': _load_metadata(metadata_json),
+                    'indexed_at': indexed_at
                 }
             return None
             
             
     def search_by_category(self, category: str, limit: int = 50) -> List[Dict[str, Any]]:
         """Search files by category"""
-        with get_db_connection(self.db_path) as conn:
-            cursor = conn.cursor()
+        with self._pool.get_connection() as conn:
+            cursor = _tuple_cursor(conn)
             
-            cursor.execute("""
-                SELECT * FROM files 
+            cursor.execute(f"""
+                SELECT {_FILE_COLUMNS} FROM files 
                 WHERE json_extract(metadata_json, '$.category') = ?
                 ORDER BY modified_time DESC
                 LIMIT ?
             """, (category, limit))
             
             results = []
-            for row in cursor.fetchall():
+            for path, name, size, modified_time, metadata_json in cursor:
                 results.append({
-                    'path': row['path'],
-                    'name': row['name'],
-                    'size': row['size'],
-                    'modified': row['modified_time'],
-                    'metadata': json.loads(row['metadata_json']) if row['metadata_json'] else {}
+                    'path': path,
+                    'name': name,
+                    'size': size,
+                    'modified': modified_time,
+                    'metadata': _load_metadata(metadata_json)
                 })
                 
             return results
@@ -245,25 +369,24 @@ class DatabaseManager:
             
     def search_by_extension(self, extensions: List[str], limit: int = 50) -> List[Dict[str, Any]]:
         """Search files by extension"""
-        with get_db_connection(self.db_path) as conn:
-            cursor = conn.cursor()
+        with self._pool.get_connection() as conn:
+            cursor = _tuple_cursor(conn)
             
-            placeholders = ','.join(['?' for _ in extensions])
             cursor.execute(f"""
-                SELECT * FROM files 
-                WHERE extension IN ({placeholders})
+                SELECT {_FILE_COLUMNS} FROM files 
+                WHERE extension IN (SELECT value FROM json_each(?))
                 ORDER BY modified_time DESC
                 LIMIT ?
-            """, extensions + [limit])
+            """, (json.dumps(extensions), limit))
             
             results = []
-            for row in cursor.fetchall():
+            for path, name, size, modified_time, metadata_json in cursor:
                 results.append({
-                    'path': row['path'],
-                    'name': row['name'],
-                    'size': row['size'],
-                    'modified': row['modified_time'],
-                    'metadata': json.loads(row['metadata_json']) if row['metadata_json'] else {}
+                    'path': path,
+                    'name': name,
+                    'size': size,
+                    'modified': modified_time,
+                    'metadata': _load_metadata(metadata_json)
                 })
                 
             return results
@@ -271,26 +394,26 @@ class DatabaseManager:
             
     def get_recent_files(self, hours: int = 24, limit: int = 50) -> List[Dict[str, Any]]:
         """Get recently modified files"""
-        with get_db_connection(self.db_path) as conn:
-            cursor = conn.cursor()
+        with self._pool.get_connection() as conn:
+            cursor = _tuple_cursor(conn)
             
             since = time.time() - (hours * 3600)
             
-            cursor.execute("""
-                SELECT * FROM files 
+            cursor.execute(f"""
+                SELECT {_FILE_COLUMNS} FROM files 
                 WHERE modified_time > ?
                 ORDER BY modified_time DESC
                 LIMIT ?
             """, (since, limit))
             
             results = []
-            for row in cursor.fetchall():
+            for path, name, size, modified_time, metadata_json in cursor:
                 results.append({
-                    'path': row['path'],
-                    'name': row['name'],
-                    'size': row['size'],
-                    'modified': row['modified_time'],
-                    'metadata': json.loads(row['metadata_json']) if row['metadata_json'] else {}
+                    'path': path,
+                    'name': name,
+                    'size': size,
+                    'modified': modified_time,
+                    'metadata': _load_metadata(metadata_json)
                 })
                 
             return results
@@ -298,15 +421,13 @@ class DatabaseManager:
             
     def get_stats(self) -> Dict[str, Any]:
         """Get database statistics"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        try:
+        with self._pool.get_connection() as conn:
+            cursor = conn.cursor()
             stats = {}
             
             # Total files
-            cursor.execute("SELECT COUNT(*) FROM files")
-            stats["total_files"] = cursor.fetchone()[0]
+            cursor.execute("SELECT COUNT(*) AS count FROM files")
+            stats["total_files"] = cursor.fetchone()['count']
             
             # By category
             cursor.execute("""
@@ -319,28 +440,27 @@ class DatabaseManager:
             """)
             
             stats["by_category"] = {}
-            for row in cursor.fetchall():
-                stats["by_category"][row[0]] = {
-                    "count": row[1],
-                    "size_gb": round(row[2] / (1024**3), 2) if row[2] else 0
+            for row in cursor:
+                stats["by_category"][row['category']] = {
+                    "count": row['count'],
+                    "size_gb": round(row['total_size'] / (1024**3), 2) if row['total_size'] else 0
                 }
                 
             # Cache stats
-            cursor.execute("SELECT COUNT(*) FROM query_cache WHERE expires_at > ?", (time.time(),))
-            stats["active_cache_entries"] = cursor.fetchone()[0]
+            cursor.execute("SELECT COUNT(*) AS count FROM query_cache WHERE expires_at > ?", (time.time(),))
+            stats["active_cache_entries"] = cursor.fetchone()['count']
             
             return stats
-            
-        finally:
-            conn.close()
     
     def find_duplicates(self) -> List[Dict[str, Any]]:
         """Find duplicate files based on size and name"""
-        with get_db_connection(self.db_path) as conn:
-            cursor = conn.cursor()
+        with self._pool.get_connection() as conn:
+            cursor = _tuple_cursor(conn)
             
+            # Paths are joined with the ASCII unit separator (U+001F), which file names don't
+            # contain, so paths with commas split correctly
             cursor.execute("""
-                SELECT name, size, COUNT(*) as count, GROUP_CONCAT(path) as paths
+                SELECT name, size, COUNT(*) as count, GROUP_CONCAT(path, char(31)) as paths
                 FROM files 
                 WHERE size > 0
                 GROUP BY name, size
@@ -349,14 +469,13 @@ class DatabaseManager:
             """)
             
             duplicates = []
-            for row in cursor.fetchall():
-                paths = row['paths'].split(',')
+            for name, size, count, paths in cursor:
                 duplicates.append({
-                    'name': row['name'],
-                    'size': row['size'],
-                    'count': row['count'],
-                    'paths': paths,
-                    'potential_savings': row['size'] * (row['count'] - 1)
+                    'name': name,
+                    'size': size,
+                    'count': count,
+                    'paths': paths.split('\x1f'),
+                    'potential_savings': size * (count - 1)
                 })
             
             return duplicates
@@ -364,26 +483,26 @@ class DatabaseManager:
     
     def get_large_files(self, min_size_mb: int = 100) -> List[Dict[str, Any]]:
         """Get files larger than specified size"""
-        with get_db_connection(self.db_path) as conn:
-            cursor = conn.cursor()
+        with self._pool.get_connection() as conn:
+            cursor = _tuple_cursor(conn)
             
             min_size_bytes = min_size_mb * 1024 * 1024
-            cursor.execute("""
-                SELECT * FROM files 
+            cursor.execute(f"""
+                SELECT {_FILE_COLUMNS} FROM files 
                 WHERE size > ?
                 ORDER BY size DESC
                 LIMIT 100
             """, (min_size_bytes,))
             
             results = []
-            for row in cursor.fetchall():
+            for path, name, size, modified_time, metadata_json in cursor:
                 results.append({
-                    'path': row['path'],
-                    'name': row['name'],
-                    'size': row['size'],
-                    'size_mb': round(row['size'] / (1024*1024), 2),
-                    'modified': row['modified_time'],
-                    'metadata': json.loads(row['metadata_json']) if row['metadata_json'] else {}
+                    'path': path,
+                    'name': name,
+                    'size': size,
+                    'size_mb': round(size / (1024*1024), 2),
+                    'modified': modified_time,
+                    'metadata': _load_metadata(metadata_json)
                 })
             
             return results
@@ -391,40 +510,40 @@ class DatabaseManager:
     
     def get_old_files(self, days: int = 365) -> List[Dict[str, Any]]:
         """Get files older than specified days"""
-        with get_db_connection(self.db_path) as conn:
-            cursor = conn.cursor()
+        with self._pool.get_connection() as conn:
+            cursor = _tuple_cursor(conn)
             
             cutoff_time = time.time() - (days * 24 * 3600)
-            cursor.execute("""
-                SELECT * FROM files 
+            cursor.execute(f"""
+                SELECT {_FILE_COLUMNS} FROM files 
                 WHERE modified_time < ?
                 ORDER BY modified_time ASC
                 LIMIT 100
             """, (cutoff_time,))
             
             results = []
-            for row in cursor.fetchall():
+            for path, name, size, modified_time, metadata_json in cursor:
                 results.append({
-                    'path': row['path'],
-                    'name': row['name'],
-                    'size': row['size'],
-                    'modified': row['modified_time'],
-                    'days_old': int((time.time() - row['modified_time']) / (24 * 3600)),
-                    'metadata': json.loads(row['metadata_json']) if row['metadata_json'] else {}
+                    'path': path,
+                    'name': name,
+                    'size': size,
+                    'modified': modified_time,
+                    'days_old': int((time.time() - modified_time) / (24 * 3600)),
+                    'metadata': _load_metadata(metadata_json)
                 })
             
             return results
     
     def search_korean_documents(self, query: str = "", limit: int = 50) -> List[Dict[str, Any]]:
         """Search specifically Korean documents (HWP/HWPX files) with content support"""
-        with get_db_connection(self.db_path) as conn:
+        with self._pool.get_connection() as conn:
             cursor = conn.cursor()
             
             if query:
                 # Text-based search in Korean documents
                 escaped_query = self._escape_fts_query(query)
-                cursor.execute("""
-                    SELECT f.*, 
+                cursor.execute(f"""
+                    SELECT {_SEARCH_COLUMNS},
                            highlight(files_fts, 0, '<mark>', '</mark>') as highlighted_name,
                            highlight(files_fts, 2, '<mark>', '</mark>') as highlighted_content,
                            snippet(files_fts, 2, '<mark>', '</mark>', '...', 50) as content_snippet,
@@ -438,24 +557,24 @@ class DatabaseManager:
                 """, (escaped_query, limit))
             else:
                 # Browse all Korean documents
-                cursor.execute("""
-                    SELECT * FROM files 
+                cursor.execute(f"""
+                    SELECT {_SEARCH_COLUMNS} FROM files f
                     WHERE json_extract(metadata_json, '$.category') = 'korean_document'
                     ORDER BY modified_time DESC 
                     LIMIT ?
                 """, (limit,))
             
             results = []
-            for row in cursor.fetchall():
+            for row in cursor:
                 result = {
                     'path': row['path'],
                     'name': row['name'],
                     'size': row['size'],
                     'modified_time': row['modified_time'],
                     'modified': row['modified_time'],
-                    'metadata': json.loads(row['metadata_json']) if row['metadata_json'] else {},
-                    'content_extracted': bool(row['content_extracted'] if 'content_extracted' in row.keys() else False),
-                    'has_text_content': bool(row['text_content'] if 'text_content' in row.keys() else False),
+                    'metadata': _load_metadata(row['metadata_json']),
+                    'content_extracted': bool(row['content_extracted']),
+                    'has_text_content': bool(row['has_text_content']),
                     'category': 'korean_document',
                     'score': 1.0
                 }
@@ -478,42 +597,43 @@ class DatabaseManager:
     
     def get_temp_files(self) -> List[Dict[str, Any]]:
         """Get temporary files that can be cleaned up"""
-        with get_db_connection(self.db_path) as conn:
-            cursor = conn.cursor()
+        with self._pool.get_connection() as conn:
+            cursor = _tuple_cursor(conn)
             
-            temp_patterns = ['%.tmp', '%.temp', '%~$%', '%.bak', '%.old', '%.log']
+            temp_extensions = ['.tmp', '.temp', '.bak', '.old', '.log']
             temp_dirs = ['%/tmp/%', '%/temp/%', '%/.cache/%', '%/Downloads/%']
             
-            conditions = []
-            params = []
-            
-            # Add pattern conditions
-            for pattern in temp_patterns:
-                conditions.append("name LIKE ?")
-                params.append(pattern)
-            
-            # Add directory conditions
-            for dir_pattern in temp_dirs:
-                conditions.append("path LIKE ?")
-                params.append(dir_pattern)
-            
+            # One indexed lookup per kind of match instead of a single OR of leading-wildcard
+            # LIKEs over the whole table:
+            # - extension IN (...) uses idx_files_extension (extension is stored lowercased)
+            # - "~$" anywhere in the name (Office lock files) and the directory patterns still
+            #   need LIKE, but only scan idx_files_name / the path index, not the rows
+            # UNION drops files that match more than one branch; path breaks size ties so the
+            # top 100 is stable.
+            dir_conditions = ' OR '.join('path LIKE ?' for _ in temp_dirs)
             sql = f"""
-                SELECT * FROM files 
-                WHERE ({' OR '.join(conditions)})
-                ORDER BY size DESC
+                SELECT {_FILE_COLUMNS} FROM files
+                WHERE id IN (
+                    SELECT id FROM files WHERE extension IN (SELECT value FROM json_each(?))
+                    UNION
+                    SELECT id FROM files WHERE name LIKE '%~$%'
+                    UNION
+                    SELECT id FROM files WHERE {dir_conditions}
+                )
+                ORDER BY size DESC, path
                 LIMIT 100
             """
             
-            cursor.execute(sql, params)
+            cursor.execute(sql, [json.dumps(temp_extensions)] + temp_dirs)
             
             results = []
-            for row in cursor.fetchall():
+            for path, name, size, modified_time, metadata_json in cursor:
                 results.append({
-                    'path': row['path'],
-                    'name': row['name'],
-                    'size': row['size'],
-                    'modified': row['modified_time'],
-                    'metadata': json.loads(row['metadata_json']) if row['metadata_json'] else {}
+                    'path': path,
+                    'name': name,
+                    'size': size,
+                    'modified': modified_time,
+                    'metadata': _load_metadata(metadata_json)
                 })
             
             return results
@@ -521,24 +641,24 @@ class DatabaseManager:
     
     def get_empty_files(self) -> List[Dict[str, Any]]:
         """Get empty files (0 bytes)"""
-        with get_db_connection(self.db_path) as conn:
-            cursor = conn.cursor()
+        with self._pool.get_connection() as conn:
+            cursor = _tuple_cursor(conn)
             
-            cursor.execute("""
-                SELECT * FROM files 
+            cursor.execute(f"""
+                SELECT {_FILE_COLUMNS} FROM files 
                 WHERE size = 0
                 ORDER BY modified_time DESC
                 LIMIT 100
             """)
             
             results = []
-            for row in cursor.fetchall():
+            for path, name, size, modified_time, metadata_json in cursor:
                 results.append({
-                    'path': row['path'],
-                    'name': row['name'],
-                    'size': row['size'],
-                    'modified': row['modified_time'],
-                    'metadata': json.loads(row['metadata_json']) if row['metadata_json'] else {}
+                    'path': path,
+                    'name': name,
+                    'size': size,
+                    'modified': modified_time,
+                    'metadata': _load_metadata(metadata_json)
                 })
             
             return results
\ No newline at end of file
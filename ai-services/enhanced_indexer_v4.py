@@ -19,13 +19,15 @@ import numpy as np
 # Import enhanced processors
 from content_extractor import ContentExtractor
 from multimedia_processor import MultimediaProcessor
+from db_connection_pool import get_connection_pool
 
 # Conditional imports for AI services
 try:
-    from ai_vision_service import AIVisionService
+    from ai_vision_service import AIVisionService, get_ai_vision_service
     AI_VISION_AVAILABLE = True
 except ImportError:
     AIVisionService = None
+    get_ai_vision_service = None
     AI_VISION_AVAILABLE = False
 
 try:
@@ -39,6 +41,9 @@ except ImportError:
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Files extracted and written per transaction by index_directory
+INDEX_BATCH_SIZE = 64
+
 
 class EnhancedFileIndexer:
     """
@@ -58,6 +63,8 @@ class EnhancedFileIndexer:
         
         # Initialize content processors
         self.content_extractor = ContentExtractor()  # For text files
+        # Fork the batch extraction workers before AI models are loaded and threads started
+        self.content_extractor.start_workers()
         self.multimedia_processor = MultimediaProcessor(
             enable_ai_vision=enable_ai_vision,
             enable_stt=enable_stt,
@@ -70,7 +77,7 @@ class EnhancedFileIndexer:
         
         if enable_ai_vision and AI_VISION_AVAILABLE:
             try:
-                self.ai_vision = AIVisionService(cache_dir=metadata_path)
+                self.ai_vision = get_ai_vision_service(cache_dir=metadata_path)
                 logger.info("✅ AI Vision service initialized")
             except Exception as e:
                 logger.warning(f"⚠️ AI Vision service failed to initialize: {e}")
@@ -103,6 +110,7 @@ class EnhancedFileIndexer:
         
         # Initialize database
         self._init_database()
+        self._pool = get_connection_pool(db_path)
         
         # File type categories with multimedia support
         self.file_categories = {
@@ -278,170 +286,302 @@ class EnhancedFileIndexer:
             return False
         
         try:
-            # Extract basic metadata
-            metadata = self._extract_metadata(file_path)
+            entry = self._prepare_file(file_path)
+            if entry is None:
+                return True  # Skip processing
             
-            # Determine category and media type
-            category, media_type = self.determine_file_category(file_path)
-            metadata["category"] = category
-            metadata["media_type"] = media_type
+            record = self._process_file(entry)
             
-            # Calculate content hash
-            content_hash = self._calculate_file_hash(str(file_path))
+            # The files row and its AI analysis cache entry are committed together
+            with self._pool.transaction() as conn:
+                self._write_record(conn.cursor(), record)
             
-            # Check if file already indexed and unchanged
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            logger.debug(f"✅ File indexed: {file_path.name} ({entry['category']}/{entry['media_type']})")
+            return True
             
-            cursor.execute(
-                "SELECT content_hash, last_analyzed FROM files WHERE path = ?",
-                (str(file_path),)
-            )
-            existing = cursor.fetchone()
+        except Exception as e:
+            logger.error(f"Error indexing file {file_path}: {e}")
+            return False
+    
+    def _index_batch(self, file_paths: List[Path]) -> List[bool]:
+        """
+        Index several files, writing all of their records in one transaction
+        
+        Returns:
+            list of per-file success flags in the order of file_paths
+        """
+        results = [False] * len(file_paths)
+        entries = []  # (index, entry)
+        for index, file_path in enumerate(file_paths):
+            try:
+                entry = self._prepare_file(file_path)
+            except Exception as e:
+                logger.error(f"Error indexing file {file_path}: {e}")
+                continue
+            if entry is None:
+                results[index] = True  # Unchanged, skip processing
+            else:
+                entries.append((index, entry))
+        
+        # Text files are extracted together across the content extractor's process pool
+        text_entries = [entry for _, entry in entries if entry["media_type"] == "text"]
+        extracted: Dict[Path, tuple] = {}
+        if text_entries:
+            try:
+                text_results = self.content_extractor.extract_many([entry["file_path"] for entry in text_entries])
+                extracted.update(zip((entry["file_path"] for entry in text_entries), text_results))
+            except Exception as e:
+                logger.warning(f"Batch text extraction failed, extracting files one by one: {e}")
+        
+        # Multimedia files too: audio files share the audio processor's decode/STT pipeline
+        media_entries = [entry for _, entry in entries if entry["media_type"] == "multimedia"]
+        if media_entries:
+            try:
+                media_results = self.multimedia_processor.batch_extract_content(
+                    [str(entry["file_path"]) for entry in media_entries]
+                )
+                extracted.update(zip((entry["file_path"] for entry in media_entries), media_results))
+            except Exception as e:
+                logger.warning(f"Batch multimedia processing failed, processing files one by one: {e}")
+        
+        # Images get AI analysis in one call, which encodes the batch with CLIP at once
+        analyzed: Dict[Path, tuple] = {}
+        image_entries = [entry for _, entry in entries if entry["category"] == "image"] if self.ai_vision else []
+        if image_entries:
+            try:
+                vision_results = self.ai_vision.analyze_images([str(entry["file_path"]) for entry in image_entries])
+                analyzed.update(zip((entry["file_path"] for entry in image_entries), vision_results))
+            except Exception as e:
+                logger.warning(f"Batch AI vision analysis failed, analyzing images one by one: {e}")
+        
+        records = []  # (index, record)
+        for index, entry in entries:
+            try:
+                file_path = entry["file_path"]
+                records.append((index, self._process_file(entry, extracted.get(file_path), analyzed.get(file_path))))
+            except Exception as e:
+                logger.error(f"Error indexing file {entry['file_path']}: {e}")
+        
+        if not records:
+            return results
+        
+        # One BEGIN IMMEDIATE ... COMMIT (one WAL sync) for the whole batch instead of one per file.
+        # A failed row only loses its own statement; a failed commit loses the batch.
+        written = []
+        try:
+            with self._pool.transaction() as conn:
+                cursor = conn.cursor()
+                for index, record in records:
+                    try:
+                        self._write_record(cursor, record)
+                        written.append(index)
+                    except sqlite3.Error as e:
+                        logger.error(f"Error indexing file {record['file_path']}: {e}")
+        except Exception as e:
+            logger.error(f"Error writing index batch: {e}")
+            return results
+        
+        for index in written:
+            results[index] = True
+        return results
+    
+    def _prepare_file(self, file_path: Path) -> Optional[Dict[str, Any]]:
+        """Metadata, category and content hash of a file, or None if it is indexed, unchanged and recently analyzed"""
+        # Extract basic metadata
+        metadata = self._extract_metadata(file_path)
+        
+        # Determine category and media type
+        category, media_type = self.determine_file_category(file_path)
+        metadata["category"] = category
+        metadata["media_type"] = media_type
+        
+        # Calculate content hash
+        content_hash = self._calculate_file_hash(str(file_path))
+        
+        # Check if file already indexed and unchanged
+        existing = self._pool.execute_query(
+            "SELECT content_hash, last_analyzed FROM files WHERE path = ?",
+            (str(file_path),),
+            fetch_one=True
+        )
+        
+        if existing and existing["content_hash"] == content_hash:
+            # File unchanged, skip unless it needs AI analysis
+            last_analyzed = existing["last_analyzed"] or 0
+            needs_ai_analysis = (time.time() - last_analyzed) > 86400  # 24 hours
             
-            if existing and existing[0] == content_hash:
-                # File unchanged, skip unless it needs AI analysis
-                last_analyzed = existing[1] or 0
-                needs_ai_analysis = (time.time() - last_analyzed) > 86400  # 24 hours
-                
-                if not needs_ai_analysis:
-                    conn.close()
-                    return True  # Skip processing
-            
-            # Initialize content fields
-            text_content = ""
-            multimedia_content = ""
-            ai_analysis = ""
-            thumbnail_path = ""
-            processing_status = {"status": "pending", "steps": []}
-            
-            content_extracted = False
-            extraction_metadata = {}
-            multimedia_metadata = {}
-            ai_analysis_data = {}
-            
-            # Process based on media type
-            if media_type == "text":
-                # Use content_extractor for text files
-                processing_status["steps"].append("text_extraction")
-                
-                try:
-                    text, success, extract_meta = self.content_extractor.extract_content(str(file_path))
-                    if success and text:
-                        text_content = text
-                        content_extracted = True
-                        extraction_metadata = extract_meta
-                        processing_status["steps"].append("text_extraction_success")
-                    else:
-                        processing_status["steps"].append("text_extraction_failed")
-                        extraction_metadata = extract_meta
-                except Exception as e:
-                    logger.warning(f"Text extraction error for {file_path}: {e}")
-                    processing_status["steps"].append(f"text_extraction_error: {str(e)}")
+            if not needs_ai_analysis:
+                return None
+        
+        return {
+            "file_path": file_path,
+            "metadata": metadata,
+            "category": category,
+            "media_type": media_type,
+            "content_hash": content_hash
+        }
+    
+    def _process_file(self, entry: Dict[str, Any], extracted: Optional[tuple] = None,
+                      analyzed: Optional[tuple] = None) -> Dict[str, Any]:
+        """
+        Extract the content of a prepared file and build its files record
+        
+        extracted: (text, success, metadata) already extracted for this file by a batch call, if any
+        analyzed: (description, confidence, metadata) from a batch AI vision call, if any
+        """
+        file_path = entry["file_path"]
+        category = entry["category"]
+        media_type = entry["media_type"]
+        
+        # Initialize content fields
+        text_content = ""
+        multimedia_content = ""
+        ai_analysis = ""
+        thumbnail_path = ""
+        processing_status = {"status": "pending", "steps": []}
+        
+        content_extracted = False
+        extraction_metadata = {}
+        multimedia_metadata = {}
+        ai_analysis_data = {}
+        
+        # Process based on media type
+        if media_type == "text":
+            # Use content_extractor for text files
+            processing_status["steps"].append("text_extraction")
+            
+            try:
+                if extracted is None:
+                    extracted = self.content_extractor.extract_content(str(file_path))
+                text, success, extract_meta = extracted
+                if success and text:
+                    text_content = text
+                    content_extracted = True
+                    extraction_metadata = extract_meta
+                    processing_status["steps"].append("text_extraction_success")
+                else:
+                    processing_status["steps"].append("text_extraction_failed")
+                    extraction_metadata = extract_meta
+            except Exception as e:
+                logger.warning(f"Text extraction error for {file_path}: {e}")
+                processing_status["steps"].append(f"text_extraction_error: {str(e)}")
+        
+        elif media_type == "multimedia":
+            # Use multimedia_processor for multimedia files
+            processing_status["steps"].append("multimedia_processing")
+            
+            try:
+                if extracted is None:
+                    extracted = self.multimedia_processor.extract_content(str(file_path))
+                mm_text, mm_success, mm_meta = extracted
+                if mm_success:
+                    multimedia_content = mm_text
+                    multimedia_metadata = mm_meta
+                    content_extracted = True
+                    processing_status["steps"].append("multimedia_processing_success")
+                    
+                    # Extract thumbnail path if available
+                    if "thumbnail_path" in mm_meta:
+                        thumbnail_path = mm_meta["thumbnail_path"]
+                    elif "thumbnail_paths" in mm_meta and mm_meta["thumbnail_paths"]:
+                        thumbnail_path = mm_meta["thumbnail_paths"][0]  # First thumbnail
+                    
+                else:
+                    processing_status["steps"].append("multimedia_processing_failed")
+                    multimedia_metadata = mm_meta
+                    
+            except Exception as e:
+                logger.warning(f"Multimedia processing error for {file_path}: {e}")
+                processing_status["steps"].append(f"multimedia_processing_error: {str(e)}")
             
-            elif media_type == "multimedia":
-                # Use multimedia_processor for multimedia files
-                processing_status["steps"].append("multimedia_processing")
+            # Additional AI analysis for images
+            if category == "image" and self.ai_vision:
+                processing_status["steps"].append("ai_vision_analysis")
                 
                 try:
-                    mm_text, mm_success, mm_meta = self.multimedia_processor.extract_content(str(file_path))
-                    if mm_success:
-                        multimedia_content = mm_text
-                        multimedia_metadata = mm_meta
-                        content_extracted = True
-                        processing_status["steps"].append("multimedia_processing_success")
-                        
-                        # Extract thumbnail path if available
-                        if "thumbnail_path" in mm_meta:
-                            thumbnail_path = mm_meta["thumbnail_path"]
-                        elif "thumbnail_paths" in mm_meta and mm_meta["thumbnail_paths"]:
-                            thumbnail_path = mm_meta["thumbnail_paths"][0]  # First thumbnail
-                        
+                    if analyzed is None:
+                        analyzed = self.ai_vision.analyze_image(str(file_path))
+                    ai_desc, ai_conf, ai_meta = analyzed
+                    if ai_desc:
+                        ai_analysis = ai_desc
+                        ai_analysis_data = {
+                            "description": ai_desc,
+                            "confidence": ai_conf,
+                            "analysis_metadata": ai_meta
+                        }
+                        processing_status["steps"].append("ai_vision_success")
                     else:
-                        processing_status["steps"].append("multimedia_processing_failed")
-                        multimedia_metadata = mm_meta
-                        
+                        processing_status["steps"].append("ai_vision_failed")
                 except Exception as e:
-                    logger.warning(f"Multimedia processing error for {file_path}: {e}")
-                    processing_status["steps"].append(f"multimedia_processing_error: {str(e)}")
-                
-                # Additional AI analysis for images
-                if category == "image" and self.ai_vision:
-                    processing_status["steps"].append("ai_vision_analysis")
-                    
-                    try:
-                        ai_desc, ai_conf, ai_meta = self.ai_vision.analyze_image(str(file_path))
-                        if ai_desc:
-                            ai_analysis = ai_desc
-                            ai_analysis_data = {
-                                "description": ai_desc,
-                                "confidence": ai_conf,
-                                "analysis_metadata": ai_meta
-                            }
-                            processing_status["steps"].append("ai_vision_success")
-                        else:
-                            processing_status["steps"].append("ai_vision_failed")
-                    except Exception as e:
-                        logger.warning(f"AI vision analysis error for {file_path}: {e}")
-                        processing_status["steps"].append(f"ai_vision_error: {str(e)}")
-            
-            # Combine all text content for FTS
-            combined_text_content = ""
-            if text_content.strip():
-                combined_text_content = text_content
-            if multimedia_content.strip():
-                combined_text_content = multimedia_content if not combined_text_content else f"{combined_text_content}\n\n{multimedia_content}"
-            
-            # Update processing status
-            processing_status["status"] = "completed"
-            processing_status["completed_at"] = time.time()
-            
-            # Insert or update file record
-            current_time = time.time()
-            
-            cursor.execute('''
-                INSERT OR REPLACE INTO files 
-                (path, name, extension, size, modified_time, content_hash,
-                 text_content, multimedia_content, ai_analysis,
-                 content_extracted, extraction_metadata, multimedia_metadata,
-                 thumbnail_path, processing_status, media_type, category,
-                 metadata_json, indexed_at, last_analyzed)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                str(file_path),
-                metadata["name"],
-                metadata["extension"],
-                metadata["size"],
-                metadata["modified"],
-                content_hash,
-                combined_text_content,  # Combined for FTS
-                multimedia_content,
-                ai_analysis,
-                content_extracted,
-                json.dumps(extraction_metadata),
-                json.dumps(multimedia_metadata),
-                thumbnail_path,
-                json.dumps(processing_status),
-                media_type,
-                category,
-                json.dumps(metadata),
-                current_time,
-                current_time
-            ))
-            
-            # Cache AI analysis if available
-            if ai_analysis_data:
-                self._cache_ai_analysis(cursor, cursor.lastrowid, "image_analysis", ai_analysis_data)
-            
-            conn.commit()
-            conn.close()
-            
-            logger.debug(f"✅ File indexed: {file_path.name} ({category}/{media_type})")
-            return True
-            
-        except Exception as e:
-            logger.error(f"Error indexing file {file_path}: {e}")
-            return False
+                    logger.warning(f"AI vision analysis error for {file_path}: {e}")
+                    processing_status["steps"].append(f"ai_vision_error: {str(e)}")
+        
+        # Combine all text content for FTS
+        combined_text_content = ""
+        if text_content.strip():
+            combined_text_content = text_content
+        if multimedia_content.strip():
+            combined_text_content = multimedia_content if not combined_text_content else f"{combined_text_content}\n\n{multimedia_content}"
+        
+        # Update processing status
+        processing_status["status"] = "completed"
+        processing_status["completed_at"] = time.time()
+        
+        return {
+            "file_path": file_path,
+            "metadata": entry["metadata"],
+            "content_hash": entry["content_hash"],
+            "category": category,
+            "media_type": media_type,
+            "text_content": combined_text_content,  # Combined for FTS
+            "multimedia_content": multimedia_content,
+            "ai_analysis": ai_analysis,
+            "content_extracted": content_extracted,
+            "extraction_metadata": extraction_metadata,
+            "multimedia_metadata": multimedia_metadata,
+            "thumbnail_path": thumbnail_path,
+            "processing_status": processing_status,
+            "ai_analysis_data": ai_analysis_data
+        }
+    
+    def _write_record(self, cursor, record: Dict[str, Any]):
+        """Insert or update a files record (and cache its AI analysis) inside the caller's transaction"""
+        metadata = record["metadata"]
+        current_time = time.time()
+        
+        cursor.execute('''
+            INSERT OR REPLACE INTO files 
+            (path, name, extension, size, modified_time, content_hash,
+             text_content, multimedia_content, ai_analysis,
+             content_extracted, extraction_metadata, multimedia_metadata,
+             thumbnail_path, processing_status, media_type, category,
+             metadata_json, indexed_at, last_analyzed)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            str(record["file_path"]),
+            metadata["name"],
+            metadata["extension"],
+            metadata["size"],
+            metadata["modified"],
+            record["content_hash"],
+            record["text_content"],
+            record["multimedia_content"],
+            record["ai_analysis"],
+            record["content_extracted"],
+            json.dumps(record["extraction_metadata"]),
+            json.dumps(record["multimedia_metadata"]),
+            record["thumbnail_path"],
+            json.dumps(record["processing_status"]),
+            record["media_type"],
+            record["category"],
+            json.dumps(metadata),
+            current_time,
+            current_time
+        ))
+        
+        # Cache AI analysis if available
+        if record["ai_analysis_data"]:
+            self._cache_ai_analysis(cursor, cursor.lastrowid, "image_analysis", record["ai_analysis_data"])
     
     def _cache_ai_analysis(self, cursor, file_id: int, analysis_type: str, analysis_data: Dict[str, Any]):
         """Cache AI analysis results"""
@@ -537,6 +677,29 @@ class EnhancedFileIndexer:
             
             logger.info(f"Found {total_files} files to process")
             
+            batch: List[Path] = []
+            
+            def flush_batch():
+                nonlocal indexed_count, skipped_count, multimedia_count
+                
+                progress_step = indexed_count // 100
+                for file_path, success in zip(batch, self._index_batch(batch)):
+                    if success:
+                        indexed_count += 1
+                        
+                        # Track multimedia files
+                        category, media_type = self.determine_file_category(file_path)
+                        if media_type == "multimedia":
+                            multimedia_count += 1
+                    else:
+                        skipped_count += 1
+                batch.clear()
+                
+                # Progress logging
+                if indexed_count // 100 > progress_step:
+                    progress = (indexed_count / total_files) * 100
+                    logger.info(f"Progress: {indexed_count}/{total_files} ({progress:.1f}%) - {multimedia_count} multimedia files")
+            
             for root, dirs, files in os.walk(directory):
                 # Filter out hidden directories
                 dirs[:] = [d for d in dirs if not d.startswith('.')]
@@ -548,26 +711,12 @@ class EnhancedFileIndexer:
                         skipped_count += 1
                         continue
                     
-                    try:
-                        success = self.index_file(str(file_path))
-                        if success:
-                            indexed_count += 1
-                            
-                            # Track multimedia files
-                            category, media_type = self.determine_file_category(file_path)
-                            if media_type == "multimedia":
-                                multimedia_count += 1
-                            
-                            # Progress logging
-                            if indexed_count % 100 == 0:
-                                progress = (indexed_count / total_files) * 100
-                                logger.info(f"Progress: {indexed_count}/{total_files} ({progress:.1f}%) - {multimedia_count} multimedia files")
-                        else:
-                            skipped_count += 1
-                            
-                    except Exception as e:
-                        logger.error(f"Error indexing file {file_path}: {e}")
-                        skipped_count += 1
+                    batch.append(file_path)
+                    if len(batch) >= INDEX_BATCH_SIZE:
+                        flush_batch()
+            
+            if batch:
+                flush_batch()
             
             logger.info(f"Indexing complete. Indexed: {indexed_count}, Multimedia: {multimedia_count}, Skipped: {skipped_count}")
             
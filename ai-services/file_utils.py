@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+File path helpers shared by the content processors
+"""
+
+import os
+import hashlib
+from typing import Union
+
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
+
+def file_extension(file_path: Union[str, os.PathLike]) -> str:
+    """Lowercase extension like Path(file_path).suffix.lower(), without building a Path"""
+    name = os.fspath(file_path)
+    separator = max(name.rfind('/'), name.rfind(os.sep))
+    dot = name.rfind('.')
+    # A leading dot (".bashrc") or a trailing one ("name.") is not an extension
+    if dot <= separator + 1 or dot == len(name) - 1:
+        return ''
+    return name[dot:].lower()
+
+
+def path_hash(path: Union[str, os.PathLike]) -> str:
+    """Short non-cryptographic hash of a path for cache (thumbnail) file names"""
+    if XXHASH_AVAILABLE:
+        return xxhash.xxh3_64_hexdigest(str(path))[:12]
+    return hashlib.blake2b(str(path).encode(), digest_size=6).hexdigest()
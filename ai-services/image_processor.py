@@ -7,12 +7,13 @@ OCR, EXIF, AI analysis, and thumbnail generation
 import os
 import io
 import logging
-import hashlib
 from pathlib import Path
 from typing import Dict, Any, Tuple, List, Optional
 from PIL import Image, ExifTags
 import mimetypes
 
+from file_utils import path_hash
+
 logger = logging.getLogger(__name__)
 
 
@@ -336,7 +337,7 @@ class ImageProcessor:
             thumb_dir.mkdir(exist_ok=True)
             
             # Generate thumbnail filename
-            file_hash = hashlib.md5(str(file_path).encode()).hexdigest()[:12]
+            file_hash = path_hash(file_path)
             thumb_name = f"{file_hash}_{file_path.stem}.jpg"
             thumb_path = thumb_dir / thumb_name
             
@@ -1,13 +1,10 @@
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from .llm_model import api_key
-from langchain_openai import ChatOpenAI
+from .llm_model import llm
 from pydantic import BaseModel
 from typing import List, Literal
 
 
-def analyst_agent(state, input_prompt: str, output_list: List[str]):
-    llm = ChatOpenAI(api_key=api_key, model="gpt-4o-mini")
-
+async def analyst_agent(state, input_prompt: str, output_list: List[str]):
     class listResponse(BaseModel):
         messages: List[str]
 
@@ -28,4 +25,4 @@ def analyst_agent(state, input_prompt: str, output_list: List[str]):
     ).partial(input_prompt=input_prompt, output_list=", ".join(output_list))
     print(output_list)
     analyst_chain = prompt | llm.with_structured_output(listResponse)
-    return analyst_chain.invoke(state)
+    return await analyst_chain.ainvoke(state)
@@ -1,6 +1,32 @@
 from dotenv import load_dotenv
+import asyncio
 import os
 from langchain_openai import ChatOpenAI
 
 load_dotenv()
 api_key = os.getenv("OPENAI_API_KEY")
+
+# supervisor/analyst 가 graph 호출마다 HTTP 클라이언트를 새로 만들지 않도록 하나를 공유한다.
+llm = ChatOpenAI(api_key=api_key, model="gpt-4o-mini", max_retries=2, timeout=30)
+
+
+class ConcurrencyLimiter:
+    """
+    runnable.ainvoke 를 최대 max_concurrency 개까지만 동시에 실행한다.
+    member 노드들이 병렬로 실행돼도 OpenAI 로 나가는 요청 수가 제한되고, 요청을 모으려고 기다리지 않는다.
+    """
+
+    def __init__(self, runnable, max_concurrency=10):
+        self.runnable = runnable
+        self.max_concurrency = max_concurrency
+        self._semaphore = None
+        self._loop = None
+
+    async def ainvoke(self, input):
+        # asyncio.Semaphore 는 처음 사용한 이벤트 루프에 묶이므로 루프가 바뀌면 새로 만든다.
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphore:
+            return await self.runnable.ainvoke(input)
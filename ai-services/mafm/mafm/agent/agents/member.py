@@ -1,7 +1,7 @@
 from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
 from pydantic import BaseModel, Field
 from typing import Literal, List
-from .llm_model import api_key
+from .llm_model import api_key, ConcurrencyLimiter
 
 # from .tools import get_file_list
 from langchain_openai import ChatOpenAI
@@ -9,40 +9,43 @@ from langgraph.store.base import BaseStore
 from langchain.output_parsers import PydanticOutputParser
 from langchain_core.utils.function_calling import convert_to_openai_function
 from langchain_core.messages import HumanMessage
+from langchain_core.rate_limiters import InMemoryRateLimiter
+import asyncio
 import os
 
 from rag.vectorDb import search
 
-global current_directory_name
-
 
 class queryResponse(BaseModel):
     query: str = Field(description="query sentence")
 
 
-def get_file_list(query: queryResponse) -> List[str]:
+# 병렬로 실행되는 member 노드들의 쿼리 생성 요청이 동시에 최대 10개까지만 나가게 한다.
+query_dispatcher = ConcurrencyLimiter(
+    ChatOpenAI(
+        api_key=api_key,
+        model="gpt-4o-mini",
+        temperature=0,
+        rate_limiter=InMemoryRateLimiter(requests_per_second=100),
+    ).with_structured_output(queryResponse),
+    max_concurrency=10,
+)
+
+
+def get_file_list(query: queryResponse, directory_name: str) -> List[str]:
     """
     get file list from user input
     """
-    global current_directory_name
-
-    print("current_directory_name: ", current_directory_name)
+    # member 노드들이 병렬로 실행되므로 전역 변수 대신 디렉토리 이름을 인자로 받는다.
+    print("current_directory_name: ", directory_name)
     print("query: ", query)
     return search(
-        current_directory_name + "/" + os.path.basename(current_directory_name) + ".db",
+        directory_name + "/" + os.path.basename(directory_name) + ".db",
         [query.query],
     )
 
 
-def agent_node(state, directory_name: str, output_list: List[str]):
-    global current_directory_name
-    current_directory_name = directory_name
-
-    llm = ChatOpenAI(
-        api_key=api_key,
-        model="gpt-4o-mini",
-        temperature=0,
-    )
+async def agent_node(state, directory_name: str, output_list: List[str]):
     prompt = ChatPromptTemplate.from_messages(
         [
             MessagesPlaceholder(variable_name="messages"),
@@ -55,9 +58,10 @@ def agent_node(state, directory_name: str, output_list: List[str]):
     ).partial(
         directory_name=directory_name,
     )
-    query_chain = prompt | llm.with_structured_output(queryResponse)
-    chain = query_chain | get_file_list
-    res = chain.invoke(state)
+    messages = await prompt.ainvoke(state)
+    query = await query_dispatcher.ainvoke(messages)
+    # Milvus 검색과 임베딩은 동기 코드이므로 이벤트 루프를 막지 않도록 스레드에서 실행한다.
+    res = await asyncio.to_thread(get_file_list, query, directory_name)
     if res:
         output_list.extend(res)
         return {"messages": res}
@@ -1,21 +1,20 @@
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from .llm_model import api_key
-from langchain_openai import ChatOpenAI
+from .llm_model import llm
 from pydantic import BaseModel
 from typing import List, Literal
 
 
-def supervisor_agent(state, member_list: List[str]):
-    llm = ChatOpenAI(api_key=api_key, model="gpt-4o-mini")
-
+async def supervisor_agent(state, member_list: List[str]):
     next_options = member_list + ["analyst"]
 
+    # 여러 디렉토리를 한 번에 고르면 해당 member 노드들이 병렬로 실행된다.
     class routeResponse(BaseModel):
-        next: Literal[*(next_options)]
+        next: List[Literal[*(next_options)]]
 
     system_prompt = (
         "당신은 사용자의 요청에 따라 디렉토리를 선택하는 감독자입니다."
-        "3번 디렉토리를 선택했으면 'analyst'를 선택해주세요."
+        "관련된 디렉토리를 한 번에 최대 3개까지 선택할 수 있습니다."
+        "디렉토리 검색이 끝났으면 'analyst'만 선택해주세요."
     )
 
     prompt = ChatPromptTemplate.from_messages(
@@ -31,4 +30,4 @@ def supervisor_agent(state, member_list: List[str]):
     ).partial(members=", ".join(member_list))
 
     supervisor_chain = prompt | llm.with_structured_output(routeResponse)
-    return supervisor_chain.invoke(state)
+    return await supervisor_chain.ainvoke(state)
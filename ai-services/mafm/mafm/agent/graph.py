@@ -1,3 +1,4 @@
+import asyncio
 import functools
 import operator
 from typing import Sequence, TypedDict, Annotated, List
@@ -10,7 +11,14 @@ from rag.sqlite import get_directory_structure
 
 class AgentState(TypedDict):
     messages: Annotated[Sequence[BaseMessage], operator.add]
-    next: str
+    next: List[str]
+
+
+def route(state: AgentState):
+    # supervisor 가 고른 디렉토리들을 한 superstep 에서 병렬로 실행한다.
+    # 더 검색할 디렉토리가 없으면 analyst 로 넘어간다.
+    next_nodes = [node for node in state["next"] if node != "analyst"]
+    return next_nodes or "analyst"
 
 
 def graph(directory_path: str, prompt: str) -> List[str]:
@@ -36,7 +44,7 @@ def graph(directory_path: str, prompt: str) -> List[str]:
         workflow.add_edge(member, "supervisor")
     conditional_map = {k: k for k in members}
     conditional_map["analyst"] = "analyst"
-    workflow.add_conditional_edges("supervisor", lambda x: x["next"], conditional_map)
+    workflow.add_conditional_edges("supervisor", route, conditional_map)
     workflow.add_edge(START, "supervisor")
     workflow.add_edge("analyst", END)
     app = workflow.compile()
@@ -46,16 +54,20 @@ def graph(directory_path: str, prompt: str) -> List[str]:
     # with open("graph_image.png", "wb") as file:
     #     file.write(png_data)
 
-    previous_output = None
-    for s in app.stream(
-        {"messages": [human_input]},
-        {"recursion_limit": 20},
-    ):
-        previous_output = s
-        if "__end__" not in s:
-            print(s)
-            print("----")
-    return previous_output["analyst"]["messages"]
+    # 노드들이 async 이므로 astream 으로 실행해야 member 노드들이 동시에 LLM 을 호출한다.
+    # 중간 단계의 출력은 버리고 analyst 의 결과만 남긴다.
+    async def _run():
+        analyst_output = None
+        async for s in app.astream(
+            {"messages": [human_input]},
+            {"recursion_limit": 20},
+        ):
+            if "analyst" in s:
+                analyst_output = s["analyst"]
+        return analyst_output
+
+    analyst_output = asyncio.run(_run())
+    return analyst_output["messages"]
 
 
 # def graph():
@@ -5,6 +5,7 @@ import os
 from rag.vectorDb import save
 from rag.sqlite import (
     insert_file_info,
+    insert_file_info_many,
     insert_directory_structure,
     update_file_info,
     get_id_by_path,
@@ -216,6 +217,7 @@ def start_command_c(root):
     # 디렉터리 재귀 탐색
     for dirpath, dirnames, filenames in os.walk(root):
         # 디렉토리 정보 삽입
+        dir_paths = []
         for dirname in dirnames:
             full_path = os.path.join(dirpath, dirname)
             print(f"디렉토리 경로: {full_path}")
@@ -224,27 +226,36 @@ def start_command_c(root):
             except Exception as e:
                 print(f"Error initializing vector DB for directory: {e}")
                 continue
+            dir_paths.append(full_path)
 
-            id = insert_file_info(full_path, 1, "filesystem.db")
+        # 디렉토리 단위로 file_info 를 한 번에 삽입 (행마다 commit 하지 않음)
+        dir_ids = insert_file_info_many(
+            [(full_path, 1) for full_path in dir_paths], "filesystem.db"
+        )
+        for id, full_path in zip(dir_ids, dir_paths):
             insert_directory_structure(id, full_path, dirpath, "filesystem.db")
 
-        # 파일 정보 삽입 및 벡터 DB에 저장
-        for filename in filenames:
-            # 비밀 파일과 .db 파일 제외
-            if filename.startswith(".") or filename.endswith(".db"):
-                continue
+        # 비밀 파일과 .db 파일 제외
+        file_paths = [
+            os.path.join(dirpath, filename)
+            for filename in filenames
+            if not (filename.startswith(".") or filename.endswith(".db"))
+        ]
 
-            full_path = os.path.join(dirpath, filename)
-            print(f"Embedding 하는 파일의 절대 경로: {full_path}")
+        # 파일 정보 삽입
+        file_ids = insert_file_info_many(
+            [(full_path, 0) for full_path in file_paths], "filesystem.db"
+        )
 
-            # 파일 정보 삽입
-            id = insert_file_info(full_path, 0, "filesystem.db")
+        # 파일 내용을 벡터 DB에 저장
+        for id, full_path in zip(file_ids, file_paths):
+            print(f"Embedding 하는 파일의 절대 경로: {full_path}")
 
             # PDF 및 Word 파일 처리
-            if filename.endswith(".pdf"):
+            if full_path.endswith(".pdf"):
                 text_content = read_pdf(full_path)
                 text_chunks = split_text_into_chunks(text_content)
-            elif filename.endswith(".docx"):
+            elif full_path.endswith(".docx"):
                 text_content = read_word(full_path)
                 text_chunks = split_text_into_chunks(text_content)
             else:
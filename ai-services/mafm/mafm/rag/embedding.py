@@ -1,11 +1,61 @@
 from sentence_transformers import SentenceTransformer
 import os
+import numpy as np
 import psutil
+import torch
+from .embedding_cache import EmbeddingCache, cache_key
 
 # 모델을 전역 변수로 초기화하여 재사용
 model = None
+# 내용 해시 기반 임베딩 캐시 (처음 사용할 때 연다)
+_cache = None
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
 
+# 한 번의 forward 에 최대한 많은 문장을 넣어서 GEMM 효율을 높인다.
+BATCH_SIZE = 1024
+# 길이순으로 정렬한 뒤 한 배치의 (문장 수 x 최대 토큰 길이)가 이 값을 넘지 않게 자른다.
+# 짧은 문장은 큰 배치로, 긴 문장은 작은 배치로 묶여서 padding 토큰 계산이 줄어든다.
+MAX_BATCH_TOKENS = 65536
+
+MODEL_NAME = "avsolatorio/GIST-small-Embedding-v0"  # 33
+
+# MAFM_ONNX=1 이면 ONNX Runtime + int8 동적 양자화 모델을 사용한다.
+USE_ONNX = os.getenv("MAFM_ONNX", "0") == "1"
+# MAFM_QUANTIZE=1 이면 추가 의존성 없이 PyTorch 동적 양자화(Linear -> int8)를 적용한다.
+USE_QUANTIZE = os.getenv("MAFM_QUANTIZE", "0") == "1"
+
+
+def _load_sentence_transformer():
+    # model = SentenceTransformer("sentence-transformers/all-MiniLM-L12-v1")
+    st_model = SentenceTransformer(
+        # "dunzhang/stella_en_400M_v5",
+        MODEL_NAME,
+        # "hkunlp/instructor-base",  # 110
+        trust_remote_code=True,
+        device="cpu",
+        config_kwargs={
+            "use_memory_efficient_attention": False,
+            "unpad_inputs": False,
+        },
+    )
+    if USE_QUANTIZE:
+        st_model[0].auto_model = torch.quantization.quantize_dynamic(
+            st_model[0].auto_model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+    return st_model
+
+
+def _load_onnx_model():
+    try:
+        from .onnx_encoder import OnnxEncoder
+
+        return OnnxEncoder(MODEL_NAME)
+    except ImportError as e:
+        print(f"optimum[onnxruntime] 가 없어 SentenceTransformer 를 사용합니다: {e}")
+    except Exception as e:
+        print(f"ONNX 모델 로드 중 오류 발생, SentenceTransformer 를 사용합니다: {e}")
+    return None
+
 
 def initialize_model():
 
@@ -19,26 +69,100 @@ def initialize_model():
             # CPU로 실험
             # GPU로 변환 시 SentenceTransformer() 메소드 뒤에 .cuda() 메소드를 붙여주면 됨
             # 모델 초기화
-            model = SentenceTransformer(
-                # "dunzhang/stella_en_400M_v5",
-                "avsolatorio/GIST-small-Embedding-v0",  # 33
-                # "hkunlp/instructor-base",  # 110
-                trust_remote_code=True,
-                device="cpu",
-                config_kwargs={
-                    "use_memory_efficient_attention": False,
-                    "unpad_inputs": False,
-                },
-            )
+            if USE_ONNX:
+                model = _load_onnx_model()
+            if model is None:
+                model = _load_sentence_transformer()
+
+            # CPU 추론이므로 모든 코어를 사용
+            torch.set_num_threads(os.cpu_count() or 1)
 
-            # model = SentenceTransformer("sentence-transformers/all-MiniLM-L12-v1")
+            # 첫 호출 지연(lazy init, 메모리 할당)을 초기화 시점으로 당겨둔다.
+            model.encode(["warmup"], show_progress_bar=False)
 
             print("모델이 성공적으로 초기화되었습니다.")
         except Exception as e:
             print(f"모델 초기화 중 오류 발생: {e}")
 
 
-def embedding(queries):
+def _length_sorted_batches(lengths):
+    # 토큰 길이 오름차순으로 정렬해서 배치를 만든다. 배치의 마지막 문장이 가장 길다.
+    batches = []
+    current = []
+    for idx in np.argsort(lengths, kind="stable"):
+        if current and (
+            len(current) >= BATCH_SIZE
+            or (len(current) + 1) * lengths[idx] > MAX_BATCH_TOKENS
+        ):
+            batches.append(current)
+            current = []
+        current.append(idx)
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _encode_batch(queries):
+    return model.encode(
+        queries,
+        batch_size=max(len(queries), 1),
+        convert_to_numpy=True,
+        normalize_embeddings=True,
+        show_progress_bar=False,
+    )
+
+
+def _encode(queries):
+    # 문자열 길이가 아니라 실제 토큰 수로 정렬해서 배치마다 그 배치의 최대 길이까지만 padding 한다.
+    if len(queries) <= 1:
+        return _encode_batch(queries)
+    input_ids = model.tokenizer(
+        queries,
+        padding=False,
+        truncation=True,
+        max_length=getattr(model, "max_seq_length", None) or 512,
+    )["input_ids"]
+    lengths = [len(ids) for ids in input_ids]
+
+    query_embeddings = None
+    for batch in _length_sorted_batches(lengths):
+        batch_embeddings = _encode_batch([queries[i] for i in batch])
+        if query_embeddings is None:
+            query_embeddings = np.empty(
+                (len(queries), batch_embeddings.shape[1]), dtype=batch_embeddings.dtype
+            )
+        # 원래 입력 순서로 되돌린다.
+        query_embeddings[batch] = batch_embeddings
+    return query_embeddings
+
+
+def _get_cache():
+    global _cache
+    if _cache is None:
+        _cache = EmbeddingCache()
+    return _cache
+
+
+def _cached_encode(queries):
+    # 캐시에 없는 문장만 모델에 넣고, 결과는 입력 순서대로 돌려준다.
+    if not queries:
+        return _encode(queries)
+    cache = _get_cache()
+    keys = [cache_key(MODEL_NAME, q) for q in queries]
+    hits = cache.get_many(keys)
+    missing = [i for i, hit in enumerate(hits) if hit is None]
+    if missing:
+        new_embeddings = _encode([queries[i] for i in missing])
+        cache.put_many([keys[i] for i in missing], new_embeddings)
+        for i, vec in zip(missing, new_embeddings):
+            hits[i] = vec
+    # Milvus 에 그대로 넘길 수 있도록 연속된 float32 배열로 반환한다.
+    return np.ascontiguousarray(np.stack(hits), dtype=np.float32)
+
+
+def embedding(queries, as_list=False):
+    # 기본으로 (len(queries), dim) float32 ndarray 를 반환한다.
+    # 파이썬 리스트가 필요한 호출부만 as_list=True 로 변환 비용을 낸다.
     global model
 
     # 모델이 초기화되지 않은 경우 초기화
@@ -51,11 +175,12 @@ def embedding(queries):
             isinstance(q, str) for q in queries
         ):
             raise ValueError("The input to encode() must be a list of strings.")
-        query_embeddings = model.encode(queries)
+        query_embeddings = _cached_encode(queries)
 
-        return query_embeddings.tolist()
+        return query_embeddings.tolist() if as_list else query_embeddings
     except MemoryError as me:
         print(f"MemoryError: {me}")
     except Exception as e:
         print(f"embedding 중 오z류 발생: {e}")
         return None
+
@@ -0,0 +1,190 @@
+import hashlib
+import os
+import threading
+
+import numpy as np
+
+from .sqlite import _get_conn
+
+# 같은 파일명/청크를 반복해서 임베딩하지 않도록 내용 해시를 키로 벡터를 캐시한다.
+# 벡터는 하나의 fp16 파일에 행 단위로 저장하고 np.memmap 으로 읽는다.
+# SQLite 에는 key -> row_id 인덱스만 둔다. (행마다 BLOB 을 역직렬화하지 않는다)
+CACHE_DB = os.getenv("MAFM_EMBEDDING_CACHE", "embeddings_cache.db")
+INITIAL_CAPACITY = 4096
+
+
+def cache_key(model_name, query):
+    # 모델이 바뀌면 벡터도 달라지므로 모델 이름을 키에 포함한다.
+    return hashlib.blake2b(
+        f"{model_name}\0{query}".encode("utf-8"), digest_size=16
+    ).digest()
+
+
+class EmbeddingCache:
+    def __init__(self, db_name=CACHE_DB):
+        self.db_name = db_name
+        self.vector_path = os.path.splitext(db_name)[0] + ".f16"
+        self.dim = None
+        self._vectors = None
+        self._capacity = 0
+        self._lock = threading.Lock()
+        with self._lock:
+            connection = _get_conn(self.db_name)
+            # 이전 버전(BLOB 저장)의 캐시 테이블은 더 이상 사용하지 않는다.
+            connection.execute("DROP TABLE IF EXISTS embedding_cache")
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS embedding_index (
+                    key BLOB PRIMARY KEY,
+                    row_id INTEGER NOT NULL
+                ) WITHOUT ROWID
+                """
+            )
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS embedding_meta (
+                    name TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                )
+                """
+            )
+            connection.commit()
+            row = connection.execute(
+                "SELECT value FROM embedding_meta WHERE name = 'dim'"
+            ).fetchone()
+            if self._vectors_match_index(connection, row):
+                self.dim = row[0]
+                self._open_vectors()
+            else:
+                # 벡터 파일이 없거나(삭제, DB 만 복사) 인덱스보다 짧으면 인덱스가
+                # 0 으로 채워진 행을 가리키게 되므로 인덱스를 비우고 처음부터 다시 쌓는다.
+                connection.execute("DELETE FROM embedding_index")
+                connection.execute("DELETE FROM embedding_meta")
+                connection.commit()
+
+    def _vectors_match_index(self, connection, dim_row):
+        if dim_row is None or not os.path.exists(self.vector_path):
+            return False
+        max_row = connection.execute(
+            "SELECT COALESCE(MAX(row_id) + 1, 0) FROM embedding_index"
+        ).fetchone()[0]
+        row_bytes = dim_row[0] * np.dtype(np.float16).itemsize
+        return os.path.getsize(self.vector_path) >= max_row * row_bytes
+
+    def _open_vectors(self):
+        # 파일 크기에 맞춰 다시 mmap 한다. (다른 프로세스가 파일을 키웠을 수도 있다)
+        row_bytes = self.dim * np.dtype(np.float16).itemsize
+        self._capacity = os.path.getsize(self.vector_path) // row_bytes
+        self._vectors = np.memmap(
+            self.vector_path,
+            dtype=np.float16,
+            mode="r+",
+            shape=(self._capacity, self.dim),
+        )
+
+    def _ensure_capacity(self, rows):
+        if rows <= self._capacity and self._vectors is not None:
+            return
+        if os.path.exists(self.vector_path):
+            self._open_vectors()
+            if rows <= self._capacity:
+                return
+        # 용량이 부족하면 두 배씩 파일을 늘리고 다시 mmap 한다.
+        capacity = max(self._capacity, INITIAL_CAPACITY)
+        while capacity < rows:
+            capacity *= 2
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._vectors = None
+        with open(self.vector_path, "ab") as f:
+            f.truncate(capacity * self.dim * np.dtype(np.float16).itemsize)
+        self._open_vectors()
+
+    def get_many(self, keys):
+        # keys 순서대로 float32 벡터 또는 None 을 돌려준다.
+        results = [None] * len(keys)
+        with self._lock:
+            if self.dim is None:
+                return results
+            positions = {}
+            for i, key in enumerate(keys):
+                positions.setdefault(key, []).append(i)
+
+            cursor = _get_conn(self.db_name).cursor()
+            found = []
+            lookup_keys = list(positions)
+            # SQLite 바인딩 변수 개수 제한(999)을 넘지 않게 나눠서 조회
+            for start in range(0, len(lookup_keys), 500):
+                chunk = lookup_keys[start : start + 500]
+                cursor.execute(
+                    "SELECT key, row_id FROM embedding_index WHERE key IN (%s)"
+                    % ",".join("?" * len(chunk)),
+                    chunk,
+                )
+                found.extend(cursor.fetchall())
+            if not found:
+                return results
+
+            row_ids = np.fromiter((row_id for _, row_id in found), dtype=np.int64)
+            if row_ids.max() >= self._capacity:
+                self._open_vectors()
+            vectors = self._vectors[row_ids].astype(np.float32)
+            for (key, _), vec in zip(found, vectors):
+                for i in positions[key]:
+                    results[i] = vec
+        return results
+
+    def put_many(self, keys, vectors):
+        vectors = np.asarray(vectors, dtype=np.float16)
+        if len(keys) == 0:
+            return
+        with self._lock:
+            connection = _get_conn(self.db_name)
+            cursor = connection.cursor()
+            # row_id 할당이 다른 프로세스와 겹치지 않도록 쓰기 트랜잭션 안에서 처리한다.
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                if self.dim is None:
+                    self.dim = vectors.shape[1]
+                    cursor.execute(
+                        "INSERT OR REPLACE INTO embedding_meta (name, value) VALUES ('dim', ?)",
+                        (self.dim,),
+                    )
+
+                new_rows = {}
+                for key, vec in zip(keys, vectors):
+                    if key not in new_rows:
+                        new_rows[key] = vec
+                candidate_keys = list(new_rows)
+                for start in range(0, len(candidate_keys), 500):
+                    chunk = candidate_keys[start : start + 500]
+                    cursor.execute(
+                        "SELECT key FROM embedding_index WHERE key IN (%s)"
+                        % ",".join("?" * len(chunk)),
+                        chunk,
+                    )
+                    for (key,) in cursor.fetchall():
+                        new_rows.pop(key, None)
+
+                if new_rows:
+                    cursor.execute(
+                        "SELECT COALESCE(MAX(row_id) + 1, 0) FROM embedding_index"
+                    )
+                    first_row = cursor.fetchone()[0]
+                    self._ensure_capacity(first_row + len(new_rows))
+                    # 인덱스보다 벡터를 먼저 기록해서 아직 쓰지 않은 행을 가리키지 않게 한다.
+                    self._vectors[first_row : first_row + len(new_rows)] = np.stack(
+                        list(new_rows.values())
+                    )
+                    self._vectors.flush()
+                    cursor.executemany(
+                        "INSERT INTO embedding_index (key, row_id) VALUES (?, ?)",
+                        [
+                            (key, first_row + offset)
+                            for offset, key in enumerate(new_rows)
+                        ],
+                    )
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
@@ -0,0 +1,92 @@
+import json
+import os
+
+import numpy as np
+
+# SentenceTransformer 대신 ONNX Runtime + int8 동적 양자화 모델로 임베딩을 계산한다.
+# optimum[onnxruntime] 가 설치되어 있을 때만 사용되며, MAFM_ONNX=1 로 켠다.
+ONNX_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "onnx_model")
+QUANTIZED_FILE = "model_quantized.onnx"
+
+
+def _export(model_name, save_dir):
+    # 처음 한 번만 export + 양자화하고, 이후에는 save_dir 에 캐시된 모델을 사용한다.
+    from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoTokenizer
+
+    ort_model = ORTModelForFeatureExtraction.from_pretrained(model_name, export=True)
+    ort_model.save_pretrained(save_dir)
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(save_dir)
+
+    quantizer = ORTQuantizer.from_pretrained(save_dir)
+    quantizer.quantize(
+        save_dir=save_dir,
+        quantization_config=AutoQuantizationConfig.avx512_vnni(
+            is_static=False, per_channel=False
+        ),
+    )
+
+
+def _pooling_mode(model_name):
+    # SentenceTransformer 의 Pooling 설정(1_Pooling/config.json)을 그대로 따른다.
+    try:
+        from huggingface_hub import hf_hub_download
+
+        with open(hf_hub_download(model_name, "1_Pooling/config.json")) as f:
+            config = json.load(f)
+        if config.get("pooling_mode_cls_token"):
+            return "cls"
+    except Exception as e:
+        print(f"pooling 설정을 읽지 못해 mean pooling 을 사용합니다: {e}")
+    return "mean"
+
+
+class OnnxEncoder:
+    def __init__(self, model_name, save_dir=ONNX_DIR, max_length=512):
+        from optimum.onnxruntime import ORTModelForFeatureExtraction
+        from transformers import AutoTokenizer
+
+        if not os.path.exists(os.path.join(save_dir, QUANTIZED_FILE)):
+            _export(model_name, save_dir)
+
+        self.tokenizer = AutoTokenizer.from_pretrained(save_dir)
+        self.model = ORTModelForFeatureExtraction.from_pretrained(
+            save_dir, file_name=QUANTIZED_FILE
+        )
+        self.pooling = _pooling_mode(model_name)
+        self.max_seq_length = max_length
+
+    def forward(self, features):
+        # features: tokenizer 출력(np.ndarray dict), 반환값: pooling 된 (batch, dim) 벡터
+        outputs = self.model(**features)
+        hidden = np.asarray(outputs.last_hidden_state, dtype=np.float32)
+        if self.pooling == "cls":
+            return hidden[:, 0]
+        mask = np.asarray(features["attention_mask"], dtype=np.float32)[..., None]
+        return (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+    def encode(
+        self,
+        sentences,
+        batch_size=32,
+        convert_to_numpy=True,
+        normalize_embeddings=False,
+        show_progress_bar=False,
+    ):
+        # SentenceTransformer.encode 와 같은 시그니처로 호출할 수 있게 맞춘다.
+        outputs = []
+        for start in range(0, len(sentences), batch_size):
+            features = self.tokenizer(
+                sentences[start : start + batch_size],
+                padding=True,
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors="np",
+            )
+            outputs.append(self.forward(features))
+        embeddings = np.concatenate(outputs) if outputs else np.zeros((0, 0))
+        if normalize_embeddings:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings = embeddings / np.clip(norms, 1e-12, None)
+        return embeddings
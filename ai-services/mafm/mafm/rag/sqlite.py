@@ -1,244 +1,351 @@
+import atexit
 import sqlite3
 import os
+import threading
 
 # sqlite는 서버 기반 데이터베이스가 아니다.
 # 서버 기반 데이터 베이스(MySQL, PostgreSQL)와는 다르게, 서버가 없는 내장형 데이터베이스이다.
 # 데이터베이스 파일은 하나의 독립적인 파일로 구성된다.
 
+# db_name 별로 연결을 한 번만 열어서 재사용한다.
+# 매 호출마다 connect/close 를 반복하면 pragma 파싱과 page cache 할당 비용이 쿼리보다 커진다.
+# watchdog 스레드와 shell 이 같은 연결을 공유하므로 check_same_thread=False + lock 으로 보호한다.
+_connections = {}
+_lock = threading.RLock()
 
-def initialize_database(db_name="filesystem.db"):
-    # 기존에 db가 존재하면 날림
-    if os.path.exists(db_name):
-        os.remove(db_name)
+# get_directory_structure 결과 캐시: db_name -> (data_version, dir_path 리스트)
+_directory_cache = {}
+
+
+def _get_conn(db_name="filesystem.db"):
+    connection = _connections.get(db_name)
+    if connection is None:
+        with _lock:
+            connection = _connections.get(db_name)
+            if connection is None:
+                connection = sqlite3.connect(db_name, check_same_thread=False)
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.execute("PRAGMA synchronous=NORMAL")
+                connection.execute("PRAGMA temp_store=MEMORY")
+                connection.execute("PRAGMA cache_size=-65536")
+                _connections[db_name] = connection
+    return connection
+
+
+def _prefix_range(prefix):
+    # prefix 로 시작하는 경로 = [prefix, prefix + 가장 큰 문자) 범위.
+    # LIKE 'prefix%' 와 달리 연결 설정(case_sensitive_like)에 상관없이 BINARY 인덱스를 쓰고,
+    # 경로의 '%', '_' 를 와일드카드로 해석하지 않는다.
+    # UTF-8 바이트 비교에서 BMP 밖의 문자(이모지 등)는 U+FFFF 보다 크므로 U+10FFFF 를 쓴다.
+    return prefix, prefix + "\U0010ffff"
+
+
+def _close_conn(db_name):
+    with _lock:
+        connection = _connections.pop(db_name, None)
+        if connection is not None:
+            connection.close()
+
+
+def _close_all():
+    with _lock:
+        for db_name in list(_connections):
+            _close_conn(db_name)
 
-    # 데이터베이스 파일에 연결
-    connection = sqlite3.connect("filesystem.db")
 
-    # 커서 생성
-    # 커서는 SQL 문을 실행하고 결과를 처리하는 데 사용되는 객체이다.
-    # cursor.execute() 메소드를 사용해서 데이터베이스에 대한 SQL 쿼리를 실행할 수 있다.
-    cursor = connection.cursor()
+atexit.register(_close_all)
 
-    # 첫 번째 테이블(file_info) 생성
-    cursor.execute(
+
+def invalidate_directory_structure(db_name="filesystem.db"):
+    # directory_structure 를 수정하는 함수들이 호출한다.
+    _directory_cache.pop(db_name, None)
+
+
+def initialize_database(db_name="filesystem.db"):
+    # 기존에 db가 존재하면 날림
+    # 열려 있는 연결이 있으면 먼저 닫아야 삭제된 파일을 계속 가리키지 않는다.
+    _close_conn(db_name)
+    invalidate_directory_structure(db_name)
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(db_name + suffix):
+            os.remove(db_name + suffix)
+
+    with _lock:
+        # 데이터베이스 파일에 연결
+        connection = _get_conn(db_name)
+
+        # 커서 생성
+        # 커서는 SQL 문을 실행하고 결과를 처리하는 데 사용되는 객체이다.
+        # cursor.execute() 메소드를 사용해서 데이터베이스에 대한 SQL 쿼리를 실행할 수 있다.
+        cursor = connection.cursor()
+
+        # 첫 번째 테이블(file_info) 생성
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS file_info (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                file_path TEXT NOT NULL,
+                is_dir INTEGER NOT NULL
+            )
         """
-        CREATE TABLE IF NOT EXISTS file_info (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            file_path TEXT NOT NULL,
-            is_dir INTEGER NOT NULL
         )
-    """
-    )
 
-    # 두 번째 테이블(directory_structure) 생성
-    cursor.execute(
+        # 두 번째 테이블(directory_structure) 생성
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS directory_structure (
+                record_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                id TEXT NOT NULL,
+                dir_path TEXT NOT NULL,
+                parent_dir_path TEXT
+            )
         """
-        CREATE TABLE IF NOT EXISTS directory_structure (
-            record_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            id TEXT NOT NULL,
-            dir_path TEXT NOT NULL,
-            parent_dir_path TEXT
         )
-    """
-    )
 
-    # 변경 사항 저장
-    connection.commit()
-    connection.close()
+        # 디렉토리 이동/삭제 시 사용하는 prefix 검색용 인덱스
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_file_info_path "
+            "ON file_info(file_path COLLATE BINARY)"
+        )
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_dir_structure_path "
+            "ON directory_structure(dir_path COLLATE BINARY)"
+        )
+
+        # 변경 사항 저장
+        connection.commit()
 
 
 # CREATE 함수 - 데이터 삽입
 def insert_file_info(file_path, is_dir, db_name="filesystem.db"):
-    connection = sqlite3.connect(db_name)
-    cursor = connection.cursor()
-    cursor.execute(
-        """
-        INSERT INTO file_info (file_path, is_dir)
-        VALUES (?, ?)
-        """,
-        (file_path, is_dir),
-    )
-    cursor.execute("SELECT last_insert_rowid()")
-    rows = cursor.fetchall()
-    connection.commit()
-    connection.close()
-    return rows[0][0]
+    with _lock:
+        connection = _get_conn(db_name)
+        cursor = connection.cursor()
+        cursor.execute(
+            """
+            INSERT INTO file_info (file_path, is_dir)
+            VALUES (?, ?)
+            """,
+            (file_path, is_dir),
+        )
+        row_id = cursor.lastrowid
+        connection.commit()
+    return row_id
+
+
+def insert_file_info_many(rows, db_name="filesystem.db"):
+    # rows: (file_path, is_dir) 튜플 리스트
+    # 디렉토리 스캔 시 파일마다 commit(fsync) 하지 않고 한 번의 트랜잭션으로 넣는다.
+    # 반환값은 삽입된 행들의 id range (rows 순서와 동일)
+    rows = list(rows)
+    if not rows:
+        return range(0)
+    with _lock:
+        connection = _get_conn(db_name)
+        cursor = connection.cursor()
+        try:
+            cursor.executemany(
+                """
+                INSERT INTO file_info (file_path, is_dir)
+                VALUES (?, ?)
+                """,
+                rows,
+            )
+            # lock 을 잡고 한 트랜잭션에서 넣었으므로 AUTOINCREMENT id 는 연속적이다.
+            cursor.execute("SELECT last_insert_rowid()")
+            last_id = cursor.fetchone()[0]
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+    first_id = last_id - len(rows) + 1
+    return range(first_id, last_id + 1)
 
 
 def insert_directory_structure(id, dir_path, parent_dir_path, db_name="filesystem.db"):
-    connection = sqlite3.connect(db_name)
-    cursor = connection.cursor()
-    cursor.execute(
-        """
-        INSERT INTO directory_structure (id, dir_path, parent_dir_path)
-        VALUES (?, ?, ?)
-    """,
-        (id, dir_path, parent_dir_path),
-    )
-    connection.commit()
-    connection.close()
+    with _lock:
+        connection = _get_conn(db_name)
+        cursor = connection.cursor()
+        cursor.execute(
+            """
+            INSERT INTO directory_structure (id, dir_path, parent_dir_path)
+            VALUES (?, ?, ?)
+        """,
+            (id, dir_path, parent_dir_path),
+        )
+        connection.commit()
+        invalidate_directory_structure(db_name)
 
 
 # READ 함수 - 데이터 조회
 def get_file_info(db_name="filesystem.db"):
-    connection = sqlite3.connect(db_name)
-    cursor = connection.cursor()
-    cursor.execute("SELECT * FROM file_info")
-    rows = cursor.fetchall()
-    connection.close()
+    with _lock:
+        cursor = _get_conn(db_name).cursor()
+        cursor.execute("SELECT * FROM file_info")
+        rows = cursor.fetchall()
     return rows
 
 
 def get_path_by_id(id, db_name="filesystem.db"):
-    connection = sqlite3.connect(db_name)
-    cursor = connection.cursor()
-    cursor.execute("SELECT file_path FROM file_info WHERE id = ?", (id,))
-    rows = cursor.fetchall()
-    connection.close()
+    with _lock:
+        cursor = _get_conn(db_name).cursor()
+        cursor.execute("SELECT file_path FROM file_info WHERE id = ?", (id,))
+        rows = cursor.fetchall()
     file_path = rows[0][0]
     return file_path
 
 
 def get_id_by_path(path, db_name="filesystem.db"):
-    connection = sqlite3.connect(db_name)
-    cursor = connection.cursor()
-    cursor.execute("SELECT id FROM file_info WHERE file_path = ?", (path,))
-    rows = cursor.fetchall()
-    connection.close()
+    with _lock:
+        cursor = _get_conn(db_name).cursor()
+        cursor.execute("SELECT id FROM file_info WHERE file_path = ?", (path,))
+        rows = cursor.fetchall()
     print("rows ========", rows)
     file_path = rows[0][0]
     return file_path
 
 
 def get_directory_structure(db_name="filesystem.db"):
-    connection = sqlite3.connect(db_name)
-    cursor = connection.cursor()
-    cursor.execute("SELECT dir_path FROM directory_structure")
-    rows = cursor.fetchall()
-    connection.close()
-    ret_list = []
-    for row in rows:
-        ret_list.append(row[0])
-    return ret_list
+    with _lock:
+        connection = _get_conn(db_name)
+        # 다른 프로세스(watchdog)가 커밋하면 data_version 이 바뀌므로 그때만 다시 읽는다.
+        # 같은 연결에서 수정한 경우는 invalidate_directory_structure 로 비운다.
+        data_version = connection.execute("PRAGMA data_version").fetchone()[0]
+        cached = _directory_cache.get(db_name)
+        if cached is not None and cached[0] == data_version:
+            return list(cached[1])
+
+        cursor = connection.cursor()
+        cursor.execute("SELECT dir_path FROM directory_structure")
+        rows = cursor.fetchall()
+        ret_list = []
+        for row in rows:
+            ret_list.append(row[0])
+        _directory_cache[db_name] = (data_version, ret_list)
+    return list(ret_list)
 
 
 # UPDATE 함수 - 데이터 수정
 def update_file_info(id, new_file_path, db_name="filesystem.db"):
-    connection = sqlite3.connect(db_name)
-    cursor = connection.cursor()
-    cursor.execute(
-        """
-        UPDATE file_info
-        SET file_path = ?
-        WHERE id = ?
-    """,
-        (new_file_path, id),
-    )
-    connection.commit()
-    connection.close()
+    with _lock:
+        connection = _get_conn(db_name)
+        cursor = connection.cursor()
+        cursor.execute(
+            """
+            UPDATE file_info
+            SET file_path = ?
+            WHERE id = ?
+        """,
+            (new_file_path, id),
+        )
+        connection.commit()
 
 
 def update_directory_structure(record_id, new_dir_path, db_name="filesystem.db"):
-    connection = sqlite3.connect(db_name)
-    cursor = connection.cursor()
-    cursor.execute(
-        """
-        UPDATE file_info
-        SET dir_path = ?
-        WHERE record_id = ?
-    """,
-        (new_dir_path, record_id),
-    )
-    connection.commit()
-    connection.close()
+    with _lock:
+        connection = _get_conn(db_name)
+        cursor = connection.cursor()
+        cursor.execute(
+            """
+            UPDATE file_info
+            SET dir_path = ?
+            WHERE record_id = ?
+        """,
+            (new_dir_path, record_id),
+        )
+        connection.commit()
+        invalidate_directory_structure(db_name)
 
 
 # DELETE 함수 - 데이터 삭제
 def delete_file_info(record_id, db_name="filesystem.db"):
-    connection = sqlite3.connect(db_name)
-    cursor = connection.cursor()
-    cursor.execute(
-        """
-        DELETE FROM file_info
-        WHERE record_id = ?
-    """,
-        (record_id,),
-    )
-    connection.commit()
-    connection.close()
+    with _lock:
+        connection = _get_conn(db_name)
+        cursor = connection.cursor()
+        cursor.execute(
+            """
+            DELETE FROM file_info
+            WHERE record_id = ?
+        """,
+            (record_id,),
+        )
+        connection.commit()
 
 
 def change_directory_path(dir_src_path, dir_dest_path, db_name="filesystem.db"):
-    connection = sqlite3.connect(db_name)
-    cursor = connection.cursor()
-    cursor.execute(
-        """
-        UPDATE directory_structure
-        SET dir_path = ?
-        WHERE dir_path = ?
-    """,
-        (dir_dest_path, dir_src_path),
-    )
-    cursor.execute(
-        """
-        SELECT file_path FROM file_info WHERE file_path LIKE ?
-        """,
-        (f"{dir_src_path}%",),
-    )
-    rows = cursor.fetchall()
+    with _lock:
+        connection = _get_conn(db_name)
+        cursor = connection.cursor()
+        # 두 UPDATE 를 하나의 트랜잭션으로 묶어서 WAL 에 한 번만 기록한다.
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            cursor.execute(
+                """
+                UPDATE directory_structure
+                SET dir_path = ?
+                WHERE dir_path = ?
+            """,
+                (dir_dest_path, dir_src_path),
+            )
+
+            # 하위 파일 경로의 prefix 를 SQLite 안에서 한 번에 교체한다.
+            # (행마다 SELECT + UPDATE 를 반복하지 않는다)
+            cursor.execute(
+                """
+                UPDATE file_info
+                SET file_path = ? || substr(file_path, ?)
+                WHERE file_path >= ? AND file_path < ?
+                """,
+                (dir_dest_path, len(dir_src_path) + 1, *_prefix_range(dir_src_path)),
+            )
+            connection.commit()
+            invalidate_directory_structure(db_name)
+        except Exception:
+            connection.rollback()
+            raise
+
 
-    # 각 레코드에 대해 dir_path를 업데이트합니다.
-    for (file_path,) in rows:
-        new_file_path = file_path.replace(dir_src_path, dir_dest_path, 1)
+def change_file_path(file_src_path, file_dest_path, db_name):
+    with _lock:
+        connection = _get_conn(db_name)
+        cursor = connection.cursor()
         cursor.execute(
             """
             UPDATE file_info
             SET file_path = ?
             WHERE file_path = ?
             """,
-            (new_file_path, file_path),
+            (file_dest_path, file_src_path),
         )
-    connection.commit()
-    connection.close()
-
-
-def change_file_path(file_src_path, file_dest_path, db_name):
-    connection = sqlite3.connect(db_name)
-    cursor = connection.cursor()
-    cursor.execute(
-        """
-        UPDATE file_info
-        SET file_path = ?
-        WHERE file_path = ?
-        """,
-        (file_dest_path, file_src_path),
-    )
-    connection.commit()
-    connection.close()
-
-
-def delete_directory_and_subdirectories(dir_path):
-    connection = sqlite3.connect("filesystem.db")
-    cursor = connection.cursor()
-
-    # directory_structure 테이블에서 dir_path가 포함된 모든 레코드 삭제
-    cursor.execute(
-        """
-        DELETE FROM directory_structure
-        WHERE dir_path LIKE ?
-        """,
-        (f"{dir_path}%",),
-    )
-
-    # file_info 테이블에서 file_path가 dir_path로 시작하는 모든 레코드 삭제
-    cursor.execute(
-        """
-        DELETE FROM file_info
-        WHERE file_path LIKE ?
-        """,
-        (f"{dir_path}%",),
-    )
-
-    # 변경 사항을 커밋
-    conn.commit()
+        connection.commit()
+
+
+def delete_directory_and_subdirectories(dir_path, db_name="filesystem.db"):
+    with _lock:
+        connection = _get_conn(db_name)
+        cursor = connection.cursor()
+
+        # 두 DELETE 를 하나의 트랜잭션으로 실행한다.
+        # with connection: 은 정상 종료 시 commit, 예외 발생 시 rollback 한다.
+        with connection:
+            cursor.execute("BEGIN IMMEDIATE")
+
+            # directory_structure 테이블에서 dir_path가 포함된 모든 레코드 삭제
+            cursor.execute(
+                """
+                DELETE FROM directory_structure
+                WHERE dir_path >= ? AND dir_path < ?
+                """,
+                _prefix_range(dir_path),
+            )
+
+            # file_info 테이블에서 file_path가 dir_path로 시작하는 모든 레코드 삭제
+            cursor.execute(
+                """
+                DELETE FROM file_info
+                WHERE file_path >= ? AND file_path < ?
+                """,
+                _prefix_range(dir_path),
+            )
+        invalidate_directory_structure(db_name)
     print(f"Deleted all records related to {dir_path} and its subdirectories.")
@@ -1,6 +1,7 @@
 import ast
 import gc
 import os
+import pymilvus
 from pymilvus import (
     MilvusClient,
     connections,
@@ -12,6 +13,14 @@ from pymilvus import (
 from .embedding import embedding
 from .sqlite import get_path_by_id
 
+# pymilvus 2.3 부터 insert/search 가 numpy 벡터를 그대로 받는다.
+# 그 이전 버전에서만 파이썬 리스트로 변환한다.
+_NUMPY_VECTORS = tuple(int(v) for v in pymilvus.__version__.split(".")[:2]) >= (2, 3)
+
+
+def _to_milvus_vectors(vectors):
+    return vectors if _NUMPY_VECTORS else vectors.tolist()
+
 
 def delete_db_lock_file(db_name):
     dir_path = os.path.dirname(db_name)
@@ -72,7 +81,7 @@ def save(db_name, id, queries):
             return
 
         # 쿼리 임베딩
-        query_embeddings = embedding(queries)
+        query_embeddings = _to_milvus_vectors(embedding(queries))
 
         # 임베딩 데이터 저장
         data = [
@@ -125,7 +134,7 @@ def search(db_name, query_list):
             print(f"Collection 'demo_collection' does not exist in {db_name}")
             return
 
-        query_vectors = embedding(query_list)
+        query_vectors = _to_milvus_vectors(embedding(query_list))
 
         res = client.search(
             collection_name="demo_collection",
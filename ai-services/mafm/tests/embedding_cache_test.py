@@ -0,0 +1,54 @@
+import os
+
+import numpy as np
+import pytest
+from mafm.rag.embedding_cache import EmbeddingCache, cache_key
+from mafm.rag.sqlite import _close_conn
+
+
+@pytest.fixture
+def cache_db(tmp_path):
+    db_name = str(tmp_path / "embeddings_cache.db")
+    yield db_name
+    _close_conn(db_name)
+
+
+def test_put_then_get(cache_db):
+    cache = EmbeddingCache(cache_db)
+    keys = [cache_key("model", "first"), cache_key("model", "second")]
+    vectors = np.array([[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]], dtype=np.float32)
+    cache.put_many(keys, vectors)
+
+    results = EmbeddingCache(cache_db).get_many(keys + [cache_key("model", "x")])
+    np.testing.assert_array_equal(results[0], vectors[0])
+    np.testing.assert_array_equal(results[1], vectors[1])
+    assert results[2] is None
+
+
+def test_missing_vector_file_is_a_miss(cache_db):
+    cache = EmbeddingCache(cache_db)
+    old_key = cache_key("model", "old")
+    cache.put_many([old_key], np.ones((1, 3), dtype=np.float32))
+    cache._vectors = None
+    os.remove(cache.vector_path)
+
+    # 인덱스만 남은 경우 0 벡터가 아니라 캐시 미스가 되어야 한다.
+    cache = EmbeddingCache(cache_db)
+    assert cache.get_many([old_key]) == [None]
+
+    new_key = cache_key("model", "new")
+    cache.put_many([old_key, new_key], np.full((2, 3), 2.0, dtype=np.float32))
+    results = cache.get_many([old_key, new_key])
+    np.testing.assert_array_equal(results[0], np.full(3, 2.0))
+    np.testing.assert_array_equal(results[1], np.full(3, 2.0))
+
+
+def test_truncated_vector_file_is_a_miss(cache_db):
+    cache = EmbeddingCache(cache_db)
+    keys = [cache_key("model", str(i)) for i in range(3)]
+    cache.put_many(keys, np.ones((3, 4), dtype=np.float32))
+    cache._vectors = None
+    with open(cache.vector_path, "r+b") as f:
+        f.truncate(4 * np.dtype(np.float16).itemsize)
+
+    assert EmbeddingCache(cache_db).get_many(keys) == [None, None, None]
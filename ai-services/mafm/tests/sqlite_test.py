@@ -0,0 +1,73 @@
+import pytest
+from mafm.rag.sqlite import (
+    _close_conn,
+    _get_conn,
+    change_directory_path,
+    delete_directory_and_subdirectories,
+    get_directory_structure,
+    get_file_info,
+    initialize_database,
+    insert_directory_structure,
+    insert_file_info_many,
+)
+
+
+@pytest.fixture
+def db_name(tmp_path):
+    name = str(tmp_path / "filesystem.db")
+    initialize_database(name)
+    yield name
+    _close_conn(name)
+
+
+def test_change_directory_path_rewrites_prefix(db_name):
+    insert_file_info_many(
+        [
+            ("/data/docs/a.txt", 0),
+            ("/data/docs/sub/b.txt", 0),
+            ("/data/Docs/c.txt", 0),
+            ("/data/other/d.txt", 0),
+        ],
+        db_name,
+    )
+    change_directory_path("/data/docs", "/data/moved", db_name)
+
+    paths = sorted(row[1] for row in get_file_info(db_name))
+    assert paths == [
+        "/data/Docs/c.txt",
+        "/data/moved/a.txt",
+        "/data/moved/sub/b.txt",
+        "/data/other/d.txt",
+    ]
+
+
+def test_prefix_is_not_a_like_pattern(db_name):
+    # 경로의 '%', '_' 는 와일드카드가 아니다.
+    insert_file_info_many(
+        [("/data/a_b/x.txt", 0), ("/data/aXb/y.txt", 0), ("/data/100%/z.txt", 0)],
+        db_name,
+    )
+    insert_directory_structure("1", "/data/a_b", "/data", db_name)
+    insert_directory_structure("2", "/data/aXb", "/data", db_name)
+
+    delete_directory_and_subdirectories("/data/a_b", db_name)
+    change_directory_path("/data/100%", "/data/full", db_name)
+
+    paths = sorted(row[1] for row in get_file_info(db_name))
+    assert paths == ["/data/aXb/y.txt", "/data/full/z.txt"]
+    assert get_directory_structure(db_name) == ["/data/aXb"]
+
+
+def test_prefix_range_covers_non_bmp_names(db_name):
+    insert_file_info_many([("/data/docs/\U0001f4c4.txt", 0)], db_name)
+    delete_directory_and_subdirectories("/data/docs", db_name)
+    assert get_file_info(db_name) == []
+
+
+def test_prefix_queries_use_path_index(db_name):
+    plan = _get_conn(db_name).execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM file_info "
+        "WHERE file_path >= ? AND file_path < ?",
+        ("/a", "/b"),
+    ).fetchall()
+    assert any("idx_file_info_path" in row[-1] for row in plan)
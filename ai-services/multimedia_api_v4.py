@@ -26,7 +26,7 @@ import io
 # Import enhanced components
 from enhanced_indexer_v4 import EnhancedFileIndexer
 from multimedia_processor import MultimediaProcessor
-from ai_vision_service import AIVisionService
+from ai_vision_service import get_ai_vision_service
 from speech_recognition_service import SpeechRecognitionService
 from performance_monitor import get_performance_monitor
 from db_connection_pool import get_db_connection
@@ -79,8 +79,9 @@ multimedia_processor = MultimediaProcessor(
     cache_dir=metadata_path
 )
 
+# Shares the instance already created by enhanced_indexer, so models load once and stay resident
 try:
-    ai_vision_service = AIVisionService(cache_dir=metadata_path)
+    ai_vision_service = get_ai_vision_service(cache_dir=metadata_path)
     logger.info("✅ AI Vision service available")
 except Exception as e:
     ai_vision_service = None
@@ -187,7 +188,7 @@ async def health_check():
 
 
 @app.post("/search/multimedia")
-async def search_multimedia_content(request: MultimediaSearchRequest):
+def search_multimedia_content(request: MultimediaSearchRequest):
     """Advanced multimedia content search"""
     logger.info("=== search_multimedia_content called ===")
     logger.info(f"Request: query='{request.query}', limit={request.limit}")
@@ -265,8 +266,10 @@ async def search_multimedia_content(request: MultimediaSearchRequest):
             results = []
             
             for row in rows:
-                # Convert Row to dict
-                if hasattr(row, 'keys'):
+                # Convert Row to dict (pool rows already are plain dicts)
+                if isinstance(row, dict):
+                    row_dict = row
+                elif hasattr(row, 'keys'):
                     row_dict = dict(row)
                 else:
                     # Fallback for tuple results
@@ -376,6 +379,21 @@ async def search_multimedia_content(request: MultimediaSearchRequest):
         }
 
 
+def _save_ai_analysis(file_path: str, ai_analysis_text: str):
+    """Store combined AI analysis text on the file record"""
+    with get_db_connection(db_path) as conn:
+        cursor = conn.cursor()
+        
+        # Update file record
+        cursor.execute("""
+            UPDATE files 
+            SET ai_analysis = ?, last_analyzed = ?
+            WHERE path = ?
+        """, (ai_analysis_text, time.time(), file_path))
+        
+        conn.commit()
+
+
 @app.post("/ai/analyze")
 async def ai_analyze_file(request: AIAnalysisRequest):
     """Perform AI analysis on a file"""
@@ -405,7 +423,9 @@ async def ai_analyze_file(request: AIAnalysisRequest):
         # Perform image analysis
         if analysis_type in ["image", "video"] and ai_vision_service:
             try:
-                description, confidence, metadata = ai_vision_service.analyze_image(str(file_path))
+                description, confidence, metadata = await asyncio.to_thread(
+                    ai_vision_service.analyze_image, str(file_path)
+                )
                 analysis_results["image_analysis"] = {
                     "description": description,
                     "confidence": confidence,
@@ -424,8 +444,8 @@ async def ai_analyze_file(request: AIAnalysisRequest):
                 else:
                     audio_path = str(file_path)
                 
-                text, confidence, metadata = speech_recognition_service.transcribe_audio(
-                    audio_path, language="ko"
+                text, confidence, metadata = await asyncio.to_thread(
+                    speech_recognition_service.transcribe_audio, audio_path, language="ko"
                 )
                 analysis_results["speech_analysis"] = {
                     "transcription": text,
@@ -439,7 +459,9 @@ async def ai_analyze_file(request: AIAnalysisRequest):
         # Perform general multimedia analysis
         if analysis_type == "multimedia":
             try:
-                text, success, metadata = multimedia_processor.extract_content(str(file_path))
+                text, success, metadata = await asyncio.to_thread(
+                    multimedia_processor.extract_content, str(file_path)
+                )
                 analysis_results["multimedia_analysis"] = {
                     "extracted_text": text,
                     "success": success,
@@ -452,26 +474,16 @@ async def ai_analyze_file(request: AIAnalysisRequest):
         # Update database with analysis results
         if analysis_results and not any("error" in result for result in analysis_results.values()):
             try:
-                with get_db_connection(db_path) as conn:
-                    cursor = conn.cursor()
-                    
-                    # Combine AI analysis text
-                    ai_text_parts = []
-                    if "image_analysis" in analysis_results:
-                        ai_text_parts.append(f"Image: {analysis_results['image_analysis']['description']}")
-                    if "speech_analysis" in analysis_results:
-                        ai_text_parts.append(f"Speech: {analysis_results['speech_analysis']['transcription']}")
-                    
-                    ai_analysis_text = " | ".join(ai_text_parts)
-                    
-                    # Update file record
-                    cursor.execute("""
-                        UPDATE files 
-                        SET ai_analysis = ?, last_analyzed = ?
-                        WHERE path = ?
-                    """, (ai_analysis_text, time.time(), str(file_path)))
-                    
-                    conn.commit()
+                # Combine AI analysis text
+                ai_text_parts = []
+                if "image_analysis" in analysis_results:
+                    ai_text_parts.append(f"Image: {analysis_results['image_analysis']['description']}")
+                if "speech_analysis" in analysis_results:
+                    ai_text_parts.append(f"Speech: {analysis_results['speech_analysis']['transcription']}")
+                
+                ai_analysis_text = " | ".join(ai_text_parts)
+                
+                await asyncio.to_thread(_save_ai_analysis, str(file_path), ai_analysis_text)
             except Exception as e:
                 logger.warning(f"Failed to update database with analysis results: {e}")
         
@@ -489,7 +501,7 @@ async def ai_analyze_file(request: AIAnalysisRequest):
 
 
 @app.get("/media/thumbnail/{file_id}")
-async def get_thumbnail(file_id: int, size: str = "medium"):
+def get_thumbnail(file_id: int, size: str = "medium"):
     """Get thumbnail for media file"""
     try:
         with get_db_connection(db_path) as conn:
@@ -585,7 +597,7 @@ async def upload_and_analyze(file: UploadFile = File(...), analysis_type: str =
 
 
 @app.get("/stats/multimedia")
-async def get_multimedia_statistics():
+def get_multimedia_statistics():
     """Get comprehensive multimedia processing statistics"""
     try:
         # Get indexer stats
@@ -665,7 +677,7 @@ async def get_multimedia_statistics():
 
 
 @app.get("/processing/status/{file_id}")
-async def get_processing_status(file_id: int):
+def get_processing_status(file_id: int):
     """Get processing status for a specific file"""
     try:
         with get_db_connection(db_path) as conn:
@@ -703,7 +715,7 @@ async def get_processing_status(file_id: int):
 
 
 @app.post("/processing/reprocess/{file_id}")
-async def reprocess_file(file_id: int, background_tasks: BackgroundTasks):
+def reprocess_file(file_id: int, background_tasks: BackgroundTasks):
     """Reprocess a file with latest multimedia capabilities"""
     try:
         with get_db_connection(db_path) as conn:
@@ -747,7 +759,7 @@ async def reprocess_file_background(task_id: str, file_path: str):
         }
         
         # Reindex the file
-        success = enhanced_indexer.index_file(file_path)
+        success = await asyncio.to_thread(enhanced_indexer.index_file, file_path)
         
         background_tasks_dict[task_id] = {
             "status": "completed" if success else "failed",
@@ -798,6 +810,13 @@ async def metrics():
     return Response(content=get_metrics(), media_type="text/plain")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release AI model memory on shutdown"""
+    if ai_vision_service:
+        ai_vision_service.close()
+
+
 # Middleware to track requests
 @app.middleware("http")
 async def track_requests(request: Request, call_next):
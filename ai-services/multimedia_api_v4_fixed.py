@@ -27,7 +27,7 @@ class MultimediaSearchRequest(BaseModel):
     include_ai_analysis: Optional[bool] = Field(default=False, description="Include AI analysis in results")
 
 @app.post("/search/multimedia/fixed")
-async def search_multimedia_content_fixed(request: MultimediaSearchRequest):
+def search_multimedia_content_fixed(request: MultimediaSearchRequest):
     """Fixed multimedia content search"""
     logger.info(f"Fixed search called: query='{request.query}', limit={request.limit}")
     
@@ -133,39 +133,109 @@ class MultimediaProcessor:
         """
         file_path = Path(file_path)
         
+        media_type, file_size, error_result = self._check_file(file_path)
+        if error_result:
+            return error_result
+        
+        # Process with appropriate processor
+        try:
+            processor = self.processors[media_type]
+            text, success, metadata = processor.extract_content(str(file_path))
+            return self._finish_result(file_path, media_type, file_size, text, success, metadata)
+            
+        except Exception as e:
+            self.logger.error(f"❌ {media_type.title()} processing error for {file_path}: {e}")
+            return "", False, {
+                "error": str(e), 
+                "media_type": media_type,
+                "processor": f"{media_type}_processor"
+            }
+    
+    def batch_extract_content(self, file_paths: List[str]) -> List[Tuple[str, bool, Dict[str, Any]]]:
+        """
+        Extract content from several multimedia files
+        
+        Audio files go through the audio processor's batch pipeline together (decoding
+        overlaps with batched STT); other files are extracted one by one.
+        
+        Returns:
+            list of (extracted_text, success, metadata) in the order of file_paths
+        """
+        paths = [Path(file_path) for file_path in file_paths]
+        results: List[Optional[Tuple[str, bool, Dict[str, Any]]]] = [None] * len(paths)
+        
+        audio_files = []  # (index, file_size)
+        for index, file_path in enumerate(paths):
+            if self.get_file_type(str(file_path)) != 'audio':
+                results[index] = self.extract_content(str(file_path))
+                continue
+            
+            _, file_size, error_result = self._check_file(file_path)
+            if error_result:
+                results[index] = error_result
+            else:
+                audio_files.append((index, file_size))
+        
+        if audio_files:
+            try:
+                audio_results = self.processors['audio'].batch_extract_content(
+                    [str(paths[index]) for index, _ in audio_files]
+                )
+            except Exception as e:
+                self.logger.error(f"❌ Audio batch processing error: {e}")
+                for index, _ in audio_files:
+                    results[index] = "", False, {
+                        "error": str(e),
+                        "media_type": "audio",
+                        "processor": "audio_processor"
+                    }
+            else:
+                for (index, file_size), (text, success, metadata) in zip(audio_files, audio_results):
+                    results[index] = self._finish_result(paths[index], 'audio', file_size, text, success, metadata)
+        
+        return results
+    
+    def _check_file(self, file_path: Path) -> Tuple[Optional[str], int, Optional[Tuple[str, bool, Dict[str, Any]]]]:
+        """
+        Validate a file before extraction
+        
+        Returns:
+            tuple: (media_type, file_size, error_result), error_result being the
+            (text, success, metadata) to return when the file can't be processed
+        """
         # Basic validation
         if not file_path.exists():
-            return "", False, {"error": "File does not exist"}
+            return None, 0, ("", False, {"error": "File does not exist"})
         
         if not file_path.is_file():
-            return "", False, {"error": "Path is not a file"}
+            return None, 0, ("", False, {"error": "Path is not a file"})
         
         # Check file size
         try:
             file_size = file_path.stat().st_size
             if file_size > self.max_file_size:
-                return "", False, {
+                return None, 0, ("", False, {
                     "error": f"File too large: {file_size} bytes (max: {self.max_file_size})",
                     "file_size": file_size
-                }
+                })
         except Exception as e:
-            return "", False, {"error": f"Cannot access file: {e}"}
+            return None, 0, ("", False, {"error": f"Cannot access file: {e}"})
         
         # Determine file type
         media_type = self.get_file_type(str(file_path))
         if not media_type:
-            return "", False, {
+            return None, 0, ("", False, {
                 "error": "Unsupported media format",
                 "extension": file_path.suffix.lower(),
                 "supported_formats": list(self.file_type_map.keys())
-            }
+            })
         
         # Check if appropriate processor is available
         if media_type not in self.processors:
-            return "", False, {
+            return None, 0, ("", False, {
                 "error": f"No processor available for {media_type} files",
                 "media_type": media_type
-            }
+            })
         
         # Apply type-specific size limits
         type_limits = {
@@ -175,40 +245,31 @@ class MultimediaProcessor:
         }
         
         if file_size > type_limits.get(media_type, self.max_file_size):
-            return "", False, {
+            return None, 0, ("", False, {
                 "error": f"{media_type.title()} file too large: {file_size} bytes (max: {type_limits[media_type]})",
                 "media_type": media_type,
                 "file_size": file_size
-            }
-        
-        # Process with appropriate processor
-        try:
-            processor = self.processors[media_type]
-            text, success, metadata = processor.extract_content(str(file_path))
-            
-            # Add common metadata
-            metadata.update({
-                "file_path": str(file_path),
-                "file_name": file_path.name,
-                "file_size": file_size,
-                "media_type": media_type,
-                "processor_used": f"{media_type}_processor"
             })
-            
-            if success:
-                self.logger.info(f"✅ {media_type.title()} content extracted from {file_path.name}: {len(text)} characters")
-            else:
-                self.logger.warning(f"⚠️ Failed to extract {media_type} content from {file_path.name}")
-            
-            return text, success, metadata
-            
-        except Exception as e:
-            self.logger.error(f"❌ {media_type.title()} processing error for {file_path}: {e}")
-            return "", False, {
-                "error": str(e), 
-                "media_type": media_type,
-                "processor": f"{media_type}_processor"
-            }
+        
+        return media_type, file_size, None
+    
+    def _finish_result(self, file_path: Path, media_type: str, file_size: int,
+                       text: str, success: bool, metadata: Dict[str, Any]) -> Tuple[str, bool, Dict[str, Any]]:
+        """Add common metadata to a processor's result and log the outcome"""
+        metadata.update({
+            "file_path": str(file_path),
+            "file_name": file_path.name,
+            "file_size": file_size,
+            "media_type": media_type,
+            "processor_used": f"{media_type}_processor"
+        })
+        
+        if success:
+            self.logger.info(f"✅ {media_type.title()} content extracted from {file_path.name}: {len(text)} characters")
+        else:
+            self.logger.warning(f"⚠️ Failed to extract {media_type} content from {file_path.name}")
+        
+        return text, success, metadata
     
     def get_file_info(self, file_path: str) -> Dict[str, Any]:
         """Get comprehensive file information and processing capabilities"""
@@ -0,0 +1,69 @@
+import threading
+import time
+
+import pytest
+
+import audio_processor
+from audio_processor import AudioProcessor, PIPELINE_QUEUE_BATCHES
+
+
+class _FakePipeline:
+    """Stands in for decoding and STT, tracking how many decoded files are held at once"""
+
+    def __init__(self, fail_after_batches=None):
+        self.lock = threading.Lock()
+        self.held = 0
+        self.peak = 0
+        self.batches = 0
+        self.fail_after_batches = fail_after_batches
+
+    def prepare(self, path):
+        with self.lock:
+            self.held += 1
+            self.peak = max(self.peak, self.held)
+        time.sleep(0.001)
+        return {"path": str(path)}, str(path), None, False
+
+    def transcribe(self, audio_inputs, batch_size):
+        self.batches += 1
+        if self.fail_after_batches is not None and self.batches > self.fail_after_batches:
+            raise RuntimeError("stt crashed")
+        time.sleep(0.005)  # Slower than decoding, so workers run ahead
+        with self.lock:
+            self.held -= len(audio_inputs)
+        return [(f"text {audio}", 0.9, False) for audio in audio_inputs]
+
+
+@pytest.fixture
+def processor(tmp_path, monkeypatch):
+    processor = AudioProcessor(enable_stt=False, cache_dir=str(tmp_path))
+    monkeypatch.setattr(processor, "_cache_result", lambda key, result: None)
+    monkeypatch.setattr(processor, "_load_cached_result", lambda key: None)
+    monkeypatch.setattr(
+        processor, "_safe_content_result",
+        lambda metadata, text, confidence: (text, True, metadata),
+    )
+    monkeypatch.setattr(audio_processor.os, "cpu_count", lambda: 16)
+    return processor
+
+
+def test_batch_extract_content_bounds_decoded_files(processor, monkeypatch):
+    pipeline = _FakePipeline()
+    monkeypatch.setattr(processor, "_prepare_content", pipeline.prepare)
+    monkeypatch.setattr(processor, "_transcribe_batch", pipeline.transcribe)
+    paths = [f"/audio/{i}.wav" for i in range(60)]
+
+    results = processor.batch_extract_content(paths, batch_size=2)
+
+    assert [text for text, _, _ in results] == [f"text {path}" for path in paths]
+    # 16 workers, but decoding, queued and untranscribed files together stay within the budget
+    assert pipeline.peak <= PIPELINE_QUEUE_BATCHES * 2
+
+
+def test_batch_extract_content_stt_failure_does_not_hang(processor, monkeypatch):
+    pipeline = _FakePipeline(fail_after_batches=1)
+    monkeypatch.setattr(processor, "_prepare_content", pipeline.prepare)
+    monkeypatch.setattr(processor, "_transcribe_batch", pipeline.transcribe)
+
+    with pytest.raises(RuntimeError):
+        processor.batch_extract_content([f"/audio/{i}.wav" for i in range(40)], batch_size=2)
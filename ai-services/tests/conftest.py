@@ -0,0 +1,109 @@
+import json
+import os
+import random
+import sqlite3
+
+import pytest
+
+from db_connection_pool import close_all_pools
+
+# files / files_fts / query_cache as created by EnhancedFileIndexer._init_database
+SCHEMA = (
+    """
+    CREATE TABLE files (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        path TEXT UNIQUE NOT NULL,
+        name TEXT NOT NULL,
+        extension TEXT,
+        size INTEGER,
+        modified_time REAL,
+        content_hash TEXT,
+        text_content TEXT,
+        content_extracted BOOLEAN DEFAULT 0,
+        extraction_metadata TEXT,
+        multimedia_content TEXT,
+        multimedia_metadata TEXT,
+        ai_analysis TEXT,
+        thumbnail_path TEXT,
+        processing_status TEXT,
+        media_type TEXT,
+        category TEXT,
+        metadata_json TEXT,
+        embedding_id TEXT,
+        indexed_at REAL,
+        last_analyzed REAL
+    )
+    """,
+    """
+    CREATE VIRTUAL TABLE files_fts USING fts5(
+        name, path, text_content, multimedia_content, ai_analysis,
+        content='files',
+        content_rowid='id'
+    )
+    """,
+    """
+    CREATE TRIGGER files_ai AFTER INSERT ON files BEGIN
+        INSERT INTO files_fts(rowid, name, path, text_content, multimedia_content, ai_analysis)
+        VALUES (new.id, new.name, new.path, new.text_content, new.multimedia_content, new.ai_analysis);
+    END
+    """,
+    "CREATE INDEX idx_files_extension ON files(extension)",
+    "CREATE INDEX idx_files_modified ON files(modified_time)",
+    """
+    CREATE TABLE query_cache (
+        query_hash TEXT PRIMARY KEY,
+        query TEXT,
+        results TEXT,
+        created_at REAL,
+        expires_at REAL
+    )
+    """,
+)
+
+NOW = 1_700_000_000
+DIRECTORIES = ["/home/u/docs", "/tmp", "/home/u/Downloads", "/var/x/.cache", "/home/u/a,b"]
+NAMES = [
+    "a.txt", "b.tmp", "B.TMP", "report.hwp", "c.log", "pic.png", "x.bak", "~$doc.docx",
+    "e.temp", "dup.txt", "z.old", "hello world.md", "notes.tmp.txt", "my~$file.txt",
+    "cache", "~lock.txt",
+]
+
+
+def _fixture_rows(count=2000, seed=7):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        directory = rng.choice(DIRECTORIES)
+        name = rng.choice(NAMES)
+        path = f"{directory}/{i % 300}/{name}" if rng.random() < 0.8 else f"{directory}/{name}.{i}"
+        name = os.path.basename(path)
+        extension = os.path.splitext(path)[1].lower()
+        size = rng.choice([0, 10, 100, 5 * 1024 * 1024, 200 * 1024 * 1024 + i])
+        category = rng.choice(["text", "image", "korean_document", None])
+        metadata = (
+            json.dumps({"category": category, "i": i}) if rng.random() < 0.9 else None
+        )
+        text = f"hello content {i}" if i % 3 else None
+        modified = NOW - i * 3600 * 24 * rng.random()
+        rows.append((path, name, extension, size, modified, text, i % 2, metadata, NOW))
+    return rows
+
+
+@pytest.fixture
+def files_db(tmp_path):
+    """Path of a files database populated with a fixed pseudo-random set of rows"""
+    db_path = str(tmp_path / "db" / "file-index.db")
+    os.makedirs(os.path.dirname(db_path))
+    conn = sqlite3.connect(db_path)
+    for statement in SCHEMA:
+        conn.execute(statement)
+    conn.executemany(
+        "INSERT OR IGNORE INTO files (path, name, extension, size, modified_time, "
+        "text_content, content_extracted, metadata_json, indexed_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        _fixture_rows(),
+    )
+    conn.commit()
+    conn.close()
+    yield db_path
+    close_all_pools()
@@ -0,0 +1,61 @@
+import content_extractor
+from content_extractor import ContentExtractor, shutdown_extract_pool
+
+
+def test_extract_many_matches_extract_content_and_reuses_pool(tmp_path, monkeypatch):
+    monkeypatch.setattr(content_extractor, "EXTRACT_WORKERS", 2)
+    paths = []
+    for i in range(6):
+        path = tmp_path / f"file{i}.txt"
+        path.write_text(f"line {i}\n\n\n\nmore   text {i}\n", encoding="utf-8")
+        paths.append(str(path))
+    paths.append(str(tmp_path / "missing.txt"))
+
+    extractor = ContentExtractor()
+    try:
+        first = extractor.extract_many(paths)
+        pool = content_extractor._extract_pool
+        assert pool is not None
+        second = extractor.extract_many(paths[:3])
+
+        assert content_extractor._extract_pool is pool
+        assert first == [extractor.extract_content(path) for path in paths]
+        assert second == first[:3]
+    finally:
+        shutdown_extract_pool()
+    assert content_extractor._extract_pool is None
+
+
+def test_extract_sample_rejects_files_extract_content_rejects(tmp_path):
+    extractor = ContentExtractor()
+    extractor.max_text_file_size = 50_000
+    path = tmp_path / "big.txt"
+    path.write_text("word " * 20_000, encoding="utf-8")
+
+    text, success, metadata = extractor.extract_sample(str(path), 200)
+
+    assert (text, success) == ("", False)
+    assert extractor.extract_content(str(path))[1] is False
+
+
+def test_extract_sample_fast_path_keeps_full_path_keys(tmp_path):
+    extractor = ContentExtractor()
+    path = tmp_path / "long.txt"
+    path.write_text("".join(f"line {i} of the log\n" for i in range(5_000)), encoding="utf-8")
+
+    text, success, metadata = extractor.extract_sample(str(path), 200)
+    full_text, _, full_metadata = extractor.extract_content(str(path))
+
+    assert success
+    assert text == full_text[:100] + "\n...\n" + full_text[-100:]
+    assert set(metadata) == set(full_metadata) | {"is_sample", "sample_size", "total_length", "total_length_unit"}
+    assert metadata["total_length"] == path.stat().st_size
+    assert metadata["total_length_unit"] == "bytes"
+
+
+def test_extract_sample_short_cleaned_text_is_not_marked_sample(tmp_path):
+    extractor = ContentExtractor()
+    path = tmp_path / "sparse.txt"
+    path.write_text("start" + " " * 50_000 + "\n" * 50_000 + "end", encoding="utf-8")
+
+    assert extractor.extract_sample(str(path), 200) == extractor.extract_content(str(path))
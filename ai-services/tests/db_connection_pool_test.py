@@ -0,0 +1,77 @@
+import sqlite3
+
+import pytest
+
+from db_connection_pool import ConnectionPool
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "db" / "pool.db"), max_connections=2)
+    with pool.get_connection() as conn:
+        conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)")
+        conn.commit()
+    yield pool
+    pool.close_all()
+
+
+def _names(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return [name for (name,) in conn.execute("SELECT name FROM items ORDER BY id")]
+    finally:
+        conn.close()
+
+
+def test_transaction_commits_all_writes(pool):
+    with pool.transaction() as conn:
+        conn.execute("INSERT INTO items (name) VALUES ('a')")
+        pool.execute_query("INSERT INTO items (name) VALUES (?)", ("b",))
+        pool.execute_many("INSERT INTO items (name) VALUES (?)", [("c",), ("d",)])
+        # Not visible to other connections until the block commits
+        assert _names(pool.db_path) == []
+
+    assert _names(pool.db_path) == ["a", "b", "c", "d"]
+
+
+def test_transaction_rollback_discards_writes(pool):
+    pool.execute_query("INSERT INTO items (name) VALUES (?)", ("kept",))
+
+    with pytest.raises(RuntimeError):
+        with pool.transaction() as conn:
+            conn.execute("INSERT INTO items (name) VALUES ('a')")
+            # execute_query/execute_many join the transaction instead of committing on their own
+            pool.execute_query("INSERT INTO items (name) VALUES (?)", ("b",))
+            pool.execute_many("INSERT INTO items (name) VALUES (?)", [("c",)])
+            raise RuntimeError("abort")
+
+    assert _names(pool.db_path) == ["kept"]
+    # The connection went back to the pool usable, outside any transaction
+    pool.execute_query("INSERT INTO items (name) VALUES (?)", ("after",))
+    assert _names(pool.db_path) == ["kept", "after"]
+
+
+def test_nested_transaction_joins_outer(pool):
+    with pytest.raises(RuntimeError):
+        with pool.transaction() as outer:
+            with pool.transaction() as inner:
+                assert inner is outer
+                inner.execute("INSERT INTO items (name) VALUES ('a')")
+            raise RuntimeError("abort")
+
+    assert _names(pool.db_path) == []
+
+
+def test_idle_connections_are_closed_on_return(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "db" / "idle.db"), max_connections=5,
+                          max_idle_time=0, check_interval=0)
+    try:
+        with pool.get_connection():
+            with pool.get_connection():
+                with pool.get_connection():
+                    with pool.get_connection():
+                        pass
+        # Returning a connection runs the cleanup, which keeps the two-connection minimum
+        assert pool.get_stats()["total_connections"] == 2
+    finally:
+        pool.close_all()
@@ -0,0 +1,188 @@
+import json
+import sqlite3
+import time
+
+import pytest
+
+from db_manager import DatabaseManager
+
+from .conftest import NOW
+
+
+def test_cached_search_results_are_not_shared(files_db):
+    manager = DatabaseManager(files_db)
+    first = manager.search_files("hello", limit=5)
+    assert first
+
+    # In-process cache hit, then a hit after the in-process entry was mutated by a caller
+    second = manager.search_files("hello", limit=5)
+    second[0]["metadata"]["category"] = "changed"
+    second.pop()
+    third = manager.search_files("hello", limit=5)
+
+    assert third == first
+    assert third[0]["metadata"] is not second[0]["metadata"]
+
+
+def test_query_cache_table_hit_matches_fresh_search(files_db):
+    fresh = DatabaseManager(files_db).search_files("hello", limit=5)
+    # A second manager has an empty in-process cache and reads the query_cache table
+    assert DatabaseManager(files_db).search_files("hello", limit=5) == fresh
+
+
+# The queries below are the ones DatabaseManager ran before its SQL was rewritten for
+# speed; each test checks the rewrite still returns the same rows.
+
+def _rows(db_path, sql, params=()):
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    try:
+        return [dict(row) for row in conn.execute(sql, params).fetchall()]
+    finally:
+        conn.close()
+
+
+def _listing(row, **extra):
+    result = {
+        "path": row["path"],
+        "name": row["name"],
+        "size": row["size"],
+        "modified": row["modified_time"],
+        "metadata": json.loads(row["metadata_json"]) if row["metadata_json"] else {},
+    }
+    result.update(extra)
+    return result
+
+
+@pytest.fixture
+def frozen_time(monkeypatch):
+    monkeypatch.setattr(time, "time", lambda: NOW + 10)
+
+
+def test_temp_files_match_like_query(files_db):
+    name_patterns = ["%.tmp", "%.temp", "%~$%", "%.bak", "%.old", "%.log"]
+    dir_patterns = ["%/tmp/%", "%/temp/%", "%/.cache/%", "%/Downloads/%"]
+    conditions = ["name LIKE ?" for _ in name_patterns] + ["path LIKE ?" for _ in dir_patterns]
+    where = " OR ".join(conditions)
+    params = name_patterns + dir_patterns
+
+    expected = _rows(
+        files_db,
+        f"SELECT * FROM files WHERE {where} ORDER BY size DESC, path LIMIT 100",
+        params,
+    )
+    assert DatabaseManager(files_db).get_temp_files() == [_listing(row) for row in expected]
+
+    # Beyond the top 100: every matching file is found, including "~$" in mid-name
+    # and upper-case extensions
+    all_matches = {row["path"] for row in _rows(files_db, f"SELECT path FROM files WHERE {where}", params)}
+    assert any("my~$file" in path for path in all_matches)
+    assert any(path.endswith("B.TMP") for path in all_matches)
+    conn = sqlite3.connect(files_db)
+    conn.execute("DELETE FROM files WHERE id % 20 != 0")
+    conn.commit()
+    conn.close()
+    expected = {row["path"] for row in _rows(files_db, f"SELECT path FROM files WHERE {where}", params)}
+    assert 0 < len(expected) < 100
+    assert {row["path"] for row in DatabaseManager(files_db).get_temp_files()} == expected
+
+
+def test_search_files_directories_match_placeholder_query(files_db):
+    paths = [row["path"] for row in _rows(files_db, "SELECT path FROM files ORDER BY id LIMIT 40")]
+    manager = DatabaseManager(files_db)
+    for directories, limit in ((paths[:3], 2), (paths, 25), (paths[5:6], 10)):
+        placeholders = ",".join("?" for _ in directories)
+        expected = _rows(
+            files_db,
+            f"SELECT path FROM files f WHERE 1=1 AND f.path IN ({placeholders}) "
+            f"ORDER BY f.modified_time DESC LIMIT {limit}",
+            directories,
+        )
+        found = manager.search_files("", directories=directories, limit=limit)
+        assert [r["path"] for r in found] == [row["path"] for row in expected]
+
+
+def test_search_by_extension_matches_placeholder_query(files_db):
+    manager = DatabaseManager(files_db)
+    for extensions in ([".txt"], [".txt", ".log"], [".tmp", ".bak", ".hwp"], [".none"]):
+        placeholders = ",".join("?" for _ in extensions)
+        expected = _rows(
+            files_db,
+            f"SELECT * FROM files WHERE extension IN ({placeholders}) "
+            "ORDER BY modified_time DESC LIMIT 30",
+            extensions,
+        )
+        assert manager.search_by_extension(extensions, 30) == [_listing(row) for row in expected]
+
+
+def test_find_duplicates_keeps_paths_with_commas(files_db):
+    groups = DatabaseManager(files_db).find_duplicates()
+    assert groups
+    assert any("/home/u/a,b/" in path for group in groups for path in group["paths"])
+
+    old = {
+        (row["name"], row["size"]): row
+        for row in _rows(
+            files_db,
+            "SELECT name, size, COUNT(*) as count, GROUP_CONCAT(path) as paths FROM files "
+            "WHERE size > 0 GROUP BY name, size HAVING COUNT(*) > 1 ORDER BY size DESC, count DESC",
+        )
+    }
+    assert [(g["name"], g["size"]) for g in groups] == list(old)
+    for group in groups:
+        members = _rows(
+            files_db,
+            "SELECT path FROM files WHERE name = ? AND size = ?",
+            (group["name"], group["size"]),
+        )
+        assert sorted(group["paths"]) == sorted(row["path"] for row in members)
+        assert group["count"] == len(group["paths"]) == old[(group["name"], group["size"])]["count"]
+        if not any("," in path for path in group["paths"]):
+            assert group["paths"] == old[(group["name"], group["size"])]["paths"].split(",")
+
+
+def test_listings_match_fetchall_queries(files_db, frozen_time):
+    manager = DatabaseManager(files_db)
+
+    expected = _rows(
+        files_db,
+        "SELECT * FROM files WHERE json_extract(metadata_json, '$.category') = ? "
+        "ORDER BY modified_time DESC LIMIT ?",
+        ("text", 30),
+    )
+    assert manager.search_by_category("text", 30) == [_listing(row) for row in expected]
+
+    expected = _rows(
+        files_db,
+        "SELECT * FROM files WHERE modified_time > ? ORDER BY modified_time DESC LIMIT ?",
+        (NOW + 10 - 24 * 30 * 3600, 40),
+    )
+    assert manager.get_recent_files(24 * 30, 40) == [_listing(row) for row in expected]
+
+    expected = _rows(
+        files_db,
+        "SELECT * FROM files WHERE size > ? ORDER BY size DESC LIMIT 100",
+        (100 * 1024 * 1024,),
+    )
+    assert manager.get_large_files(100) == [
+        _listing(row, size_mb=round(row["size"] / (1024 * 1024), 2)) for row in expected
+    ]
+
+    expected = _rows(
+        files_db,
+        "SELECT * FROM files WHERE modified_time < ? ORDER BY modified_time ASC LIMIT 100",
+        (NOW + 10 - 30 * 24 * 3600,),
+    )
+    assert manager.get_old_files(30) == [
+        _listing(row, days_old=int((NOW + 10 - row["modified_time"]) / (24 * 3600)))
+        for row in expected
+    ]
+
+    expected = _rows(
+        files_db, "SELECT * FROM files WHERE size = 0 ORDER BY modified_time DESC LIMIT 100"
+    )
+    assert manager.get_empty_files() == [_listing(row) for row in expected]
+
+    row = expected[0]
+    assert manager.get_file_by_path(row["path"]) == _listing(row, indexed_at=row["indexed_at"])
+    assert manager.get_file_by_path("/no/such/file") is None
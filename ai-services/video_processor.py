@@ -7,12 +7,13 @@ Metadata extraction, subtitle processing, STT, and thumbnail generation
 import os
 import json
 import logging
-import hashlib
 import subprocess
 from pathlib import Path
 from typing import Dict, Any, Tuple, List, Optional
 import mimetypes
 
+from file_utils import path_hash
+
 logger = logging.getLogger(__name__)
 
 
@@ -464,7 +465,7 @@ class VideoProcessor:
             audio_dir.mkdir(exist_ok=True)
             
             # Generate audio filename
-            file_hash = hashlib.md5(str(video_path).encode()).hexdigest()[:12]
+            file_hash = path_hash(video_path)
             audio_name = f"{file_hash}_{video_path.stem}.wav"
             audio_path = audio_dir / audio_name
             
@@ -553,7 +554,7 @@ class VideoProcessor:
             thumb_dir = self.cache_dir / "video_thumbnails"
             thumb_dir.mkdir(exist_ok=True)
             
-            file_hash = hashlib.md5(str(video_path).encode()).hexdigest()[:12]
+            file_hash = path_hash(video_path)
             thumbnail_paths = []
             
             # Generate thumbnails at different time points